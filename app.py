@@ -5,6 +5,7 @@ BirdNET Streamlit Viewer - 独立版
 """
 
 import sys
+import importlib.util
 from pathlib import Path
 
 # 必要なパスを追加
@@ -18,16 +19,82 @@ sys.path.insert(0, str(lib_path))
 sys.path.insert(0, str(project_root))
 
 # 設定読み込み
-from config import validate_configuration, get_lib_path
-import streamlit as st
+from config import validate_configuration, clear_config_cache, get_lib_path
+
+# Streamlitは初回使用時に読み込む（モジュールとしてimportするだけなら不要）
+_st = None
+_validate_cached = None
+
+def _get_st():
+    """Streamlitモジュールを取得（遅延インポート）"""
+    global _st
+    if _st is None:
+        import streamlit
+        _st = streamlit
+    return _st
+
+# db_viewerのモジュール名（sys.modulesのキー）
+DB_VIEWER_MODULE = "db_viewer"
+
+def load_db_viewer(db_viewer_path: Path):
+    """
+    db_viewer.pyをモジュールとして読み込み（再実行時はsys.modulesから再利用）
+    
+    Args:
+        db_viewer_path: db_viewer.pyのパス
+        
+    Returns:
+        読み込んだモジュール
+    """
+    mtime = db_viewer_path.stat().st_mtime
+    module = sys.modules.get(DB_VIEWER_MODULE)
+    
+    # ファイルが更新されていなければキャッシュ済みモジュールを使用
+    if module is not None and getattr(module, "_source_mtime", None) == mtime:
+        return module
+    
+    spec = importlib.util.spec_from_file_location(DB_VIEWER_MODULE, db_viewer_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[DB_VIEWER_MODULE] = module
+    
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        # 読み込み途中のモジュールを残さない
+        sys.modules.pop(DB_VIEWER_MODULE, None)
+        raise
+    
+    module._source_mtime = mtime
+    return module
+
+def _get_cached_validator():
+    """st.cache_resourceでラップした設定検証関数を取得"""
+    global _validate_cached
+    if _validate_cached is None:
+        _validate_cached = _get_st().cache_resource(validate_configuration)
+    return _validate_cached
+
+def validate_configuration_cached() -> bool:
+    """設定検証（再実行ごとのファイル存在確認を省略するためキャッシュ）"""
+    return _get_cached_validator()()
+
+def reload_configuration():
+    """設定関連のキャッシュをクリアして再検証させる"""
+    clear_config_cache()
+    _get_cached_validator().clear()
 
 def main():
     """メインアプリケーション"""
+    st = _get_st()
     
     # 設定検証
-    if not validate_configuration():
+    if not validate_configuration_cached():
         st.error("❌ 設定エラー: データベースパスが正しく設定されていません")
         
+        if st.sidebar.button("🔄 設定を再読み込み", use_container_width=True):
+            reload_configuration()
+            st.rerun()
+        
         st.markdown("### 🔧 設定方法")
         st.markdown("以下のいずれかの方法で設定を行ってください：")
         
@@ -55,12 +122,9 @@ def main():
             st.error("❌ streamlit_viewer/db_viewer.py が見つかりません。")
             st.stop()
         
-        # db_viewer.pyの内容を読み込んで実行
-        with open(db_viewer_path, 'r', encoding='utf-8') as f:
-            db_viewer_code = f.read()
-        
-        # グローバル名前空間で実行
-        exec(db_viewer_code, globals())
+        # db_viewerモジュールを読み込んで実行
+        db_viewer = load_db_viewer(db_viewer_path)
+        db_viewer.main()
             
     except Exception as e:
         st.error(f"❌ アプリケーション起動エラー: {e}")
@@ -5,12 +5,58 @@ BirdNet DB Viewer 設定ファイル（独立版）
 
 import os
 import json
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+# JSONパーサー（orjsonがあれば高速なC実装を使用）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 設定ファイルのパス
+CONFIG_FILE = Path(__file__).parent / "config.json"
+
+@lru_cache(maxsize=1)
+def _load_config_cached(mtime: float) -> Dict[str, Any]:
+    """
+    config.jsonを読み込み（更新時刻をキーにキャッシュ）
+    
+    Args:
+        mtime: config.jsonの更新時刻（ファイルがない場合は0）
+        
+    Returns:
+        設定辞書（読み込めない場合は空の辞書）
+    """
+    if not mtime:
+        return {}
+    
+    try:
+        return _json_loads(CONFIG_FILE.read_bytes())
+    except (OSError, ValueError) as e:
+        print(f"設定ファイル読み込みエラー: {e}")
+        return {}
+
+def _load_config() -> Dict[str, Any]:
+    """config.jsonの内容を取得（更新されていなければキャッシュを返す）"""
+    try:
+        mtime = CONFIG_FILE.stat().st_mtime
+    except OSError:
+        mtime = 0
+    return _load_config_cached(mtime)
+
 # プロジェクトルートパス（独立版用）
+@lru_cache(maxsize=1)
 def get_project_root() -> Path:
-    """プロジェクトルートディレクトリを取得（環境変数またはconfig.jsonから）"""
+    """
+    プロジェクトルートディレクトリを取得（環境変数またはconfig.jsonから）
+    
+    結果はキャッシュされるため、設定変更の反映にはプロセス再起動か
+    clear_config_cache() の呼び出しが必要
+    """
     # 環境変数から取得
     config_path = os.getenv('BIRDNET_DATABASE_PATH')
     if config_path:
@@ -21,43 +67,40 @@ def get_project_root() -> Path:
 
 def load_database_path_from_config() -> Path:
     """config.jsonから設定を読み込み"""
-    config_file = Path(__file__).parent / "config.json"
-    
-    if config_file.exists():
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                database_path = config.get('database_path')
-                if database_path:
-                    return Path(database_path)
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"設定ファイル読み込みエラー: {e}")
+    database_path = _load_config().get('database_path')
+    if database_path:
+        return Path(database_path)
     
     # デフォルトまたはエラー時は現在のディレクトリを返す
     return Path(__file__).resolve().parent
 
+@lru_cache(maxsize=1)
 def get_configured_database_path() -> Path:
-    """設定されたデータベースフォルダのパスを取得"""
+    """
+    設定されたデータベースフォルダのパスを取得
+    
+    結果はキャッシュされるため、設定変更の反映にはプロセス再起動か
+    clear_config_cache() の呼び出しが必要
+    """
     # 環境変数から取得
     db_path = os.getenv('BIRDNET_DATABASE_PATH')
     if db_path:
         return Path(db_path)
     
     # 設定ファイルから取得
-    config_file = Path(__file__).parent / "config.json"
-    if config_file.exists():
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                database_path = config.get('database_path')
-                if database_path:
-                    return Path(database_path)
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"設定ファイル読み込みエラー: {e}")
+    database_path = _load_config().get('database_path')
+    if database_path:
+        return Path(database_path)
     
     # デフォルト値（現在のディレクトリのdatabaseフォルダ）
     return Path(__file__).resolve().parent / "database"
 
+def clear_config_cache():
+    """設定関連のキャッシュをクリア（設定変更の反映・テスト用）"""
+    get_project_root.cache_clear()
+    get_configured_database_path.cache_clear()
+    _load_config_cached.cache_clear()
+
 def get_lib_path() -> Path:
     """libディレクトリのパスを取得"""
     return Path(__file__).resolve().parent / "lib"
@@ -70,12 +113,12 @@ def validate_configuration() -> bool:
             print(f"データベースフォルダが見つかりません: {db_path}")
             return False
         
-        # データベースファイルの存在チェック
+        # データベースファイルの存在チェック（メインが見つかれば代替パスは確認しない）
         db_config = DatabaseConfig()
-        main_db = Path(db_config.get_database_path())
-        alt_paths = [Path(p) for p in db_config.get_alternative_paths()]
+        if Path(db_config.get_database_path()).exists():
+            return True
         
-        if not main_db.exists() and not any(p.exists() for p in alt_paths):
+        if not any(Path(p).exists() for p in db_config.get_alternative_paths()):
             print("データベースファイルが見つかりません")
             return False
         
@@ -108,52 +151,29 @@ class DatabaseConfig:
 class AudioConfig:
     """音声ファイル関連の設定"""
     
+    # サポートされている音声フォーマット
+    SUPPORTED_FORMATS = ('.wav', '.mp3', '.flac', '.aac', '.ogg', '.m4a')
+    
     @staticmethod
     def get_audio_base_path() -> Path:
         """音声ファイルのベースパスを取得"""
         db_folder = get_configured_database_path()
         
         # 設定ファイルから音声パスを取得
-        config_file = Path(__file__).parent / "config.json"
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    audio_path = config.get('audio_path')
-                    if audio_path:
-                        return Path(audio_path)
-            except (json.JSONDecodeError, KeyError):
-                pass
+        audio_path = _load_config().get('audio_path')
+        if audio_path:
+            return Path(audio_path)
         
         # デフォルトはdatabaseフォルダ内のaudioフォルダ
         return db_folder / "audio"
     
     @staticmethod
-    def get_supported_formats() -> list:
+    def get_supported_formats() -> tuple:
         """サポートされている音声フォーマット"""
-        return ['.wav', '.mp3', '.flac', '.aac', '.ogg', '.m4a']
+        return AudioConfig.SUPPORTED_FORMATS
 
-# アプリケーション設定
-class AppConfig:
-    """アプリケーション全体の設定"""
-    
-    # ページ設定
-    PAGE_TITLE = "BirdNet DB ビューワー（独立版）"
-    PAGE_ICON = "🐦"
-    LAYOUT = "wide"
-    
-    # デフォルト値
-    DEFAULT_LIMIT_OPTIONS = [10, 50, 100, 500, 1000]
-    MAX_DISPLAY_RECORDS = 10000
-    DEFAULT_CONFIDENCE_MIN = 0.0
-    
-    # UI設定
-    ITEMS_PER_PAGE = 10
-    
-    @staticmethod
-    def get_custom_css() -> str:
-        """カスタムCSSを取得"""
-        return """
+# カスタムCSS（モジュール読み込み時に1回だけ生成）
+_CUSTOM_CSS = """
         <style>
         /* メインコンテナ */
         .main .block-container {
@@ -219,6 +239,28 @@ class AppConfig:
         </style>
         """
 
+# アプリケーション設定
+class AppConfig:
+    """アプリケーション全体の設定"""
+    
+    # ページ設定
+    PAGE_TITLE = "BirdNet DB ビューワー（独立版）"
+    PAGE_ICON = "🐦"
+    LAYOUT = "wide"
+    
+    # デフォルト値
+    DEFAULT_LIMIT_OPTIONS = [10, 50, 100, 500, 1000]
+    MAX_DISPLAY_RECORDS = 10000
+    DEFAULT_CONFIDENCE_MIN = 0.0
+    
+    # UI設定
+    ITEMS_PER_PAGE = 10
+    
+    @staticmethod
+    def get_custom_css() -> str:
+        """カスタムCSSを取得"""
+        return _CUSTOM_CSS
+
 # 検索・フィルタ設定
 class SearchConfig:
     """検索とフィルタの設定"""
@@ -247,20 +289,20 @@ class SearchConfig:
     }
 
 # エクスポート設定
+EXPORT_TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+
 class ExportConfig:
     """データエクスポートの設定"""
     
     @staticmethod
     def get_csv_filename() -> str:
         """CSVファイル名を生成"""
-        from datetime import datetime
-        return f"birdnet_search_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        return f"birdnet_search_results_{datetime.now().strftime(EXPORT_TIMESTAMP_FORMAT)}.csv"
     
     @staticmethod
     def get_json_filename() -> str:
         """JSONファイル名を生成"""
-        from datetime import datetime
-        return f"birdnet_search_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        return f"birdnet_search_results_{datetime.now().strftime(EXPORT_TIMESTAMP_FORMAT)}.json"
 
 # 全設定をまとめる
 def get_all_config() -> Dict[str, Any]:
@@ -4,13 +4,110 @@
 """
 
 import os
-from pathlib import Path
+import re
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
 from typing import Dict, List, Optional, Tuple
 import logging
 
 # ロガー設定
 logger = logging.getLogger(__name__)
 
+# 対応音声形式（WAVを優先）
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.m4a', '.ogg')
+
+# ファイルシステムに安全でない文字（英数字・_・- 以外）
+_UNSAFE_DIR_CHARS = re.compile(r"[^A-Za-z0-9_\-]")
+
+# 時刻文字列のパターン（"10m26s" / "626.0" / "10:26"）
+_TIME_PATTERN = re.compile(
+    r"^(?:(\d+)m(\d+)s"
+    r"|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+    r"|(\d+):(\d+))$"
+)
+
+@lru_cache(maxsize=4096)
+def _parse_time_string(time_value: str) -> float:
+    """
+    時刻文字列を秒数に変換（セッション内で同じ値が繰り返されるためキャッシュ）
+    
+    Args:
+        time_value: 時刻文字列（"10m26s" / "626.0" / "10:26"）
+        
+    Returns:
+        秒単位のfloat値
+        
+    Raises:
+        ValueError: 変換できない場合
+    """
+    match = _TIME_PATTERN.match(time_value.strip())
+    if match:
+        minutes, seconds, number, mm, ss = match.groups()
+        
+        # パターン1: "10m26s" 形式
+        if minutes is not None:
+            return float(int(minutes) * 60 + int(seconds))
+        
+        # パターン2: "626.0" のような数値文字列
+        if number is not None:
+            return float(number)
+        
+        # パターン3: "10:26" のような mm:ss 形式
+        return float(int(mm) * 60 + int(ss))
+    
+    raise ValueError(f"時刻値を変換できません: {time_value} (型: {type(time_value)})")
+
+# 時刻値の型 -> 変換関数
+_TIME_PARSERS = {
+    int: float,
+    float: float,
+    str: _parse_time_string,
+}
+
+def _scan_total_size(root, suffix: str) -> int:
+    """
+    ディレクトリ以下の指定拡張子ファイルの合計サイズを取得（os.scandirで再帰走査）
+    
+    Args:
+        root: 走査するディレクトリ
+        suffix: 対象とする拡張子（例: ".wav"）
+        
+    Returns:
+        合計サイズ（バイト、ディレクトリがない場合は0）
+    """
+    try:
+        entries = os.scandir(root)
+    except (FileNotFoundError, NotADirectoryError):
+        return 0
+    
+    total = 0
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                total += _scan_total_size(entry.path, suffix)
+            elif entry.name.endswith(suffix):
+                total += entry.stat().st_size
+    return total
+
+def _count_files(root, suffix: str) -> int:
+    """
+    ディレクトリ直下の指定拡張子ファイル数を取得
+    
+    Args:
+        root: 対象ディレクトリ
+        suffix: 対象とする拡張子（例: ".png"）
+        
+    Returns:
+        ファイル数（ディレクトリがない場合は0）
+    """
+    try:
+        entries = os.scandir(root)
+    except (FileNotFoundError, NotADirectoryError):
+        return 0
+    
+    with entries:
+        return sum(1 for entry in entries if entry.name.endswith(suffix) and entry.is_file())
+
 class AudioFileManager:
     """音声ファイル管理クラス"""
     
@@ -30,11 +127,18 @@ class AudioFileManager:
         self.spectrograms_dir = self.database_dir / "spectrograms"
         self.source_audio_dir = self.database_dir / "audio"
         
-        # ディレクトリ存在確認・作成
-        self._ensure_directories()
+        # ディレクトリは書き込み時に作成（読み取り専用の処理ではmkdirしない）
+        self._dirs_ready = False
+        
+        # 元音声ファイルのインデックス（ファイル名stem -> パス）と構築時のディレクトリ更新時刻
+        self._source_index: Optional[Dict[str, str]] = None
+        self._source_index_mtimes: Optional[Tuple[int, ...]] = None
     
     def _ensure_directories(self):
-        """必要なディレクトリの存在確認・作成"""
+        """必要なディレクトリの存在確認・作成（インスタンスごとに初回のみ）"""
+        if self._dirs_ready:
+            return
+        
         directories = [
             self.audio_segments_dir,
             self.spectrograms_dir,
@@ -46,6 +150,8 @@ class AudioFileManager:
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
             logger.debug(f"ディレクトリ確認: {directory}")
+        
+        self._dirs_ready = True
     
     def find_source_audio_file(self, filename_stem: str) -> Optional[str]:
         """
@@ -57,31 +163,109 @@ class AudioFileManager:
         Returns:
             見つかった音声ファイルの絶対パス、またはNone
         """
-        # 検索対象ディレクトリ
+        # completed/ と inbox/ のインデックスから検索
+        source_path = self._get_source_index().get(filename_stem)
+        if source_path:
+            logger.debug(f"音声ファイル発見: {source_path}")
+            return source_path
+        
+        # プロジェクト全体を検索（最終手段）
+        audio_file = self._search_project_tree(filename_stem)
+        if audio_file:
+            logger.info(f"音声ファイル発見（全体検索）: {audio_file}")
+            return audio_file
+        
+        logger.warning(f"音声ファイルが見つかりません: {filename_stem}")
+        return None
+    
+    def _get_source_index(self) -> Dict[str, str]:
+        """
+        元音声ファイルのインデックスを取得（検索ディレクトリが更新された場合は再構築）
+        
+        Returns:
+            ファイル名（拡張子なし） -> 絶対パスの辞書
+        """
         search_dirs = [
             self.source_audio_dir / "completed",
             self.source_audio_dir / "inbox"
         ]
         
-        # 対応音声形式（WAVを優先）
-        audio_extensions = ['.wav', '.mp3', '.flac', '.m4a', '.ogg']
-        
+        # ディレクトリの更新時刻はファイルの追加・削除で変わる
+        mtimes = []
         for search_dir in search_dirs:
-            for ext in audio_extensions:
-                potential_path = search_dir / f"{filename_stem}{ext}"
-                if potential_path.exists():
-                    logger.debug(f"音声ファイル発見: {potential_path}")
-                    return str(potential_path)
+            try:
+                mtimes.append(search_dir.stat().st_mtime_ns)
+            except OSError:
+                mtimes.append(0)
+        mtimes = tuple(mtimes)
         
-        # プロジェクト全体を検索（最終手段）
-        for ext in audio_extensions:
-            for audio_file in self.project_root.rglob(f"{filename_stem}{ext}"):
-                if audio_file.exists():
-                    logger.info(f"音声ファイル発見（全体検索）: {audio_file}")
-                    return str(audio_file)
+        if self._source_index is None or mtimes != self._source_index_mtimes:
+            self._source_index = self._build_source_index(search_dirs)
+            self._source_index_mtimes = mtimes
+            logger.debug(f"音声ファイルインデックス構築: {len(self._source_index)}件")
         
-        logger.warning(f"音声ファイルが見つかりません: {filename_stem}")
-        return None
+        return self._source_index
+    
+    def _build_source_index(self, search_dirs: List[Path]) -> Dict[str, str]:
+        """
+        検索ディレクトリ直下の音声ファイルからインデックスを構築
+        
+        Args:
+            search_dirs: 検索対象ディレクトリ（優先順）
+            
+        Returns:
+            ファイル名（拡張子なし） -> 絶対パスの辞書
+        """
+        extension_ranks = {ext: rank for rank, ext in enumerate(AUDIO_EXTENSIONS)}
+        index = {}
+        ranks = {}
+        
+        for dir_rank, search_dir in enumerate(search_dirs):
+            try:
+                entries = os.scandir(search_dir)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            
+            with entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    ext_rank = extension_ranks.get(ext)
+                    if ext_rank is None or not entry.is_file():
+                        continue
+                    
+                    # ディレクトリ順 → 拡張子順（WAV優先）で最初の候補を採用
+                    rank = (dir_rank, ext_rank)
+                    if stem not in ranks or rank < ranks[stem]:
+                        ranks[stem] = rank
+                        index[stem] = entry.path
+        
+        return index
+    
+    def _search_project_tree(self, filename_stem: str) -> Optional[str]:
+        """
+        プロジェクト全体を1回の走査で検索（拡張子の優先順位を維持）
+        
+        Args:
+            filename_stem: ファイル名（拡張子なし）
+            
+        Returns:
+            見つかった音声ファイルの絶対パス、またはNone
+        """
+        # ファイル名 -> 拡張子の優先順位
+        candidates = {f"{filename_stem}{ext}": rank for rank, ext in enumerate(AUDIO_EXTENSIONS)}
+        best_rank = len(AUDIO_EXTENSIONS)
+        best_path = None
+        
+        for dirpath, _, filenames in os.walk(self.project_root):
+            for name in filenames:
+                rank = candidates.get(name)
+                if rank is not None and rank < best_rank:
+                    best_rank = rank
+                    best_path = os.path.join(dirpath, name)
+                    if rank == 0:  # WAVが見つかれば走査終了
+                        return best_path
+        
+        return best_path
     
     def generate_session_directory_name(self, session_name: str) -> str:
         """
@@ -93,15 +277,8 @@ class AudioFileManager:
         Returns:
             サニタイズされたディレクトリ名
         """
-        # ファイルシステムに安全な文字のみ残す
-        safe_chars = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
-        safe_name = "".join(c if c in safe_chars else "_" for c in session_name)
-        
-        # 長すぎる場合は短縮
-        if len(safe_name) > 100:
-            safe_name = safe_name[:100]
-        
-        return safe_name
+        # ファイルシステムに安全な文字のみ残し、長すぎる場合は短縮
+        return _UNSAFE_DIR_CHARS.sub("_", session_name)[:100]
     
     def get_relative_path(self, absolute_path: str, base_dir: str = "database") -> str:
         """
@@ -119,10 +296,10 @@ class AudioFileManager:
         # database ディレクトリからの相対パスを生成
         try:
             rel_path = abs_path.relative_to(self.database_dir)
-            return str(rel_path).replace("\\", "/")  # Unix形式のパス区切り
+            return rel_path.as_posix()  # Unix形式のパス区切り
         except ValueError:
             # database外のファイルの場合
-            return str(abs_path).replace("\\", "/")
+            return abs_path.as_posix()
     
     def resolve_relative_path(self, relative_path: str) -> str:
         """
@@ -134,9 +311,8 @@ class AudioFileManager:
         Returns:
             絶対パス
         """
-        # Unix形式パスをWindowsパスに変換
-        normalized_path = relative_path.replace("/", os.sep)
-        absolute_path = self.database_dir / normalized_path
+        # Unix形式パスを要素に分解してOSのパス区切りで結合
+        absolute_path = self.database_dir.joinpath(*PurePosixPath(relative_path).parts)
         return str(absolute_path)
     
     def cleanup_failed_files(self, session_name: str) -> Dict[str, int]:
@@ -157,20 +333,16 @@ class AudioFileManager:
             spec_session_dir = self.spectrograms_dir / session_name
             
             # 不完全な音声ファイルをクリーンアップ
-            if audio_session_dir.exists():
-                for file_path in audio_session_dir.glob("*.mp3"):
-                    if file_path.stat().st_size < 1024:  # 1KB未満のファイル
-                        file_path.unlink()
-                        stats["audio_cleaned"] += 1
-                        logger.debug(f"不完全音声ファイル削除: {file_path}")
+            for file_path in self._find_incomplete_files(audio_session_dir, ".mp3"):
+                os.unlink(file_path)
+                stats["audio_cleaned"] += 1
+                logger.debug(f"不完全音声ファイル削除: {file_path}")
             
             # 不完全なスペクトログラムファイルをクリーンアップ
-            if spec_session_dir.exists():
-                for file_path in spec_session_dir.glob("*.png"):
-                    if file_path.stat().st_size < 1024:  # 1KB未満のファイル
-                        file_path.unlink()
-                        stats["spectrogram_cleaned"] += 1
-                        logger.debug(f"不完全スペクトログラム削除: {file_path}")
+            for file_path in self._find_incomplete_files(spec_session_dir, ".png"):
+                os.unlink(file_path)
+                stats["spectrogram_cleaned"] += 1
+                logger.debug(f"不完全スペクトログラム削除: {file_path}")
             
             logger.info(f"クリーンアップ完了: {stats}")
             return stats
@@ -179,6 +351,30 @@ class AudioFileManager:
             logger.error(f"クリーンアップエラー: {e}")
             return stats
     
+    def _find_incomplete_files(self, directory: Path, suffix: str, min_size: int = 1024) -> List[str]:
+        """
+        サイズが閾値未満の不完全ファイルを列挙
+        
+        Args:
+            directory: 対象ディレクトリ
+            suffix: 対象とする拡張子
+            min_size: 完全なファイルとみなす最小サイズ（バイト、デフォルト1KB）
+            
+        Returns:
+            不完全ファイルのパスリスト（ディレクトリがない場合は空）
+        """
+        try:
+            entries = os.scandir(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        
+        # DirEntry.stat()はディレクトリ走査時の情報を再利用する
+        with entries:
+            return [
+                entry.path for entry in entries
+                if entry.name.endswith(suffix) and entry.is_file() and entry.stat().st_size < min_size
+            ]
+    
     def get_session_file_counts(self, session_name: str) -> Dict[str, int]:
         """
         セッションのファイル数統計を取得
@@ -193,14 +389,10 @@ class AudioFileManager:
         
         try:
             # 音声セグメント数
-            audio_session_dir = self.audio_segments_dir / session_name
-            if audio_session_dir.exists():
-                stats["audio_segments"] = len(list(audio_session_dir.glob("*.mp3")))
+            stats["audio_segments"] = _count_files(self.audio_segments_dir / session_name, ".mp3")
             
             # スペクトログラム数
-            spec_session_dir = self.spectrograms_dir / session_name
-            if spec_session_dir.exists():
-                stats["spectrograms"] = len(list(spec_session_dir.glob("*.png")))
+            stats["spectrograms"] = _count_files(self.spectrograms_dir / session_name, ".png")
             
             return stats
             
@@ -260,6 +452,105 @@ class AudioFileManager:
             errors.append(f"検証エラー: {str(e)}")
             return False, errors
     
+    def validate_many(self, detections: List[Dict]) -> Tuple[List[bool], List[List[str]]]:
+        """
+        複数の検出データをまとめて検証（validate_file_pathsのバッチ版）
+        
+        時刻解析・元音声ファイル照合をpandasの列演算で一括処理し、
+        変換に失敗した行のみ個別にエラーメッセージを生成する
+        
+        Args:
+            detections: 検出データ辞書のリスト
+            
+        Returns:
+            (検出データごとの検証成功フラグ, 検出データごとのエラーメッセージリスト)
+        """
+        import pandas as pd
+        
+        if not detections:
+            return [], []
+        
+        df = pd.DataFrame(detections)
+        errors = [[] for _ in range(len(df))]
+        
+        # 必須フィールド確認（不足がある行は以降の検証を行わない）
+        required_fields = ['filename', 'session_name', 'start_time_seconds', 'end_time_seconds']
+        missing = pd.Series(False, index=df.index)
+        for field in required_fields:
+            field_missing = df[field].isna() if field in df.columns else pd.Series(True, index=df.index)
+            for pos in field_missing.to_numpy().nonzero()[0]:
+                errors[pos].append(f"必須フィールドが不足: {field}")
+            missing |= field_missing
+        
+        valid = df[~missing]
+        if valid.empty:
+            return [False] * len(df), errors
+        positions = (~missing).to_numpy().nonzero()[0]
+        
+        # 元音声ファイル存在確認（インデックスで一括照合し、未発見分のみ全体検索）
+        source_index = self._get_source_index()
+        unresolved = valid['filename'].map(source_index).isna().to_numpy()
+        not_found = {
+            filename for filename in valid['filename'][unresolved].unique()
+            if self.find_source_audio_file(filename) is None
+        }
+        for pos, filename in zip(positions[unresolved], valid['filename'][unresolved]):
+            if filename in not_found:
+                errors[pos].append(f"元音声ファイルが見つかりません: {filename}")
+        
+        # 時刻範囲の妥当性確認（文字列形式も対応）
+        start_times = self._parse_time_series(valid['start_time_seconds'])
+        end_times = self._parse_time_series(valid['end_time_seconds'])
+        unparsed = (start_times.isna() | end_times.isna()).to_numpy()
+        negative = (start_times < 0).to_numpy()
+        reversed_range = (end_times <= start_times).to_numpy()
+        
+        for i, pos in enumerate(positions):
+            if unparsed[i]:
+                # 変換できない行は単体処理と同じメッセージを生成
+                try:
+                    self._parse_time_value(valid['start_time_seconds'].iat[i])
+                    self._parse_time_value(valid['end_time_seconds'].iat[i])
+                except ValueError as e:
+                    errors[pos].append(f"時刻変換エラー: {str(e)}")
+                continue
+            if negative[i]:
+                errors[pos].append("開始時刻が負の値です")
+            if reversed_range[i]:
+                errors[pos].append("終了時刻が開始時刻以前です")
+        
+        # セッション名の妥当性確認
+        empty_session = valid['session_name'].astype(str).str.strip().eq('').to_numpy()
+        for pos in positions[empty_session]:
+            errors[pos].append("セッション名が空です")
+        
+        return [not row_errors for row_errors in errors], errors
+    
+    def _parse_time_series(self, time_values):
+        """
+        時刻値の列を一括でfloatに変換（_parse_time_valueの列演算版）
+        
+        Args:
+            time_values: 時刻値のpandas Series
+            
+        Returns:
+            秒単位のfloat Series（変換できない値はNaN）
+        """
+        import pandas as pd
+        
+        # 数値・数値文字列はそのまま変換
+        seconds = pd.to_numeric(time_values, errors='coerce').astype(float)
+        
+        # 残りの文字列は "10m26s" / "10:26" 形式として解析
+        remaining = seconds.isna() & time_values.map(lambda v: isinstance(v, str))
+        if remaining.any():
+            parts = time_values[remaining].str.strip().str.extract(_TIME_PATTERN)
+            parts = parts.apply(pd.to_numeric)
+            parsed = (parts[0] * 60 + parts[1]).fillna(parts[2]).fillna(parts[3] * 60 + parts[4])
+            seconds[remaining] = parsed
+        
+        return seconds
+    
     def _parse_time_value(self, time_value) -> float:
         """
         時刻値を解析してfloat型に変換
@@ -273,42 +564,16 @@ class AudioFileManager:
         Raises:
             ValueError: 変換できない場合
         """
-        # 既にfloat/intの場合はそのまま返す
+        # 型ごとの変換関数を辞書で引く（int/float/strは分岐なし）
+        parser = _TIME_PARSERS.get(type(time_value))
+        if parser is not None:
+            return parser(time_value)
+        
+        # サブクラス（numpy.float64、boolなど）の場合
         if isinstance(time_value, (int, float)):
             return float(time_value)
-        
-        # 文字列の場合
         if isinstance(time_value, str):
-            time_str = str(time_value).strip()
-            
-            # パターン1: "10m26s" 形式
-            if 'm' in time_str and 's' in time_str:
-                try:
-                    # "10m26s" -> minutes=10, seconds=26
-                    parts = time_str.replace('s', '').split('m')
-                    if len(parts) == 2:
-                        minutes = int(parts[0])
-                        seconds = int(parts[1])
-                        return minutes * 60 + seconds
-                except (ValueError, IndexError):
-                    pass
-            
-            # パターン2: "626.0" のような数値文字列
-            try:
-                return float(time_str)
-            except ValueError:
-                pass
-            
-            # パターン3: "10:26" のような mm:ss 形式
-            if ':' in time_str:
-                try:
-                    parts = time_str.split(':')
-                    if len(parts) == 2:
-                        minutes = int(parts[0])
-                        seconds = int(parts[1])
-                        return minutes * 60 + seconds
-                except (ValueError, IndexError):
-                    pass
+            return _parse_time_string(time_value)
         
         # 変換できない場合
         raise ValueError(f"時刻値を変換できません: {time_value} (型: {type(time_value)})")
@@ -328,14 +593,10 @@ class AudioFileManager:
         
         try:
             # 音声セグメント使用量（WAV形式）
-            if self.audio_segments_dir.exists():
-                for file_path in self.audio_segments_dir.rglob("*.wav"):
-                    stats["audio_segments_mb"] += file_path.stat().st_size / (1024 * 1024)
+            stats["audio_segments_mb"] = _scan_total_size(self.audio_segments_dir, ".wav") / (1024 * 1024)
             
             # スペクトログラム使用量
-            if self.spectrograms_dir.exists():
-                for file_path in self.spectrograms_dir.rglob("*.png"):
-                    stats["spectrograms_mb"] += file_path.stat().st_size / (1024 * 1024)
+            stats["spectrograms_mb"] = _scan_total_size(self.spectrograms_dir, ".png") / (1024 * 1024)
             
             stats["total_mb"] = stats["audio_segments_mb"] + stats["spectrograms_mb"]
             
@@ -4,23 +4,248 @@
 """
 
 import sqlite3
-import sys
 import os
+import multiprocessing
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
+import threading
 from datetime import datetime
-
-# プロジェクトのlibディレクトリをパスに追加
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from concurrent.futures import ProcessPoolExecutor
 
 from .segment_generator import AudioSegmentGenerator
 from .spectrogram_generator import SpectrogramGenerator
 from .file_manager import AudioFileManager
 
+# threadpoolctl（librosaが依存するscikit-learnと共にインストールされる、読み込み済みのBLASのスレッド数制限に使用）
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
 # ロガー設定
 logger = logging.getLogger(__name__)
 
+# ワーカープロセス内のコンポーネント（_init_workerで初期化）
+_worker_components = None
+
+def _create_components(db_path: Path, enable_spectrogram: bool) -> Tuple:
+    """
+    ファイル生成に必要なコンポーネントを作成
+    
+    Args:
+        db_path: データベースファイルパス
+        enable_spectrogram: スペクトログラム生成を有効にするか
+        
+    Returns:
+        (音声セグメント生成, スペクトログラム生成またはNone, ファイル管理)
+    """
+    # プロジェクトルート（databaseフォルダの親ディレクトリ）
+    database_root = db_path.parent
+    project_root = database_root.parent
+    
+    segment_generator = AudioSegmentGenerator(str(database_root / "audio_segments"), write_workers=2)
+    spectrogram_generator = SpectrogramGenerator(str(database_root / "spectrograms"), write_workers=1) if enable_spectrogram else None
+    file_manager = AudioFileManager(str(project_root))
+    return segment_generator, spectrogram_generator, file_manager
+
+def _init_worker(db_path: str, enable_spectrogram: bool):
+    """
+    ワーカープロセスの初期化
+    
+    Args:
+        db_path: データベースファイルパス
+        enable_spectrogram: スペクトログラム生成を有効にするか
+    """
+    global _worker_components
+    
+    # プロセス並列時に数値計算ライブラリがスレッドを過剰に使わないようにする
+    # 環境変数はこれから読み込まれるライブラリ（librosa経由で遅延読み込みされるscipy・Numba）に反映される
+    for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMBA_NUM_THREADS'):
+        os.environ.setdefault(name, '1')
+    
+    # モジュールの読み込み時にnumpyが読み込んだBLASは環境変数を参照しないため、実行時に制限
+    if threadpool_limits is not None:
+        threadpool_limits(limits=1)
+    
+    _worker_components = _create_components(Path(db_path), enable_spectrogram)
+
+def _process_detection_chunk(detections: List[Dict]) -> List[Dict]:
+    """
+    ワーカープロセスで複数の検出データのファイル生成を実行
+    
+    Args:
+        detections: 検出データのリスト
+        
+    Returns:
+        生成結果辞書のリスト（_generate_detection_filesを参照）
+    """
+    return _generate_chunk_files(detections, *_worker_components)
+
+def _generate_chunk_files(
+    detections: List[Dict],
+    segment_generator: AudioSegmentGenerator,
+    spectrogram_generator: Optional[SpectrogramGenerator],
+    file_manager: AudioFileManager
+) -> List[Dict]:
+    """
+    複数の検出データのファイルを生成し、音声セグメント・スペクトログラムの書き込み完了を待機
+    
+    Args:
+        detections: 検出データのリスト
+        segment_generator: 音声セグメント生成
+        spectrogram_generator: スペクトログラム生成（Noneの場合は生成しない）
+        file_manager: ファイル管理
+        
+    Returns:
+        生成結果辞書のリスト
+    """
+    results = [
+        _generate_detection_files(detection, segment_generator, spectrogram_generator, file_manager)
+        for detection in detections
+    ]
+    
+    # 書き込みに失敗したセグメントは音声・スペクトログラムとも未生成扱い
+    failed_paths = set(segment_generator.wait_for_writes())
+    if failed_paths:
+        for result in results:
+            if result["audio_path"] in failed_paths:
+                logger.warning(f"音声セグメント生成失敗 (ID:{result['id']}): 書き込みエラー")
+                result["audio_path"] = None
+                result["audio_success"] = False
+                result["envelope"] = None
+                result["spectrogram_path"] = None
+                result["spectrogram_success"] = False
+    
+    if spectrogram_generator is not None:
+        failed_paths = set(spectrogram_generator.wait_for_writes())
+        for result in results:
+            if result["spectrogram_path"] in failed_paths:
+                logger.warning(f"スペクトログラム生成失敗 (ID:{result['id']}): 書き込みエラー")
+                result["spectrogram_path"] = None
+                result["spectrogram_success"] = False
+    
+    return results
+
+def _generate_detection_files(
+    detection: Dict,
+    segment_generator: AudioSegmentGenerator,
+    spectrogram_generator: Optional[SpectrogramGenerator],
+    file_manager: AudioFileManager
+) -> Dict:
+    """
+    検出データから音声セグメントとスペクトログラムを生成（データベースは更新しない）
+    
+    Args:
+        detection: 検出データ辞書
+        segment_generator: 音声セグメント生成
+        spectrogram_generator: スペクトログラム生成（Noneの場合は生成しない）
+        file_manager: ファイル管理
+        
+    Returns:
+        生成結果辞書
+        （id, audio_path, spectrogram_path, envelope, audio_success, spectrogram_success, error）
+        errorは検証エラー等で処理を中断した場合のメッセージ
+    """
+    detection_id = detection['id']
+    result = {
+        "id": detection_id,
+        "audio_path": None,
+        "spectrogram_path": None,
+        "envelope": None,
+        "audio_success": False,
+        "spectrogram_success": False,
+        "error": None
+    }
+    
+    try:
+        # データ検証
+        is_valid, errors = file_manager.validate_file_paths(detection)
+        if not is_valid:
+            result["error"] = f"検証エラー (ID:{detection_id}): {'; '.join(errors)}"
+            logger.warning(result["error"])
+            return result
+        
+        # 元音声ファイル検索（バッチ整列時に解決済みならそれを使用）
+        source_audio_path = detection.get('_src') or file_manager.find_source_audio_file(detection['filename'])
+        if not source_audio_path:
+            result["error"] = f"元音声ファイル未発見 (ID:{detection_id}): {detection['filename']}"
+            logger.warning(result["error"])
+            return result
+        
+        # 出力ディレクトリ確認・作成（初回のみ）
+        file_manager._ensure_directories()
+        
+        # セッションディレクトリ名生成
+        session_dir_name = file_manager.generate_session_directory_name(detection['session_name'])
+        
+        # 音声セグメント生成
+        audio_success, audio_rel_path, audio_error, audio = segment_generator.generate_segment_with_audio(
+            source_audio_path=source_audio_path,
+            start_time=_detection_time(detection, '_start', 'start_time_seconds', file_manager),
+            end_time=_detection_time(detection, '_end', 'end_time_seconds', file_manager),
+            session_name=session_dir_name,
+            detection_id=detection_id,
+            species_name=detection.get('common_name', 'Unknown'),
+            confidence=detection['confidence']
+        )
+        
+        if audio_success:
+            result["audio_path"] = audio_rel_path
+            result["audio_success"] = True
+            # ビューワーで音声をデコードせずに波形を表示するためのエンベロープ
+            result["envelope"] = segment_generator.compute_waveform_envelope(audio[0], audio[1])
+            logger.debug(f"音声セグメント生成成功 (ID:{detection_id})")
+        else:
+            logger.warning(f"音声セグメント生成失敗 (ID:{detection_id}): {audio_error}")
+        
+        # スペクトログラム生成（有効な場合のみ）
+        if spectrogram_generator is not None and audio_success:
+            # 音声セグメントの絶対パス取得
+            audio_abs_path = file_manager.resolve_relative_path(audio_rel_path)
+            
+            spec_success, spec_rel_path, spec_error = spectrogram_generator.generate_spectrogram(
+                audio_segment_path=audio_abs_path,
+                session_name=session_dir_name,
+                detection_id=detection_id,
+                species_name=detection.get('common_name', 'Unknown'),
+                confidence=detection['confidence'],
+                samples=audio[0],
+                sr=audio[1]
+            )
+            
+            if spec_success:
+                result["spectrogram_path"] = spec_rel_path
+                result["spectrogram_success"] = True
+                logger.debug(f"スペクトログラム生成成功 (ID:{detection_id})")
+            else:
+                logger.warning(f"スペクトログラム生成失敗 (ID:{detection_id}): {spec_error}")
+        
+        return result
+        
+    except Exception as e:
+        result["error"] = f"処理実行エラー (ID:{detection_id}): {str(e)}"
+        logger.error(result["error"])
+        return result
+
+def _detection_time(detection: Dict, parsed_key: str, field: str, file_manager: AudioFileManager) -> float:
+    """
+    検出データの時刻値を取得（取得時に変換済みならその値を使用）
+    
+    Args:
+        detection: 検出データ辞書
+        parsed_key: 変換済みの値のキー（'_start'/'_end'）
+        field: 元の時刻フィールド名
+        file_manager: ファイル管理
+        
+    Returns:
+        時刻（秒）
+    """
+    value = detection.get(parsed_key)
+    if value is not None:
+        return value
+    return file_manager._parse_time_value(detection[field])
+
 class ProcessingManager:
     """音声セグメント処理統合管理クラス"""
     
@@ -40,14 +265,12 @@ class ProcessingManager:
         self.db_path = Path(db_path)
         self.enable_spectrogram = enable_spectrogram
         
-        # プロジェクトルート（databaseフォルダの親ディレクトリ）
-        database_root = self.db_path.parent
-        project_root = database_root.parent
-        
         # 各コンポーネント初期化（正しいプロジェクトルートを渡す）
-        self.segment_generator = AudioSegmentGenerator(str(database_root / "audio_segments"))
-        self.spectrogram_generator = SpectrogramGenerator(str(database_root / "spectrograms")) if enable_spectrogram else None
-        self.file_manager = AudioFileManager(str(project_root))
+        (
+            self.segment_generator,
+            self.spectrogram_generator,
+            self.file_manager
+        ) = _create_components(self.db_path, enable_spectrogram)
         
         # 処理統計
         self.stats = {
@@ -58,23 +281,172 @@ class ProcessingManager:
             "error_count": 0,
             "errors": []
         }
+        
+        # データベース接続（初回使用時に作成し、インスタンス内で共有）
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        
+        # 未処理レコード検索用インデックス・集計テーブル
+        self._stats_table_ready = False
+        self._envelope_column_ready = False
+        self._ensure_pending_index()
+        self._ensure_stats_table()
+        self._ensure_envelope_column()
+    
+    def _ensure_pending_index(self):
+        """
+        未処理レコード用の部分インデックスを作成
+        
+        処理済みになった行はインデックスから外れるため、インデックスは未処理件数分に保たれる
+        """
+        if not self.db_path.exists():
+            return
+        
+        try:
+            with self._conn_lock:
+                self._get_connection().execute("""
+                    CREATE INDEX IF NOT EXISTS idx_pending 
+                    ON bird_detections(created_at) 
+                    WHERE audio_segment_path IS NULL
+                """)
+        except sqlite3.Error as e:
+            logger.warning(f"未処理レコード用インデックス作成エラー: {e}")
     
-    def process_all_pending_detections(self, batch_size: int = 100) -> Dict:
+    def _ensure_envelope_column(self):
+        """
+        波形エンベロープ（waveform_envelope）カラムがない場合に追加
+        
+        追加できない場合はエンベロープを保存せず、ファイルパスのみ更新する
+        """
+        if not self.db_path.exists():
+            return
+        
+        try:
+            with self._conn_lock:
+                conn = self._get_connection()
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(bird_detections)")}
+                if not columns:
+                    return
+                if 'waveform_envelope' not in columns:
+                    conn.execute("ALTER TABLE bird_detections ADD COLUMN waveform_envelope BLOB")
+                self._envelope_column_ready = True
+        except sqlite3.Error as e:
+            logger.warning(f"波形エンベロープカラム追加エラー: {e}")
+    
+    def _ensure_stats_table(self):
+        """
+        処理件数の集計テーブル（processing_stats）とトリガーを作成
+        
+        bird_detectionsの追加・削除・パス更新時にトリガーで件数を更新するため、
+        統計取得時に全件をCOUNTする必要がない
+        """
+        if not self.db_path.exists():
+            return
+        
+        try:
+            with self._conn_lock:
+                conn = self._get_connection()
+                
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(bird_detections)")}
+                if not {'audio_segment_path', 'spectrogram_path'} <= columns:
+                    return
+                
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    exists = conn.execute("""
+                        SELECT 1 FROM sqlite_master 
+                        WHERE type = 'table' AND name = 'processing_stats'
+                    """).fetchone()
+                    
+                    # executescriptは暗黙にCOMMITするため1文ずつ実行
+                    for statement in (
+                        """
+                            CREATE TABLE IF NOT EXISTS processing_stats (
+                                key TEXT PRIMARY KEY,
+                                value INTEGER NOT NULL
+                            )
+                        """,
+                        """
+                            CREATE TRIGGER IF NOT EXISTS trg_processing_stats_insert 
+                            AFTER INSERT ON bird_detections
+                            BEGIN
+                                UPDATE processing_stats SET value = value + CASE key
+                                    WHEN 'total' THEN 1
+                                    WHEN 'processed_audio' THEN (NEW.audio_segment_path IS NOT NULL)
+                                    WHEN 'processed_spectrogram' THEN (NEW.spectrogram_path IS NOT NULL)
+                                END;
+                            END;
+                        """,
+                        """
+                            CREATE TRIGGER IF NOT EXISTS trg_processing_stats_delete 
+                            AFTER DELETE ON bird_detections
+                            BEGIN
+                                UPDATE processing_stats SET value = value - CASE key
+                                    WHEN 'total' THEN 1
+                                    WHEN 'processed_audio' THEN (OLD.audio_segment_path IS NOT NULL)
+                                    WHEN 'processed_spectrogram' THEN (OLD.spectrogram_path IS NOT NULL)
+                                END;
+                            END;
+                        """,
+                        """
+                            CREATE TRIGGER IF NOT EXISTS trg_processing_stats_update 
+                            AFTER UPDATE OF audio_segment_path, spectrogram_path ON bird_detections
+                            BEGIN
+                                UPDATE processing_stats SET value = value + CASE key
+                                    WHEN 'total' THEN 0
+                                    WHEN 'processed_audio' THEN 
+                                        (NEW.audio_segment_path IS NOT NULL) - (OLD.audio_segment_path IS NOT NULL)
+                                    WHEN 'processed_spectrogram' THEN 
+                                        (NEW.spectrogram_path IS NOT NULL) - (OLD.spectrogram_path IS NOT NULL)
+                                END;
+                            END;
+                        """,
+                    ):
+                        conn.execute(statement)
+                    
+                    # 新規作成時は既存データから件数を初期化
+                    if not exists:
+                        conn.execute("""
+                            INSERT INTO processing_stats (key, value)
+                            SELECT 'total', COUNT(*) FROM bird_detections
+                            UNION ALL
+                            SELECT 'processed_audio', COUNT(audio_segment_path) FROM bird_detections
+                            UNION ALL
+                            SELECT 'processed_spectrogram', COUNT(spectrogram_path) FROM bird_detections
+                        """)
+                    
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+                
+                self._stats_table_ready = True
+                
+        except sqlite3.Error as e:
+            logger.warning(f"集計テーブル作成エラー: {e}")
+    
+    def process_all_pending_detections(self, batch_size: int = 100, max_workers: Optional[int] = None) -> Dict:
         """
         未処理の全検出結果を一括処理
         
+        ファイル生成はワーカープロセスで並列実行し、データベース更新は親プロセスで行う
+        
         Args:
             batch_size: バッチサイズ
+            max_workers: ワーカープロセス数（デフォルト: CPUコア数、1の場合は逐次処理）
             
         Returns:
             処理結果統計
         """
         logger.info("未処理検出結果の一括処理を開始")
         
+        executor = None
+        pending_batches = None
+        
         try:
-            # 未処理レコード取得
-            pending_detections = self._get_pending_detections()
-            total_count = len(pending_detections)
+            # 未処理レコード数取得（進捗表示用）
+            total_count = self._count_pending_detections()
             
             if total_count == 0:
                 logger.info("処理対象の未処理レコードはありません")
@@ -82,20 +454,60 @@ class ProcessingManager:
             
             logger.info(f"処理対象レコード数: {total_count}")
             
-            # バッチ処理
-            for i in range(0, total_count, batch_size):
-                batch = pending_detections[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (total_count + batch_size - 1) // batch_size
+            # ワーカープロセス起動（1件のみ・1ワーカーの場合は逐次処理）
+            workers = min(max_workers or os.cpu_count() or 1, total_count)
+            if workers > 1:
+                # 親プロセスは共有DB接続・書き込みスレッドを持ち、forkではロックの状態ごと複製されるため
+                # spawnで起動する（スペクトログラム生成のmatplotlibの状態も引き継がない）
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(str(self.db_path), self.enable_spectrogram)
+                )
+                logger.info(f"ワーカープロセス数: {workers}")
+            
+            # バッチ処理（未処理レコードはバッチ単位で逐次取得）
+            total_batches = (total_count + batch_size - 1) // batch_size
+            processed_so_far = 0
+            pending_batches = self._iter_pending_detections(batch_size)
+            
+            for batch_num, batch in enumerate(pending_batches, start=1):
                 
                 logger.info(f"バッチ {batch_num}/{total_batches} 処理中 ({len(batch)}件)")
                 
-                for detection in batch:
-                    self._process_single_detection(detection)
+                # 同一元ファイルの区間を連続して読むように整列
+                self._sort_batch_by_source(batch)
+                
+                if executor is not None:
+                    # 整列順を保ったまま連続した区間をワーカー数に分割
+                    chunk_size = -(-len(batch) // workers)
+                    chunks = [batch[j:j + chunk_size] for j in range(0, len(batch), chunk_size)]
+                    results = [
+                        result
+                        for chunk_results in executor.map(_process_detection_chunk, chunks)
+                        for result in chunk_results
+                    ]
+                else:
+                    results = self._generate_chunk_files(batch)
+                
+                # データベース一括更新（親プロセス）
+                rows = [
+                    (result["audio_path"], result["spectrogram_path"], result["envelope"], result["id"])
+                    for result in results if result["error"] is None
+                ]
+                update_success = True
+                if rows:
+                    with self._conn_lock:
+                        update_success = self._update_detection_paths_many(self._get_connection(), rows)
+                
+                # 統計集計
+                for result in results:
+                    self._apply_result(result, update_success)
                 
                 # 進捗表示
-                processed_so_far = min(i + batch_size, total_count)
-                progress = (processed_so_far / total_count) * 100
+                processed_so_far += len(batch)
+                progress = min(processed_so_far / total_count, 1.0) * 100
                 logger.info(f"進捗: {processed_so_far}/{total_count} ({progress:.1f}%)")
             
             # 最終統計
@@ -111,6 +523,34 @@ class ProcessingManager:
             logger.error(error_msg)
             self.stats["errors"].append(error_msg)
             return self.stats
+        
+        finally:
+            if pending_batches is not None:
+                pending_batches.close()
+            if executor is not None:
+                executor.shutdown()
+            self.segment_generator.close_sources()
+    
+    def _sort_batch_by_source(self, batch: List[Dict]):
+        """
+        バッチを元音声ファイル・開始時刻順に並べ替え（元ファイルパスは'_src'に保持）
+        
+        Args:
+            batch: 検出データのリスト（その場で並べ替え）
+        """
+        source_paths = {}
+        
+        for detection in batch:
+            filename = detection.get('filename')
+            if filename not in source_paths:
+                source_paths[filename] = self.file_manager.find_source_audio_file(filename) if filename else None
+            detection['_src'] = source_paths[filename]
+        
+        def sort_key(detection: Dict) -> Tuple[str, float]:
+            start_time = detection.get('_start')
+            return detection['_src'] or "", start_time if start_time is not None else 0.0
+        
+        batch.sort(key=sort_key)
     
     def process_single_detection(self, detection_id: int) -> Tuple[bool, str]:
         """
@@ -135,6 +575,9 @@ class ProcessingManager:
             error_msg = f"単一処理エラー (ID:{detection_id}): {str(e)}"
             logger.error(error_msg)
             return False, error_msg
+        
+        finally:
+            self.segment_generator.close_sources()
     
     def _process_single_detection(self, detection: Dict) -> Tuple[bool, str]:
         """
@@ -146,124 +589,169 @@ class ProcessingManager:
         Returns:
             (成功フラグ, メッセージ)
         """
-        detection_id = detection['id']
-        self.stats["processed_count"] += 1
+        result = self._generate_chunk_files([detection])[0]
         
-        try:
-            # データ検証
-            is_valid, errors = self.file_manager.validate_file_paths(detection)
-            if not is_valid:
-                error_msg = f"検証エラー (ID:{detection_id}): {'; '.join(errors)}"
-                logger.warning(error_msg)
-                self.stats["error_count"] += 1
-                self.stats["errors"].append(error_msg)
-                return False, error_msg
-            
-            # 元音声ファイル検索
-            source_audio_path = self.file_manager.find_source_audio_file(detection['filename'])
-            if not source_audio_path:
-                error_msg = f"元音声ファイル未発見 (ID:{detection_id}): {detection['filename']}"
-                logger.warning(error_msg)
-                self.stats["error_count"] += 1
-                self.stats["errors"].append(error_msg)
-                return False, error_msg
-            
-            # セッションディレクトリ名生成
-            session_dir_name = self.file_manager.generate_session_directory_name(detection['session_name'])
-            
-            audio_path = None
-            spectrogram_path = None
-            
-            # 音声セグメント生成
-            audio_success, audio_rel_path, audio_error = self.segment_generator.generate_segment(
-                source_audio_path=source_audio_path,
-                start_time=self.file_manager._parse_time_value(detection['start_time_seconds']),
-                end_time=self.file_manager._parse_time_value(detection['end_time_seconds']),
-                session_name=session_dir_name,
-                detection_id=detection_id,
-                species_name=detection.get('common_name', 'Unknown'),
-                confidence=detection['confidence']
-            )
-            
-            if audio_success:
-                audio_path = audio_rel_path
-                self.stats["audio_success"] += 1
-                logger.debug(f"音声セグメント生成成功 (ID:{detection_id})")
-            else:
-                logger.warning(f"音声セグメント生成失敗 (ID:{detection_id}): {audio_error}")
-            
-            # スペクトログラム生成（有効な場合のみ）
-            if self.enable_spectrogram and audio_success:
-                # 音声セグメントの絶対パス取得（MP3統一）
-                audio_abs_path = self.file_manager.resolve_relative_path(audio_rel_path)
-                
-                spec_success, spec_rel_path, spec_error = self.spectrogram_generator.generate_spectrogram(
-                    audio_segment_path=audio_abs_path,
-                    session_name=session_dir_name,
-                    detection_id=detection_id,
-                    species_name=detection.get('common_name', 'Unknown'),
-                    confidence=detection['confidence']
-                )
-                
-                if spec_success:
-                    spectrogram_path = spec_rel_path
-                    self.stats["spectrogram_success"] += 1
-                    logger.debug(f"スペクトログラム生成成功 (ID:{detection_id})")
-                else:
-                    logger.warning(f"スペクトログラム生成失敗 (ID:{detection_id}): {spec_error}")
-            
-            # データベース更新
+        update_success = False
+        if result["error"] is None:
             update_success = self._update_detection_paths(
-                detection_id, audio_path, spectrogram_path
+                result["id"], result["audio_path"], result["spectrogram_path"], result["envelope"]
             )
+        
+        return self._apply_result(result, update_success)
+    
+    def _generate_chunk_files(self, detections: List[Dict]) -> List[Dict]:
+        """
+        このインスタンスのコンポーネントでファイル生成を実行
+        
+        Args:
+            detections: 検出データのリスト
             
-            if update_success:
-                if audio_success:
-                    self.stats["success_count"] += 1
-                    message = f"処理完了 (ID:{detection_id}) - 音声: {audio_success}, スペクトログラム: {spectrogram_path is not None}"
-                    logger.debug(message)
-                    return True, message
-                else:
-                    error_msg = f"音声セグメント生成失敗 (ID:{detection_id})"
-                    self.stats["error_count"] += 1
-                    self.stats["errors"].append(error_msg)
-                    return False, error_msg
+        Returns:
+            生成結果辞書のリスト
+        """
+        return _generate_chunk_files(
+            detections, self.segment_generator, self.spectrogram_generator, self.file_manager
+        )
+    
+    def _apply_result(self, result: Dict, update_success: bool) -> Tuple[bool, str]:
+        """
+        生成結果を処理統計に反映
+        
+        Args:
+            result: _generate_detection_filesの生成結果辞書
+            update_success: データベース更新に成功したか
+            
+        Returns:
+            (成功フラグ, メッセージ)
+        """
+        detection_id = result["id"]
+        self.stats["processed_count"] += 1
+        
+        if result["audio_success"]:
+            self.stats["audio_success"] += 1
+        if result["spectrogram_success"]:
+            self.stats["spectrogram_success"] += 1
+        
+        # 検証エラー等で中断した場合
+        if result["error"] is not None:
+            self.stats["error_count"] += 1
+            self.stats["errors"].append(result["error"])
+            return False, result["error"]
+        
+        if update_success:
+            if result["audio_success"]:
+                self.stats["success_count"] += 1
+                message = f"処理完了 (ID:{detection_id}) - 音声: {result['audio_success']}, スペクトログラム: {result['spectrogram_path'] is not None}"
+                logger.debug(message)
+                return True, message
             else:
-                error_msg = f"データベース更新失敗 (ID:{detection_id})"
+                error_msg = f"音声セグメント生成失敗 (ID:{detection_id})"
                 self.stats["error_count"] += 1
                 self.stats["errors"].append(error_msg)
                 return False, error_msg
-                
-        except Exception as e:
-            error_msg = f"処理実行エラー (ID:{detection_id}): {str(e)}"
-            logger.error(error_msg)
+        else:
+            error_msg = f"データベース更新失敗 (ID:{detection_id})"
             self.stats["error_count"] += 1
             self.stats["errors"].append(error_msg)
             return False, error_msg
     
-    def _get_pending_detections(self) -> List[Dict]:
+    def _count_pending_detections(self) -> int:
         """
-        未処理検出結果を取得
+        未処理検出結果の件数を取得
         
         Returns:
-            未処理検出データのリスト
+            未処理レコード数
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            with self._conn_lock:
+                cursor = self._get_connection().cursor()
                 
                 cursor.execute("""
-                    SELECT * FROM bird_detections 
+                    SELECT COUNT(*) FROM bird_detections 
                     WHERE audio_segment_path IS NULL
-                    ORDER BY created_at ASC
                 """)
                 
-                return [dict(row) for row in cursor.fetchall()]
+                return cursor.fetchone()[0]
                 
         except Exception as e:
+            logger.error(f"未処理レコード数取得エラー: {e}")
+            return 0
+    
+    def _iter_pending_detections(self, batch_size: int) -> Iterator[List[Dict]]:
+        """
+        未処理検出結果をバッチ単位で逐次取得
+        
+        更新と同じ接続で読み進めると走査中のインデックスが変わるため専用の読み取り接続を使う
+        WALモードでは読み取り接続が開始時点のスナップショットを保持するため、
+        取得中に別接続で更新しても読み取り結果は変わらない
+        
+        Args:
+            batch_size: バッチサイズ
+            
+        Yields:
+            未処理検出データのリスト（最大batch_size件）
+        """
+        try:
+            conn = self._connect()
+        except Exception as e:
+            logger.error(f"未処理レコード取得エラー: {e}")
+            return
+        
+        try:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            # WAL以外では読み取り中の共有ロックが更新のCOMMITを妨げるため一括取得
+            journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            
+            cursor.execute("""
+                SELECT * FROM bird_detections 
+                WHERE audio_segment_path IS NULL
+                ORDER BY created_at ASC
+            """)
+            
+            if journal_mode.lower() != "wal":
+                rows = cursor.fetchall()
+                conn.close()
+                for i in range(0, len(rows), batch_size):
+                    yield self._to_detections(rows[i:i + batch_size])
+                return
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield self._to_detections(rows)
+                
+        except sqlite3.Error as e:
             logger.error(f"未処理レコード取得エラー: {e}")
-            return []
+        
+        finally:
+            conn.close()
+    
+    def _to_detections(self, rows: List[sqlite3.Row]) -> List[Dict]:
+        """
+        取得行を検出データ辞書に変換し、開始・終了時刻を変換済みの値で保持
+        
+        Args:
+            rows: bird_detectionsの取得行
+            
+        Returns:
+            検出データのリスト（'_start'/'_end'は変換できない場合None）
+        """
+        parse_time = self.file_manager._parse_time_value
+        detections = []
+        
+        for row in rows:
+            detection = dict(row)
+            for parsed_key, field in (('_start', 'start_time_seconds'), ('_end', 'end_time_seconds')):
+                try:
+                    detection[parsed_key] = parse_time(detection[field])
+                except (KeyError, ValueError):
+                    detection[parsed_key] = None
+            detections.append(detection)
+        
+        return detections
     
     def _get_detection_by_id(self, detection_id: int) -> Optional[Dict]:
         """
@@ -276,9 +764,8 @@ class ProcessingManager:
             検出データ辞書またはNone
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            with self._conn_lock:
+                cursor = self._get_connection().cursor()
                 
                 cursor.execute("""
                     SELECT * FROM bird_detections 
@@ -292,7 +779,52 @@ class ProcessingManager:
             logger.error(f"検出データ取得エラー (ID:{detection_id}): {e}")
             return None
     
-    def _update_detection_paths(self, detection_id: int, audio_path: Optional[str], spectrogram_path: Optional[str]) -> bool:
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        """
+        データベース接続を作成（トランザクションは明示的に管理）
+        
+        Args:
+            **kwargs: sqlite3.connectに渡す追加引数
+            
+        Returns:
+            SQLite接続
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        共有データベース接続を取得（呼び出し側で_conn_lockを保持すること）
+        
+        Returns:
+            SQLite接続
+        """
+        if self._conn is None:
+            self._conn = self._connect(check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+    
+    def close(self):
+        """
+        共有データベース接続を閉じる
+        """
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def _update_detection_paths(
+        self,
+        detection_id: int,
+        audio_path: Optional[str],
+        spectrogram_path: Optional[str],
+        envelope: Optional[bytes] = None
+    ) -> bool:
         """
         検出レコードのファイルパス情報を更新
         
@@ -300,31 +832,61 @@ class ProcessingManager:
             detection_id: 検出ID
             audio_path: 音声セグメントパス
             spectrogram_path: スペクトログラムパス
+            envelope: 波形エンベロープ（AudioSegmentGenerator.compute_waveform_envelopeを参照）
             
         Returns:
             更新成功フラグ
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
+            with self._conn_lock:
+                return self._update_detection_paths_many(
+                    self._get_connection(), [(audio_path, spectrogram_path, envelope, detection_id)]
+                )
+        except Exception as e:
+            logger.error(f"パス情報更新エラー (ID:{detection_id}): {e}")
+            return False
+    
+    def _update_detection_paths_many(self, conn: sqlite3.Connection, rows: List[Tuple]) -> bool:
+        """
+        複数の検出レコードのファイルパス情報を1トランザクションで更新
+        
+        Args:
+            conn: SQLite接続（isolation_level=None）
+            rows: (音声セグメントパス, スペクトログラムパス, 波形エンベロープ, 検出ID)のリスト
+            
+        Returns:
+            更新成功フラグ
+        """
+        try:
+            if self._envelope_column_ready:
+                sql = """
+                    UPDATE bird_detections 
+                    SET audio_segment_path = ?, spectrogram_path = ?, waveform_envelope = ?
+                    WHERE id = ?
+                """
+            else:
+                sql = """
                     UPDATE bird_detections 
                     SET audio_segment_path = ?, spectrogram_path = ?
                     WHERE id = ?
-                """, (audio_path, spectrogram_path, detection_id))
-                
-                conn.commit()
+                """
+                rows = [(audio_path, spectrogram_path, detection_id) for audio_path, spectrogram_path, _, detection_id in rows]
+            
+            conn.execute("BEGIN")
+            cursor = conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+            
+            if cursor.rowcount > 0:
+                logger.debug(f"パス情報更新完了 ({cursor.rowcount}件)")
+                return True
+            else:
+                logger.warning(f"更新対象レコードなし ({len(rows)}件)")
+                return False
                 
-                if cursor.rowcount > 0:
-                    logger.debug(f"パス情報更新完了 (ID:{detection_id})")
-                    return True
-                else:
-                    logger.warning(f"更新対象レコードなし (ID:{detection_id})")
-                    return False
-                    
         except Exception as e:
-            logger.error(f"パス情報更新エラー (ID:{detection_id}): {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error(f"パス情報更新エラー ({len(rows)}件): {e}")
             return False
     
     def get_processing_statistics(self) -> Dict:
@@ -335,44 +897,55 @@ class ProcessingManager:
             統計情報辞書
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 基本統計
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_detections,
-                        COUNT(audio_segment_path) as processed_audio,
-                        COUNT(spectrogram_path) as processed_spectrogram,
-                        COUNT(*) - COUNT(audio_segment_path) as pending_audio
-                    FROM bird_detections
-                """)
+            with self._conn_lock:
+                cursor = self._get_connection().cursor()
                 
-                row = cursor.fetchone()
-                stats = {
-                    "total_detections": row[0],
-                    "processed_audio": row[1], 
-                    "processed_spectrogram": row[2],
-                    "pending_audio": row[3]
-                }
-                
-                # 進捗率計算
-                if stats['total_detections'] > 0:
-                    stats['audio_progress_percent'] = (stats['processed_audio'] / stats['total_detections']) * 100
-                    stats['spectrogram_progress_percent'] = (stats['processed_spectrogram'] / stats['total_detections']) * 100
+                # 基本統計（集計テーブルがあれば1行ずつ参照するだけで済む）
+                if self._stats_table_ready:
+                    cursor.execute("SELECT key, value FROM processing_stats")
+                    counts = {key: value for key, value in cursor.fetchall()}
+                    row = (
+                        counts['total'],
+                        counts['processed_audio'],
+                        counts['processed_spectrogram'],
+                        counts['total'] - counts['processed_audio']
+                    )
                 else:
-                    stats['audio_progress_percent'] = 0
-                    stats['spectrogram_progress_percent'] = 0
-                
-                # ストレージ使用量
-                storage_stats = self.file_manager.get_storage_usage()
-                stats.update(storage_stats)
-                
-                # 現在の処理セッション統計
-                stats.update(self.stats)
-                
-                return stats
-                
+                    cursor.execute("""
+                        SELECT 
+                            COUNT(*) as total_detections,
+                            COUNT(audio_segment_path) as processed_audio,
+                            COUNT(spectrogram_path) as processed_spectrogram,
+                            COUNT(*) - COUNT(audio_segment_path) as pending_audio
+                        FROM bird_detections
+                    """)
+                    
+                    row = cursor.fetchone()
+            
+            stats = {
+                "total_detections": row[0],
+                "processed_audio": row[1], 
+                "processed_spectrogram": row[2],
+                "pending_audio": row[3]
+            }
+            
+            # 進捗率計算
+            if stats['total_detections'] > 0:
+                stats['audio_progress_percent'] = (stats['processed_audio'] / stats['total_detections']) * 100
+                stats['spectrogram_progress_percent'] = (stats['processed_spectrogram'] / stats['total_detections']) * 100
+            else:
+                stats['audio_progress_percent'] = 0
+                stats['spectrogram_progress_percent'] = 0
+            
+            # ストレージ使用量
+            storage_stats = self.file_manager.get_storage_usage()
+            stats.update(storage_stats)
+            
+            # 現在の処理セッション統計
+            stats.update(self.stats)
+            
+            return stats
+            
         except Exception as e:
             logger.error(f"統計情報取得エラー: {e}")
             return self.stats
@@ -4,25 +4,37 @@ MP3ファイルから検出結果に基づく音声セグメントを生成
 """
 
 import os
+import re
+import struct
 import librosa
 import soundfile as sf
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # ロガー設定
 logger = logging.getLogger(__name__)
 
+# ファイル名に使用しない文字（英数字・_・-・ー以外、\wはstr.isalnum()と_に一致）
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w\-ー]")
+
+# 波形エンベロープの区間数（区間ごとの最小・最大で表示2000ポイント）
+WAVEFORM_ENVELOPE_BUCKETS = 1000
+
 class AudioSegmentGenerator:
     """MP3音声セグメント生成クラス"""
     
-    def __init__(self, base_output_dir: str = None):
+    def __init__(self, base_output_dir: str = None, write_workers: int = 0):
         """
         初期化
         
         Args:
             base_output_dir: 出力ベースディレクトリ（デフォルト: database/audio_segments）
+            write_workers: WAV書き込みスレッド数（0の場合は同期書き込み）
+                1以上の場合は書き込みを次のデコードと並行して行い、wait_for_writesで完了を待つ
         """
         if base_output_dir is None:
             # プロジェクトルートからの相対パス
@@ -36,6 +48,17 @@ class AudioSegmentGenerator:
         self.context_seconds = 5.0  # 前後5秒のコンテキスト
         self.sample_rate = None  # 元ファイルのサンプリングレートを使用
         
+        # 開いた元音声ファイルのキャッシュ（同一録音の連続セグメントで再オープンしない）
+        self.max_open_sources = 8
+        self._source_cache: "OrderedDict[str, sf.SoundFile]" = OrderedDict()
+        
+        # 作成済みセッションディレクトリ（セッション名 -> (ディレクトリ, 相対パスの接頭辞)）
+        self._session_dirs: Dict[str, Tuple[Path, str]] = {}
+        
+        # 非同期書き込み（書き込みはネイティブ呼び出しでGILを解放するためスレッドで重ねられる）
+        self._writer = ThreadPoolExecutor(max_workers=write_workers) if write_workers > 0 else None
+        self._pending_writes: List[Tuple[Future, Path]] = []
+        
     def generate_segment(
         self, 
         source_audio_path: str,
@@ -61,23 +84,55 @@ class AudioSegmentGenerator:
         Returns:
             (成功フラグ, 出力ファイルパス, エラーメッセージ)
         """
+        success, relative_path, error_msg, _ = self.generate_segment_with_audio(
+            source_audio_path, start_time, end_time,
+            session_name, detection_id, species_name, confidence
+        )
+        return success, relative_path, error_msg
+    
+    def generate_segment_with_audio(
+        self, 
+        source_audio_path: str,
+        start_time: float,
+        end_time: float,
+        session_name: str,
+        detection_id: int,
+        species_name: str,
+        confidence: float
+    ) -> Tuple[bool, str, Optional[str], Optional[Tuple[np.ndarray, int]]]:
+        """
+        音声セグメントを生成し、デコード済みの音声データも返す
+        
+        スペクトログラム生成で書き出したWAVを再読み込みせずに済むようにする
+        
+        Args:
+            source_audio_path: 元音声ファイルパス
+            start_time: 検出開始時刻（秒）
+            end_time: 検出終了時刻（秒） 
+            session_name: セッション名
+            detection_id: 検出ID
+            species_name: 種名
+            confidence: 信頼度
+            
+        Returns:
+            (成功フラグ, 出力ファイルパス, エラーメッセージ, (音声データ, サンプリングレート)またはNone)
+        """
         try:
             source_path = Path(source_audio_path)
             
             # 元ファイル存在確認
             if not source_path.exists():
-                return False, "", f"元音声ファイルが見つかりません: {source_path}"
+                return False, "", f"元音声ファイルが見つかりません: {source_path}", None
             
-            # 出力ディレクトリ作成
-            session_dir = self.base_output_dir / session_name
-            session_dir.mkdir(parents=True, exist_ok=True)
+            # 出力ディレクトリ作成（セッション毎に初回のみ）
+            session_dir, relative_prefix = self._get_session_dir(session_name)
             
             # 出力ファイル名生成
             output_filename = self._generate_filename(detection_id, species_name, confidence)
             output_path = session_dir / output_filename
             
-            # librosaで音声処理（高品質・安定）
-            success, actual_output_path = self._extract_segment_librosa(
+            # 指定区間のみ読み込んでWAVで保存（librosaは読み込みのフォールバック）
+            success, actual_output_path, audio = self._extract_segment(
                 source_path, output_path, start_time, end_time
             )
             
@@ -85,26 +140,49 @@ class AudioSegmentGenerator:
                 # 相対パス返却（database/からの相対パス）
                 # 実際に生成されたファイルパスを使用
                 actual_filename = actual_output_path.name
-                relative_path = f"audio_segments/{session_name}/{actual_filename}"
+                relative_path = f"{relative_prefix}/{actual_filename}"
                 logger.info(f"音声セグメント生成完了: {relative_path}")
-                return True, relative_path, None
+                return True, relative_path, None, audio
             else:
-                return False, "", "音声セグメント生成に失敗"
+                return False, "", "音声セグメント生成に失敗", None
                 
         except Exception as e:
             error_msg = f"音声セグメント生成エラー: {str(e)}"
             logger.error(error_msg)
-            return False, "", error_msg
+            return False, "", error_msg, None
+    
+    def _get_session_dir(self, session_name: str) -> Tuple[Path, str]:
+        """
+        セッションの出力ディレクトリを取得（初回のみ作成）
+        
+        Args:
+            session_name: セッション名
+            
+        Returns:
+            (出力ディレクトリ, database/からの相対パスの接頭辞)
+        """
+        cached = self._session_dirs.get(session_name)
+        if cached is not None:
+            return cached
+        
+        session_dir = self.base_output_dir / session_name
+        session_dir.mkdir(parents=True, exist_ok=True)
+        
+        cached = (session_dir, f"audio_segments/{session_name}")
+        self._session_dirs[session_name] = cached
+        return cached
     
-    def _extract_segment_pydub(
+    def _extract_segment(
         self, 
         source_path: Path, 
         output_path: Path, 
         start_time: float, 
         end_time: float
-    ) -> bool:
+    ) -> Tuple[bool, Path, Optional[Tuple[np.ndarray, int]]]:
         """
-        pydubを使用した効率的なMP3セグメント抽出
+        指定区間のみを読み込むシンプルなセグメント抽出（WAV形式）
+        
+        セグメント抽出はこのメソッドに統一している（_read_segmentで必要な区間のみデコード）
         
         Args:
             source_path: 元ファイルパス
@@ -113,100 +191,240 @@ class AudioSegmentGenerator:
             end_time: 終了時刻（秒）
             
         Returns:
-            成功フラグ
+            (成功フラグ, 実際の出力パス, (音声データ, サンプリングレート)またはNone)
         """
         try:
             # 前後のコンテキストを含む時刻計算
             segment_start = max(0, start_time - self.context_seconds)
-            segment_end = end_time + self.context_seconds
+            segment_duration = (end_time + self.context_seconds) - segment_start
             
-            # ミリ秒に変換
-            start_ms = int(segment_start * 1000)
-            end_ms = int(segment_end * 1000)
+            # WAV形式で出力（シンプル統一）
+            wav_output = output_path.with_suffix('.wav')
             
-            # MP3ファイル読み込み（指定区間のみ）
-            audio = AudioSegment.from_mp3(str(source_path))
+            # 既存ファイルがある場合は上書き、ロック時は一意名で保存
+            try:
+                wav_output.unlink(missing_ok=True)
+            except PermissionError:
+                import time
+                timestamp = int(time.time())
+                wav_output = wav_output.with_stem(f"{wav_output.stem}_{timestamp}")
+                logger.info(f"ファイルロックのため一意名で保存: {wav_output.name}")
             
-            # 終了時刻がファイル長を超える場合の調整
-            if end_ms > len(audio):
-                end_ms = len(audio)
+            # 音声ファイル読み込み（指定区間のみデコード）
+            y, sr = self._read_segment(source_path, segment_start, segment_duration)
             
-            # セグメント切り出し
-            segment = audio[start_ms:end_ms]
+            # 16bit PCMに量子化してWAV形式で保存（スペクトログラムにはfloatのまま渡す）
+            pcm = self._to_pcm16(y)
+            if self._writer is not None:
+                future = self._writer.submit(self._write_wav_pcm16, wav_output, pcm, sr)
+                self._pending_writes.append((future, wav_output))
+            else:
+                self._write_wav_pcm16(wav_output, pcm, sr)
             
-            # MP3形式で出力（元ファイルの品質を維持）
-            segment.export(
-                str(output_path),
-                format="mp3",
-                bitrate="128k",  # 適度な品質
-                parameters=["-ac", "1"]  # モノラル変換
-            )
+            logger.debug(f"WAVセグメント生成完了: {segment_start:.1f}s-{segment_start + segment_duration:.1f}s")
+            logger.info(f"[MUSIC] 高品質WAV形式で保存: {wav_output.name}")
             
-            logger.debug(f"セグメント抽出完了: {segment_start:.1f}s-{segment_end:.1f}s")
-            return True
+            return True, wav_output, (y, sr)
             
         except Exception as e:
-            logger.error(f"pydubセグメント抽出エラー: {e}")
-            return False
+            logger.error(f"WAVセグメント生成エラー: {e}")
+            return False, output_path, None
     
-    def _extract_segment_librosa(
-        self, 
-        source_path: Path, 
-        output_path: Path, 
-        start_time: float, 
-        end_time: float
-    ) -> Tuple[bool, Path]:
+    @staticmethod
+    def compute_waveform_envelope(samples: np.ndarray, sr: int, n_buckets: int = WAVEFORM_ENVELOPE_BUCKETS) -> bytes:
         """
-        librosaを使用したシンプルなセグメント抽出（WAV形式）
+        音声セグメントの波形表示用エンベロープ（区間ごとの最小・最大）を作成
+        
+        ビューワーで音声をデコードせずに波形を表示するため、検出レコードに保存する
         
         Args:
-            source_path: 元ファイルパス
-            output_path: 出力ファイルパス
-            start_time: 開始時刻（秒）
-            end_time: 終了時刻（秒）
+            samples: 音声データ（モノラル）
+            sr: サンプリングレート
+            n_buckets: 区間数
             
         Returns:
-            (成功フラグ, 実際の出力パス)
+            セグメント長（秒、float32リトルエンディアン4バイト）と
+            (区間数, 2)のfloat16配列（最小, 最大）を連結したバイト列
+        """
+        n_buckets = min(n_buckets, len(samples))
+        header = struct.pack('<f', len(samples) / sr)
+        if n_buckets == 0:
+            return header
+        
+        # 区間の境界ごとにまとめて最小・最大を計算（端数の区間も含む）
+        bounds = (np.arange(n_buckets) * len(samples)) // n_buckets
+        envelope = np.empty((n_buckets, 2), dtype='<f2')
+        envelope[:, 0] = np.minimum.reduceat(samples, bounds)
+        envelope[:, 1] = np.maximum.reduceat(samples, bounds)
+        return header + envelope.tobytes()
+    
+    def wait_for_writes(self) -> List[str]:
         """
+        非同期書き込みの完了を待機
+        
+        Returns:
+            書き込みに失敗したセグメントの相対パス（database/からの相対パス）のリスト
+        """
+        failed = []
+        
+        for future, output_path in self._pending_writes:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"WAVセグメント書き込みエラー: {output_path.name}: {e}")
+                relative = output_path.relative_to(self.base_output_dir).as_posix()
+                failed.append(f"audio_segments/{relative}")
+        
+        self._pending_writes = []
+        return failed
+    
+    @staticmethod
+    def _to_pcm16(y: np.ndarray) -> np.ndarray:
+        """
+        float音声データを16bit PCMに量子化
+        
+        Args:
+            y: 音声データ（float、-1.0〜1.0）
+            
+        Returns:
+            リトルエンディアンのint16配列
+        """
+        # libsndfileと同じスケーリング（範囲外の値はクリップ）
+        scaled = np.multiply(y, 32768.0)
+        np.floor(scaled, out=scaled)
+        np.clip(scaled, -32768, 32767, out=scaled)
+        return scaled.astype('<i2')
+    
+    def _write_wav_pcm16(self, output_path: Path, pcm: np.ndarray, sr: int):
+        """
+        モノラルの16bit PCMデータをWAVファイルとして書き込み
+        
+        44バイトのRIFFヘッダーとPCMデータをwritevでまとめて書き込む
+        
+        Args:
+            output_path: 出力ファイルパス
+            pcm: 音声データ（リトルエンディアンのint16）
+            sr: サンプリングレート
+        """
+        data = memoryview(np.ascontiguousarray(pcm)).cast('B')
+        
+        header = struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data.nbytes, b'WAVE',
+            b'fmt ', 16, 1, 1, sr, sr * 2, 2, 16,
+            b'data', data.nbytes
+        )
+        
+        if not hasattr(os, 'writev'):
+            # Windows等writev非対応の環境
+            with open(output_path, 'wb') as f:
+                f.write(header)
+                f.write(data)
+            return
+        
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
         try:
-            # 前後のコンテキストを含む時刻計算
-            segment_start = max(0, start_time - self.context_seconds)
-            segment_duration = (end_time + self.context_seconds) - segment_start
+            written = os.writev(fd, [header, data])
             
-            # WAV形式で出力（シンプル統一）
-            wav_output = output_path.with_suffix('.wav')
+            # 部分書き込み時は残りを書き込む
+            total = len(header) + data.nbytes
+            if written < total:
+                remaining = memoryview(header + data.tobytes())[written:]
+                while remaining:
+                    remaining = remaining[os.write(fd, remaining):]
+        finally:
+            os.close(fd)
+    
+    def _read_segment(self, source_path: Path, offset: float, duration: float) -> Tuple[np.ndarray, int]:
+        """
+        元音声ファイルから指定区間をモノラルで読み込み
+        
+        libsndfileで直接シークして必要なフレームのみデコードし、
+        libsndfileが扱えない形式はlibrosa（audioread）で読み込む
+        
+        Args:
+            source_path: 元ファイルパス
+            offset: 読み込み開始時刻（秒）
+            duration: 読み込み長（秒）
             
-            # 既存ファイルがある場合は上書き、ロック時は一意名で保存
-            if wav_output.exists():
-                try:
-                    wav_output.unlink()
-                    logger.debug(f"既存WAVファイルを上書き: {wav_output}")
-                except PermissionError:
-                    import time
-                    timestamp = int(time.time())
-                    wav_output = wav_output.with_stem(f"{wav_output.stem}_{timestamp}")
-                    logger.info(f"ファイルロックのため一意名で保存: {wav_output.name}")
+        Returns:
+            (音声データ（float32）, サンプリングレート)
+        """
+        try:
+            f = self._open_source(source_path)
+            sr = f.samplerate
+            # librosa.loadと同じフレーム位置の丸め
+            start_frame = int(np.round(sr * offset))
+            num_frames = int(np.round(sr * duration))
+            
+            if start_frame >= f.frames:
+                return np.zeros(0, dtype=np.float32), sr
             
-            # 音声ファイル読み込み（librosaがMP3を自動変換）
-            y, sr = librosa.load(
+            try:
+                f.seek(start_frame)
+                y = f.read(num_frames, dtype='float32', always_2d=True)
+            except sf.SoundFileError:
+                self._close_source(source_path)
+                raise
+        except sf.SoundFileError as e:
+            logger.debug(f"soundfileで読み込めないためlibrosaで読み込み: {e}")
+            return librosa.load(
                 str(source_path),
                 sr=None,  # 元のサンプリングレートを維持
-                offset=segment_start,
-                duration=segment_duration,
+                offset=offset,
+                duration=duration,
                 mono=True
             )
+        
+        # モノラル変換
+        if y.shape[1] == 1:
+            return y[:, 0], sr
+        return y.mean(axis=1), sr
+    
+    def _open_source(self, source_path: Path) -> sf.SoundFile:
+        """
+        元音声ファイルを開く（最近使用したファイルはキャッシュから返す）
+        
+        Args:
+            source_path: 元ファイルパス
             
-            # WAV形式で直接保存（シンプル！）
-            sf.write(str(wav_output), y, sr)
-            
-            logger.debug(f"WAVセグメント生成完了: {segment_start:.1f}s-{segment_start + segment_duration:.1f}s")
-            logger.info(f"[MUSIC] 高品質WAV形式で保存: {wav_output.name}")
-            
-            return True, wav_output
-            
-        except Exception as e:
-            logger.error(f"WAVセグメント生成エラー: {e}")
-            return False, output_path
+        Returns:
+            SoundFileオブジェクト
+        """
+        key = str(source_path)
+        f = self._source_cache.get(key)
+        if f is not None:
+            self._source_cache.move_to_end(key)
+            return f
+        
+        f = sf.SoundFile(key)
+        self._source_cache[key] = f
+        
+        # 上限を超えた場合は最も古いファイルを閉じる
+        while len(self._source_cache) > self.max_open_sources:
+            _, oldest = self._source_cache.popitem(last=False)
+            oldest.close()
+        
+        return f
+    
+    def _close_source(self, source_path: Path):
+        """
+        キャッシュ済みの元音声ファイルを閉じる
+        
+        Args:
+            source_path: 元ファイルパス
+        """
+        f = self._source_cache.pop(str(source_path), None)
+        if f is not None:
+            f.close()
+    
+    def close_sources(self):
+        """
+        キャッシュ済みの元音声ファイルをすべて閉じる
+        """
+        while self._source_cache:
+            _, f = self._source_cache.popitem()
+            f.close()
     
     def _generate_filename(self, detection_id: int, species_name: str, confidence: float) -> str:
         """
@@ -221,7 +439,7 @@ class AudioSegmentGenerator:
             ファイル名
         """
         # 種名のサニタイズ（ファイル名に使用できない文字を除去）
-        safe_species = "".join(c for c in species_name if c.isalnum() or c in "ー_-")
+        safe_species = _UNSAFE_FILENAME_CHARS.sub("", species_name)
         
         return f"detection_{detection_id:03d}_{safe_species}_{confidence:.2f}.wav"
     
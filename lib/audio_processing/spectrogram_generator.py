@@ -4,37 +4,143 @@
 """
 
 import os
+import re
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
+import soundfile as sf
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
+from collections import OrderedDict
 
 # 非インタラクティブバックエンド設定（サーバー環境対応）
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.font_manager import FontProperties, findfont
+from PIL import Image, ImageDraw, ImageFont
 
 # librosa関連のインポート
 try:
     import librosa
-    import librosa.display
     LIBROSA_AVAILABLE = True
 except ImportError as e:
     LIBROSA_AVAILABLE = False
     logging.error(f"librosa import error: {e}")
 
+# pyFFTW（オプション、インストール時はSTFTのFFTに計画済みのFFTWを使用）
+try:
+    import pyfftw
+    import pyfftw.builders
+    PYFFTW_AVAILABLE = True
+except ImportError:
+    PYFFTW_AVAILABLE = False
+
+# spectrograms（Rust実装のメル・スペクトログラム、オプション）
+# 環境変数BIRDNET_SPECTROGRAM_BACKEND=spectrogramsの場合のみ読み込んで使用
+SPECTROGRAMS_AVAILABLE = False
+if os.getenv('BIRDNET_SPECTROGRAM_BACKEND', '').lower() == 'spectrograms':
+    try:
+        import spectrograms as sg
+        SPECTROGRAMS_AVAILABLE = True
+    except ImportError as e:
+        logging.warning(f"spectrograms import error: {e}")
+
 # ロガー設定
 logger = logging.getLogger(__name__)
 
+# viridisカラーマップのLUT（matplotlibの256色と同じ）
+_VIRIDIS_LUT = matplotlib.colormaps['viridis'](np.arange(256), bytes=True)[:, :3]
+
+# dB変換の下限値とダイナミックレンジ（librosa.power_to_dbの既定値）
+_POWER_AMIN = 1e-10
+_TOP_DB = 80.0
+
+# 枠（軸・ラベル）画像のキャッシュ上限
+_MAX_CACHED_FRAMES = 16
+
+# オーバービューの最大フレーム数（画像の横幅1280ピクセルの2倍）
+_OVERVIEW_MAX_FRAMES = 2560
+
+# オーバービューの画像形式毎の保存設定（Pillowのsave引数）
+_OVERVIEW_SAVE_OPTIONS = {
+    'png': {'format': 'PNG', 'compress_level': 1},
+    'webp': {'format': 'WEBP', 'quality': 85, 'method': 0},
+    'jpeg': {'format': 'JPEG', 'quality': 85},
+}
+
+# FFTW計画（フレーム数毎）のキャッシュ上限
+_MAX_CACHED_FFT_PLANS = 8
+
+# ファイル名に使用しない文字（英数字・_・-・ー以外、\wはstr.isalnum()と_に一致）
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w\-ー]")
+
+def _power_to_color_index(power: np.ndarray, amin: float, top_db: float) -> np.ndarray:
+    """
+    パワースペクトログラムをdB変換してカラーマップの色番号（0〜255）に変換
+    
+    librosa.power_to_db(ref=np.max)の後に最小値〜最大値を256色に割り当てるのと同じ結果を
+    中間配列1つ（float32、インプレース演算）で計算する
+    
+    Args:
+        power: パワースペクトログラム
+        amin: パワーの下限値
+        top_db: 最大値からのダイナミックレンジ（dB）
+        
+    Returns:
+        色番号（uint8、powerと同じ形状）
+    """
+    # top_dbの切り捨てはパワー領域の下限に置き換え（最大値 x 10^(-top_db/10)）
+    ref = max(float(power.max()), amin)
+    floor = max(amin, ref * 10.0 ** (-top_db / 10.0))
+    
+    # 最小値〜最大値の正規化は1次変換に依らないため、refでの除算と10倍は省略
+    level = np.maximum(power, floor, dtype=np.float32)
+    np.log10(level, out=level)
+    vmin = float(level.min())
+    span = float(level.max()) - vmin
+    scale = 256.0 / span if span > 0 else 0.0
+    
+    level -= vmin
+    level *= scale
+    np.minimum(level, 255, out=level)
+    return level.astype(np.uint8)
+
+# ワーカープロセス内の生成インスタンス（出力ディレクトリ -> SpectrogramGenerator）
+_worker_generators = {}
+
+def _generate_spectrogram_worker(task: Tuple[str, Dict]) -> Tuple[bool, str, Optional[str]]:
+    """
+    ワーカープロセスでスペクトログラムを生成
+    
+    Args:
+        task: (出力ベースディレクトリ, generate_spectrogramの引数辞書)
+        
+    Returns:
+        (成功フラグ, 出力ファイルパス, エラーメッセージ)
+    """
+    base_output_dir, job = task
+    
+    generator = _worker_generators.get(base_output_dir)
+    if generator is None:
+        generator = SpectrogramGenerator(base_output_dir)
+        _worker_generators[base_output_dir] = generator
+    
+    return generator.generate_spectrogram(**job)
+
 class SpectrogramGenerator:
     """スペクトログラム生成クラス"""
     
-    def __init__(self, base_output_dir: str = None):
+    def __init__(self, base_output_dir: str = None, write_workers: int = 0):
         """
         初期化
         
         Args:
             base_output_dir: 出力ベースディレクトリ（デフォルト: database/spectrograms）
+            write_workers: PNG書き込みスレッド数（0の場合は同期書き込み）
         """
         if not LIBROSA_AVAILABLE:
             logger.error("librosaが利用できません。pip install librosaを実行してください。")
@@ -53,6 +159,46 @@ class SpectrogramGenerator:
         self.dpi = 80
         self.n_mels = 128  # メル周波数ビン数
         self.fmax = 8000   # 最大周波数（鳥類検出に適した範囲）
+        self.hop_length = 512
+        self.n_fft = 2048
+        
+        # メルフィルタバンクのキャッシュ（サンプリングレート -> フィルタ行列）
+        self._mel_basis_cache = {}
+        
+        # STFT・パワースペクトログラムの作業領域（呼び出し毎の確保を避けるため再利用）
+        self._stft_buffer = np.empty(0, dtype=np.complex64)
+        self._power_buffer = np.empty(0, dtype=np.float32)
+        
+        # pyFFTW利用時の窓関数とFFT計画（フレーム数 -> 計画済みFFT、LRU）
+        self._fft_window = None
+        self._fft_plans = OrderedDict()
+        
+        # spectrogramsのメル変換計画（サンプリングレート -> 計画）
+        self._rust_mel_plans = {}
+        
+        # GPU（torchaudio）のメル変換（初回のバッチ処理時に利用可否を判定）
+        self._cuda_available = None
+        self._cuda_transforms = {}
+        
+        # 軸・ラベルのみを描画した枠画像のキャッシュ（(sr, フレーム数) -> 枠情報）
+        self._frame_cache = {}
+        self._title_font = None
+        
+        # 代替描画用の周波数軸のキャッシュ（('mel', n_mels, fmax) / ('fft', sr, n_fft) -> 周波数配列）
+        self._axis_cache = {}
+        
+        # 非同期書き込み（PNGのzlib圧縮はGILを解放するため次の検出の計算と重ねられる）
+        self._writer = ThreadPoolExecutor(max_workers=write_workers) if write_workers > 0 else None
+        self._pending_writes: List[Tuple[Future, Path]] = []
+        
+        # 枠の描画方法（librosa.displayが利用できない場合はimshowで代替）
+        self._draw_frame_axes = self._select_frame_renderer()
+        
+        # 描画用のFigure/Axes（用途 -> (Figure, Axes)、使い回して生成コストを削減）
+        self._figures = {}
+        
+        # オーバービューの描画済みプロット（((sr, hop, 形状), 画像要素, タイトル)、同じ形状なら再利用）
+        self._overview_plot = None
         
     def generate_spectrogram(
         self,
@@ -60,17 +206,159 @@ class SpectrogramGenerator:
         session_name: str,
         detection_id: int,
         species_name: str,
-        confidence: float
+        confidence: float,
+        samples: Optional[np.ndarray] = None,
+        sr: Optional[int] = None
     ) -> Tuple[bool, str, Optional[str]]:
         """
         スペクトログラム画像を生成
         
+        write_workers指定時は書き込みが非同期のため、wait_for_writes()で完了を確認する
+        
+        Args:
+            audio_segment_path: 音声セグメントファイルパス
+            session_name: セッション名
+            detection_id: 検出ID
+            species_name: 種名
+            confidence: 信頼度
+            samples: デコード済み音声データ（指定時はファイルを読み込まない）
+            sr: samplesのサンプリングレート
+            
+        Returns:
+            (成功フラグ, 出力ファイルパス, エラーメッセージ)
+        """
+        return self._generate_spectrogram(
+            audio_segment_path, session_name, detection_id, species_name, confidence, samples, sr
+        )
+    
+    def generate_spectrograms_batch(self, jobs: List[Dict]) -> List[Tuple[bool, str, Optional[str]]]:
+        """
+        複数のスペクトログラム画像をまとめて生成
+        
+        CUDAとtorchaudioが利用できる場合はメル・スペクトログラムをGPUで一括計算する
+        
+        Args:
+            jobs: generate_spectrogramの引数辞書のリスト
+            
+        Returns:
+            (成功フラグ, 出力ファイルパス, エラーメッセージ)のリスト（jobsと同じ順序）
+        """
+        # 音声データ準備（読み込めないものは個別処理でエラーを返す）
+        signals = []
+        for job in jobs:
+            samples, sr = job.get('samples'), job.get('sr')
+            if (samples is None or sr is None) and Path(job['audio_segment_path']).exists():
+                try:
+                    samples, sr = self._load_audio(job['audio_segment_path'])
+                except Exception as e:
+                    logger.debug(f"バッチ用音声読み込み失敗: {job['audio_segment_path']}: {e}")
+                    samples, sr = None, None
+            signals.append((samples, sr))
+        
+        mel_powers = self._compute_mel_power_batch(signals)
+        
+        results = []
+        for job, (samples, sr), mel_power in zip(jobs, signals, mel_powers):
+            results.append(self._generate_spectrogram(
+                job['audio_segment_path'],
+                job['session_name'],
+                job['detection_id'],
+                job['species_name'],
+                job['confidence'],
+                samples,
+                sr,
+                mel_power
+            ))
+        return self._apply_write_failures(results)
+    
+    def generate_spectrograms_many(
+        self,
+        jobs: List[Dict],
+        max_workers: Optional[int] = None
+    ) -> List[Tuple[bool, str, Optional[str]]]:
+        """
+        複数のスペクトログラム画像をプロセス並列で生成
+        
+        Args:
+            jobs: generate_spectrogramの引数辞書のリスト
+            max_workers: ワーカープロセス数（デフォルト: CPUコア数-1、1の場合は逐次処理）
+            
+        Returns:
+            (成功フラグ, 出力ファイルパス, エラーメッセージ)のリスト（jobsと同じ順序）
+        """
+        workers = min(max_workers or max(1, (os.cpu_count() or 1) - 1), len(jobs))
+        if workers <= 1:
+            return self._apply_write_failures([self.generate_spectrogram(**job) for job in jobs])
+        
+        tasks = [(str(self.base_output_dir), job) for job in jobs]
+        
+        # matplotlibの状態をfork時に引き継がないようspawnで起動
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            return list(executor.map(_generate_spectrogram_worker, tasks, chunksize=4))
+    
+    def wait_for_writes(self) -> List[str]:
+        """
+        非同期書き込みの完了を待機
+        
+        Returns:
+            書き込みに失敗したスペクトログラムの相対パス（database/からの相対パス）のリスト
+        """
+        failed = []
+        
+        for future, output_path in self._pending_writes:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"スペクトログラム書き込みエラー: {output_path.name}: {e}")
+                relative = output_path.relative_to(self.base_output_dir).as_posix()
+                failed.append(f"spectrograms/{relative}")
+        
+        self._pending_writes = []
+        return failed
+    
+    def _apply_write_failures(self, results: List[Tuple[bool, str, Optional[str]]]) -> List[Tuple[bool, str, Optional[str]]]:
+        """
+        非同期書き込みの完了を待機し、書き込みに失敗した結果をエラーに置き換え
+        
+        Args:
+            results: (成功フラグ, 出力ファイルパス, エラーメッセージ)のリスト
+            
+        Returns:
+            書き込み結果を反映したリスト
+        """
+        failed_paths = set(self.wait_for_writes())
+        if not failed_paths:
+            return results
+        
+        return [
+            (False, "", "スペクトログラム書き込みエラー") if success and path in failed_paths else (success, path, error)
+            for success, path, error in results
+        ]
+    
+    def _generate_spectrogram(
+        self,
+        audio_segment_path: str,
+        session_name: str,
+        detection_id: int,
+        species_name: str,
+        confidence: float,
+        samples: Optional[np.ndarray] = None,
+        sr: Optional[int] = None,
+        mel_power: Optional[np.ndarray] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        スペクトログラム画像を生成（generate_spectrogramの実装）
+        
         Args:
             audio_segment_path: 音声セグメントファイルパス
             session_name: セッション名
             detection_id: 検出ID
             species_name: 種名
             confidence: 信頼度
+            samples: デコード済み音声データ（指定時はファイルを読み込まない）
+            sr: samplesのサンプリングレート
+            mel_power: 計算済みのメル・パワースペクトログラム
             
         Returns:
             (成功フラグ, 出力ファイルパス, エラーメッセージ)
@@ -78,8 +366,8 @@ class SpectrogramGenerator:
         try:
             segment_path = Path(audio_segment_path)
             
-            # 音声セグメントファイル存在確認
-            if not segment_path.exists():
+            # 音声セグメントファイル存在確認（音声データ指定時は不要）
+            if samples is None and not segment_path.exists():
                 return False, "", f"音声セグメントファイルが見つかりません: {segment_path}"
             
             # 出力ディレクトリ作成
@@ -91,7 +379,7 @@ class SpectrogramGenerator:
             output_path = session_dir / output_filename
             
             # スペクトログラム生成
-            success = self._create_melspectrogram(segment_path, output_path, species_name)
+            success = self._create_melspectrogram(segment_path, output_path, species_name, samples, sr, mel_power)
             
             if success:
                 # 相対パス返却（database/からの相対パス）
@@ -110,7 +398,10 @@ class SpectrogramGenerator:
         self, 
         audio_path: Path, 
         output_path: Path, 
-        species_name: str
+        species_name: str,
+        samples: Optional[np.ndarray] = None,
+        sr: Optional[int] = None,
+        mel_power: Optional[np.ndarray] = None
     ) -> bool:
         """
         メル・スペクトログラム生成
@@ -119,106 +410,518 @@ class SpectrogramGenerator:
             audio_path: 音声ファイルパス
             output_path: 出力画像ファイルパス
             species_name: 種名（タイトル用）
+            samples: デコード済み音声データ（指定時はaudio_pathを読み込まない）
+            sr: samplesのサンプリングレート
+            mel_power: 計算済みのメル・パワースペクトログラム（指定時はsrのみ使用）
             
         Returns:
             成功フラグ
         """
         try:
-            # 音声ファイル読み込み
-            y, sr = librosa.load(str(audio_path), sr=None, mono=True)
+            if mel_power is not None and sr is not None:
+                mel_spec = mel_power
+            else:
+                # 音声ファイル読み込み（デコード済みデータがあればそのまま使用）
+                if samples is not None and sr is not None:
+                    y = samples
+                else:
+                    y, sr = self._load_audio(audio_path)
+                
+                mel_spec = self._compute_mel_power(y, sr)
             
-            # メル・スペクトログラム計算
-            mel_spec = librosa.feature.melspectrogram(
-                y=y,
-                sr=sr,
-                n_mels=self.n_mels,
-                fmax=self.fmax,
-                hop_length=512,
-                n_fft=2048
+            # 枠（軸・ラベル）は同じ長さのセグメントで共通のためキャッシュから取得
+            frame = self._get_frame(sr, mel_spec.shape[1])
+            image = frame["image"].copy()
+            
+            # スペクトログラム本体はdB変換・カラーマップを直接適用して軸領域に貼り付け
+            left, top, right, bottom = frame["box"]
+            spec_image = Image.fromarray(self._apply_colormap(mel_spec))
+            spec_image = spec_image.resize((right - left, bottom - top), Image.BILINEAR)
+            image.paste(spec_image, (left, top))
+            
+            # タイトル
+            ImageDraw.Draw(image).text(
+                frame["title_xy"],
+                f'{species_name} - Mel Spectrogram',
+                fill='black',
+                font=self._get_title_font(),
+                anchor='mm'
             )
             
-            # デシベルスケールに変換
-            mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
+            # PNG形式で保存
+            if self._writer is not None:
+                future = self._writer.submit(image.save, str(output_path), format='PNG', compress_level=1)
+                self._pending_writes.append((future, output_path))
+            else:
+                image.save(str(output_path), format='PNG', compress_level=1)
             
-            # プロット作成
-            plt.figure(figsize=self.figure_size, dpi=self.dpi)
+            logger.debug(f"メル・スペクトログラム生成完了: {output_path}")
+            return True
             
-            # スペクトログラム表示（librosa.displayの代替方法も含む）
+        except Exception as e:
+            logger.error(f"メル・スペクトログラム生成エラー: {str(e)}")
+            logger.error(f"エラー詳細 - ファイル: {audio_path}, 出力: {output_path}")
+            return False
+    
+    def _load_audio(self, audio_path) -> Tuple[np.ndarray, int]:
+        """
+        音声ファイルをモノラルのfloat32で読み込み
+        
+        libsndfileが扱えない形式はlibrosa（audioread）で読み込む
+        
+        Args:
+            audio_path: 音声ファイルパス
+            
+        Returns:
+            (音声データ, サンプリングレート)
+        """
+        try:
+            y, sr = sf.read(str(audio_path), dtype='float32', always_2d=True)
+        except sf.SoundFileError as e:
+            logger.debug(f"soundfileで読み込めないためlibrosaで読み込み: {e}")
+            return librosa.load(str(audio_path), sr=None, mono=True)
+        
+        # モノラル変換
+        if y.shape[1] == 1:
+            return y[:, 0], sr
+        return y.mean(axis=1, dtype=np.float32), sr
+    
+    def _compute_mel_power(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """
+        メル・パワースペクトログラムを計算（パワースペクトログラムにフィルタバンクを適用）
+        
+        Args:
+            y: 音声データ
+            sr: サンプリングレート
+            
+        Returns:
+            メル・パワースペクトログラム（n_mels x フレーム数）
+        """
+        # float32で計算（STFTはcomplex64、フィルタバンク適用は単精度の行列積）
+        y = np.asarray(y, dtype=np.float32)
+        
+        if SPECTROGRAMS_AVAILABLE:
             try:
-                # 通常のlibrosa.display.specshow
-                librosa.display.specshow(
-                    mel_spec_db,
-                    sr=sr,
-                    x_axis='time',
-                    y_axis='mel',
-                    fmax=self.fmax,
-                    cmap='viridis'  # 元の色合いに戻す
-                )
-            except AttributeError:
-                # librosa.displayが利用できない場合の代替処理
-                logger.warning("librosa.display不可。代替処理を使用します。")
-                
-                # 時間軸とメル周波数軸を手動で計算
-                hop_length = 512
-                time_frames = librosa.frames_to_time(
-                    np.arange(mel_spec_db.shape[1]), 
-                    sr=sr, 
-                    hop_length=hop_length
-                )
-                mel_frequencies = librosa.mel_frequencies(
-                    n_mels=self.n_mels, 
-                    fmax=self.fmax
-                )
-                
-                # imshowを使用してスペクトログラムを表示（元の色合い）
-                plt.imshow(
-                    mel_spec_db,
-                    aspect='auto',
-                    origin='lower',
-                    cmap='viridis',  # 元の色合いに戻す
-                    extent=[time_frames[0], time_frames[-1], 
-                           mel_frequencies[0], mel_frequencies[-1]]
-                )
-                
-                plt.xlabel('Time (s)', fontsize=10)
-                plt.ylabel('Mel Frequency (Hz)', fontsize=10)
+                return self._compute_mel_power_rust(y, sr)
+            except sg.SpectrogramError as e:
+                logger.warning(f"spectrogramsでのメル・スペクトログラム計算に失敗、librosaで計算します: {e}")
+        
+        stft, power = self._get_stft_buffers(1 + len(y) // self.hop_length)
+        if PYFFTW_AVAILABLE:
+            stft = self._stft_fftw(y)
+        else:
+            librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length, out=stft)
+        np.abs(stft, out=power)
+        np.square(power, out=power)
+        return self._get_mel_basis(sr) @ power
+    
+    def _compute_mel_power_rust(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """
+        spectrograms（Rust実装）でメル・パワースペクトログラムを計算
+        
+        librosaと同じ設定（中心揃え・Hann窓・Slaney正規化のフィルタバンク）の計画を
+        サンプリングレート毎に作成して再利用する（計算中はGILを解放）
+        
+        Args:
+            y: 音声データ（float32）
+            sr: サンプリングレート
+            
+        Returns:
+            メル・パワースペクトログラム（n_mels x フレーム数、float32）
+        """
+        plan = self._rust_mel_plans.get(sr)
+        if plan is None:
+            params = sg.SpectrogramParams(
+                sg.StftParams(n_fft=self.n_fft, hop_size=self.hop_length, window=sg.WindowType.hanning, centre=True),
+                sample_rate=float(sr)
+            )
+            mel_params = sg.MelParams(n_mels=self.n_mels, f_min=0.0, f_max=float(self.fmax), norm=sg.MelNorm.slaney)
+            plan = sg.SpectrogramPlanner().mel_power_plan(params, mel_params, dtype='float32')
+            self._rust_mel_plans[sr] = plan
+        
+        return np.asarray(plan.compute(y).data, dtype=np.float32)
+    
+    def _stft_fftw(self, y: np.ndarray) -> np.ndarray:
+        """
+        pyFFTWでSTFTを計算（librosa.stftのcenter=True・ゼロパディング・Hann窓と同じ）
+        
+        フレームを(フレーム数 x n_fft)の連続領域に並べ、フレーム数毎に作成した
+        FFTW_MEASUREの計画で一括変換する
+        
+        Args:
+            y: 音声データ（float32）
+            
+        Returns:
+            STFT結果（(n_fft/2+1) x フレーム数、計画の出力領域のため次の呼び出しまで有効）
+        """
+        if self._fft_window is None:
+            self._fft_window = librosa.filters.get_window('hann', self.n_fft, fftbins=True).astype(np.float32)
+        
+        # 中心揃えのためにn_fft/2ずつゼロで埋めてフレーム分割
+        padding = self.n_fft // 2
+        y_padded = np.pad(y, padding, mode='constant')
+        frames = np.lib.stride_tricks.sliding_window_view(y_padded, self.n_fft)[::self.hop_length]
+        
+        n_frames = frames.shape[0]
+        plan = self._fft_plans.get(n_frames)
+        if plan is None:
+            plan = pyfftw.builders.rfft(
+                pyfftw.empty_aligned((n_frames, self.n_fft), dtype='float32'),
+                axis=-1,
+                planner_effort='FFTW_MEASURE',
+                threads=1
+            )
+            if len(self._fft_plans) >= _MAX_CACHED_FFT_PLANS:
+                self._fft_plans.popitem(last=False)
+            self._fft_plans[n_frames] = plan
+        else:
+            self._fft_plans.move_to_end(n_frames)
+        
+        # 窓掛けしながら計画の入力領域に書き込み、その場で実行
+        np.multiply(frames, self._fft_window, out=plan.input_array)
+        return plan().T
+    
+    def _get_stft_buffers(self, n_frames: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        STFT結果とパワースペクトログラムの作業領域を取得（不足時のみ拡張）
+        
+        librosa.stftの既定と同じ列優先（Fortran順）の連続領域として返す
+        
+        Args:
+            n_frames: 時間フレーム数
+            
+        Returns:
+            (STFT用配列（complex64）, パワー用配列（float32）)、形状は(n_fft/2+1) x n_frames
+        """
+        shape = (1 + self.n_fft // 2, n_frames)
+        size = shape[0] * shape[1]
+        if self._stft_buffer.size < size:
+            self._stft_buffer = np.empty(size, dtype=np.complex64)
+            self._power_buffer = np.empty(size, dtype=np.float32)
+        
+        return (
+            self._stft_buffer[:size].reshape(shape, order='F'),
+            self._power_buffer[:size].reshape(shape, order='F')
+        )
+    
+    def _compute_mel_power_batch(self, signals: List[Tuple[Optional[np.ndarray], Optional[int]]]) -> List[Optional[np.ndarray]]:
+        """
+        複数の音声データのメル・パワースペクトログラムを計算
+        
+        GPUが利用できる場合は同じサンプリングレート毎にパディングして一括計算し、
+        利用できない場合はCPUで1件ずつ計算する
+        
+        Args:
+            signals: (音声データ, サンプリングレート)のリスト（読み込み失敗は(None, None)）
+            
+        Returns:
+            メル・パワースペクトログラムのリスト（計算できなかったものはNone）
+        """
+        mel_powers = [None] * len(signals)
+        
+        if self._cuda_mel_available():
+            # サンプリングレート毎にまとめて計算
+            groups = {}
+            for index, (y, sr) in enumerate(signals):
+                if y is not None:
+                    groups.setdefault(sr, []).append(index)
+            
+            for sr, indices in groups.items():
+                try:
+                    batch_powers = self._compute_mel_power_cuda([signals[i][0] for i in indices], sr)
+                except Exception as e:
+                    logger.warning(f"GPUでのメル・スペクトログラム計算に失敗、CPUで計算します: {e}")
+                    continue
+                for index, mel_power in zip(indices, batch_powers):
+                    mel_powers[index] = mel_power
+        
+        for index, (y, sr) in enumerate(signals):
+            if mel_powers[index] is None and y is not None:
+                mel_powers[index] = self._compute_mel_power(y, sr)
+        
+        return mel_powers
+    
+    def _cuda_mel_available(self) -> bool:
+        """
+        torchaudioのGPUメル変換が利用可能か判定（初回のみ判定）
+        
+        Returns:
+            利用可能フラグ
+        """
+        if self._cuda_available is None:
+            try:
+                import torch
+                import torchaudio  # noqa: F401
+                self._cuda_available = torch.cuda.is_available()
+            except ImportError:
+                self._cuda_available = False
+            logger.debug(f"GPUメル変換: {'有効' if self._cuda_available else '無効'}")
+        return self._cuda_available
+    
+    def _compute_mel_power_cuda(self, signals: List[np.ndarray], sr: int) -> List[np.ndarray]:
+        """
+        torchaudioで同じサンプリングレートの音声データのメル・パワースペクトログラムを一括計算
+        
+        Args:
+            signals: 音声データのリスト
+            sr: サンプリングレート
+            
+        Returns:
+            メル・パワースペクトログラムのリスト（signalsと同じ順序）
+        """
+        import torch
+        import torchaudio
+        
+        transform = self._cuda_transforms.get(sr)
+        if transform is None:
+            # librosa.stft / librosa.filters.melの既定値に合わせる
+            transform = torchaudio.transforms.MelSpectrogram(
+                sample_rate=sr,
+                n_fft=self.n_fft,
+                hop_length=self.hop_length,
+                f_min=0.0,
+                f_max=self.fmax,
+                n_mels=self.n_mels,
+                pad_mode='constant',
+                power=2.0,
+                norm='slaney',
+                mel_scale='slaney'
+            ).cuda()
+            self._cuda_transforms[sr] = transform
+        
+        # 末尾をゼロで埋めて同じ長さに揃える
+        max_length = max(len(y) for y in signals)
+        batch = np.zeros((len(signals), max_length), dtype=np.float32)
+        for i, y in enumerate(signals):
+            batch[i, :len(y)] = y
+        
+        with torch.no_grad():
+            tensor = torch.from_numpy(batch).pin_memory().cuda(non_blocking=True)
+            mel_batch = transform(tensor).cpu().numpy()
+        
+        # 各音声の長さ分のフレームのみ返す（center=Trueのフレーム数）
+        return [mel_batch[i, :, :1 + len(y) // self.hop_length] for i, y in enumerate(signals)]
+    
+    def _get_mel_basis(self, sr: int) -> np.ndarray:
+        """
+        メルフィルタバンクを取得（サンプリングレート毎に初回のみ作成）
+        
+        Args:
+            sr: サンプリングレート
+            
+        Returns:
+            メルフィルタ行列（n_mels x (n_fft/2+1)）
+        """
+        mel_basis = self._mel_basis_cache.get(sr)
+        if mel_basis is None:
+            mel_basis = librosa.filters.mel(sr=sr, n_fft=self.n_fft, n_mels=self.n_mels, fmax=self.fmax)
+            self._mel_basis_cache[sr] = mel_basis
+        return mel_basis
+    
+    @staticmethod
+    def _apply_colormap(mel_power: np.ndarray) -> np.ndarray:
+        """
+        パワースペクトログラムをdBスケールに変換してviridisカラーマップを適用
+        
+        matplotlibと同じく最小値〜最大値を256色に割り当てる
+        
+        Args:
+            mel_power: パワースペクトログラム（周波数 x 時間）
+            
+        Returns:
+            RGB画像（高周波数が上、uint8）
+        """
+        index = _power_to_color_index(mel_power, _POWER_AMIN, _TOP_DB)
+        return _VIRIDIS_LUT[index[::-1]]
+    
+    def _get_frame(self, sr: int, n_frames: int) -> dict:
+        """
+        軸・ラベルのみを描画した枠画像を取得（初回のみmatplotlibで描画）
+        
+        Args:
+            sr: サンプリングレート
+            n_frames: スペクトログラムの時間フレーム数
             
-            # カラーバーを削除（コメントアウト）
-            # plt.colorbar(format='%+2.0f dB')
+        Returns:
+            枠情報（image: 枠画像, box: 軸領域(左, 上, 右, 下), title_xy: タイトル中心座標）
+        """
+        key = (sr, n_frames)
+        frame = self._frame_cache.get(key)
+        if frame is not None:
+            return frame
+        
+        frame = self._render_frame(sr, n_frames)
+        
+        if len(self._frame_cache) >= _MAX_CACHED_FRAMES:
+            self._frame_cache.pop(next(iter(self._frame_cache)))
+        self._frame_cache[key] = frame
+        return frame
+    
+    def _render_frame(self, sr: int, n_frames: int) -> dict:
+        """
+        matplotlibで軸・ラベルを描画し、軸領域とタイトル位置を取得
+        
+        Args:
+            sr: サンプリングレート
+            n_frames: スペクトログラムの時間フレーム数
             
-            # タイトルと軸ラベル
-            plt.title(f'{species_name} - Mel Spectrogram', fontsize=12, pad=10)
+        Returns:
+            枠情報（_get_frameを参照）
+        """
+        placeholder = np.zeros((self.n_mels, n_frames))
+        
+        fig, ax = self._get_axes('frame', self.figure_size)
+        
+        try:
+            # スペクトログラム表示（描画方法は初期化時に決定）
+            self._draw_frame_axes(ax, placeholder, sr)
             
-            # librosa.displayが使えた場合の軸ラベル
-            if hasattr(librosa, 'display'):
-                plt.xlabel('Time (s)', fontsize=10)
-                plt.ylabel('Mel Frequency', fontsize=10)
+            # タイトル（位置合わせ用、文字は画像に直接描画）
+            title = ax.set_title('Mel Spectrogram', fontsize=12, pad=10)
             
             # レイアウト調整
-            plt.tight_layout()
+            fig.tight_layout()
+            fig.canvas.draw()
             
-            # PNG形式で保存
-            plt.savefig(
-                str(output_path),
-                format='png',
-                bbox_inches='tight',
-                facecolor='white',
-                edgecolor='none',
-                dpi=self.dpi
+            # 画像座標（左上原点）に変換
+            height = fig.canvas.get_width_height()[1]
+            axes_box = ax.get_window_extent()
+            title_box = title.get_window_extent()
+            box = (
+                int(round(axes_box.x0)), int(round(height - axes_box.y1)),
+                int(round(axes_box.x1)), int(round(height - axes_box.y0))
             )
+            title_xy = ((title_box.x0 + title_box.x1) / 2, height - (title_box.y0 + title_box.y1) / 2)
             
-            # メモリ解放
-            plt.close()
+            # タイトルを除いて描画
+            title.set_visible(False)
+            fig.canvas.draw()
+            image = Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[:, :, :3].copy())
             
-            logger.debug(f"メル・スペクトログラム生成完了: {output_path}")
-            return True
+            return {"image": image, "box": box, "title_xy": title_xy}
             
-        except Exception as e:
-            logger.error(f"メル・スペクトログラム生成エラー: {str(e)}")
-            logger.error(f"エラー詳細 - ファイル: {audio_path}, 出力: {output_path}")
-            # エラー時もプロットを確実に閉じる
-            plt.close('all')
-            return False
+        finally:
+            # 次回の描画に備えて内容を消去（Figureは再利用）
+            ax.clear()
+    
+    def _get_axis_frequencies(self, kind: str, *params) -> np.ndarray:
+        """
+        代替描画用の周波数軸を取得（同じパラメータは初回のみ計算）
+        
+        Args:
+            kind: 'mel'（params: n_mels, fmax）または'fft'（params: sr, n_fft）
+            params: 周波数軸のパラメータ
+            
+        Returns:
+            周波数配列（Hz）
+        """
+        key = (kind, *params)
+        frequencies = self._axis_cache.get(key)
+        if frequencies is None:
+            if kind == 'mel':
+                n_mels, fmax = params
+                frequencies = librosa.mel_frequencies(n_mels=n_mels, fmax=fmax)
+            else:
+                sr, n_fft = params
+                frequencies = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+            self._axis_cache[key] = frequencies
+        return frequencies
+    
+    def _get_axes(self, name: str, figsize: Tuple[float, float]) -> Tuple[Figure, Axes]:
+        """
+        描画用のFigure/Axesを取得（用途毎に初回のみ作成）
+        
+        pyplotを経由しないためグローバルな図の管理やplt.closeは不要
+        
+        Args:
+            name: 用途（'frame': 検出の枠画像, 'overview': オーバービュー）
+            figsize: 図のサイズ（インチ）
+            
+        Returns:
+            (Figure, Axes)
+        """
+        figure = self._figures.get(name)
+        if figure is None:
+            fig = Figure(figsize=figsize, dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            figure = (fig, fig.add_subplot())
+            self._figures[name] = figure
+        return figure
+    
+    def _select_frame_renderer(self):
+        """
+        枠の描画方法を選択（librosa.displayはここで初めて読み込む）
+        
+        Returns:
+            描画メソッド（_draw_frame_specshowまたは_draw_frame_imshow）
+        """
+        try:
+            import librosa.display
+            if hasattr(librosa.display, 'specshow'):
+                return self._draw_frame_specshow
+        except ImportError:
+            pass
+        
+        logger.warning("librosa.display不可。代替処理を使用します。")
+        return self._draw_frame_imshow
+    
+    def _draw_frame_specshow(self, ax: Axes, placeholder: np.ndarray, sr: int) -> None:
+        """
+        librosa.display.specshowで軸（メル周波数軸）・ラベルを描画
+        
+        Args:
+            ax: 描画先のAxes
+            placeholder: 枠と同じ形状のダミーデータ（n_mels x フレーム数）
+            sr: サンプリングレート
+        """
+        librosa.display.specshow(
+            placeholder,
+            sr=sr,
+            x_axis='time',
+            y_axis='mel',
+            fmax=self.fmax,
+            cmap='viridis',
+            ax=ax
+        )
+        ax.set_xlabel('Time (s)', fontsize=10)
+        ax.set_ylabel('Mel Frequency', fontsize=10)
+    
+    def _draw_frame_imshow(self, ax: Axes, placeholder: np.ndarray, sr: int) -> None:
+        """
+        librosa.displayを使わずimshowで軸・ラベルを描画（代替処理）
+        
+        Args:
+            ax: 描画先のAxes
+            placeholder: 枠と同じ形状のダミーデータ（n_mels x フレーム数）
+            sr: サンプリングレート
+        """
+        # 時間軸（フレーム番号 x hop / sr）とメル周波数軸
+        end_time = (placeholder.shape[1] - 1) * self.hop_length / sr
+        mel_frequencies = self._get_axis_frequencies('mel', self.n_mels, self.fmax)
+        
+        ax.imshow(
+            placeholder,
+            aspect='auto',
+            origin='lower',
+            cmap='viridis',
+            extent=[0.0, end_time, 
+                   mel_frequencies[0], mel_frequencies[-1]]
+        )
+        ax.set_xlabel('Time (s)', fontsize=10)
+        ax.set_ylabel('Mel Frequency (Hz)', fontsize=10)
+    
+    def _get_title_font(self) -> ImageFont.FreeTypeFont:
+        """
+        タイトル描画用フォントを取得（matplotlibの既定フォント、12pt）
+        
+        Returns:
+            フォント
+        """
+        if self._title_font is None:
+            self._title_font = ImageFont.truetype(
+                findfont(FontProperties()), size=round(12 * self.dpi / 72)
+            )
+        return self._title_font
     
     def _generate_filename(self, detection_id: int, species_name: str, confidence: float) -> str:
         """
@@ -233,7 +936,7 @@ class SpectrogramGenerator:
             ファイル名
         """
         # 種名のサニタイズ（ファイル名に使用できない文字を除去）
-        safe_species = "".join(c for c in species_name if c.isalnum() or c in "ー_-")
+        safe_species = _UNSAFE_FILENAME_CHARS.sub("", species_name)
         
         return f"detection_{detection_id:03d}_{safe_species}_{confidence:.2f}.png"
     
@@ -241,7 +944,8 @@ class SpectrogramGenerator:
         self,
         audio_path: str,
         output_path: str,
-        title: str = "Audio Overview"
+        title: str = "Audio Overview",
+        fmt: Optional[str] = None
     ) -> bool:
         """
         音声ファイル全体のオーバービュー・スペクトログラムを生成
@@ -250,75 +954,84 @@ class SpectrogramGenerator:
             audio_path: 音声ファイルパス
             output_path: 出力画像ファイルパス
             title: グラフタイトル
+            fmt: 画像形式（'png', 'webp', 'jpeg'、デフォルト: output_pathの拡張子、不明ならpng）
             
         Returns:
             成功フラグ
         """
         try:
+            # 画像形式の決定（WebP・JPEGは連続階調のオーバービューで小さく速い）
+            fmt = (fmt or Path(output_path).suffix.lstrip('.') or 'png').lower()
+            save_options = _OVERVIEW_SAVE_OPTIONS.get('jpeg' if fmt == 'jpg' else fmt)
+            if save_options is None:
+                raise ValueError(f"未対応の画像形式: {fmt}")
+            
             # 音声ファイル読み込み（ダウンサンプリングで高速化）
-            y, sr = librosa.load(audio_path, sr=22050, mono=True)
+            y, sr = self._load_audio(audio_path)
+            if sr != 22050:
+                y = librosa.resample(y, orig_sr=sr, target_sr=22050, res_type='soxr_hq')
+                sr = 22050
             
-            # 短時間フーリエ変換
-            stft = librosa.stft(y, hop_length=1024, n_fft=2048)
-            stft_db = librosa.amplitude_to_db(np.abs(stft), ref=np.max)
+            # 短時間フーリエ変換（長い音声は画像の横幅程度のフレーム数になるようhopを広げる）
+            hop_length = max(1024, len(y) // _OVERVIEW_MAX_FRAMES)
+            n_fft = min(4096, hop_length * 2)
+            stft = librosa.stft(y, hop_length=hop_length, n_fft=n_fft)
+            
+            # パワーに変換してdB化（amplitude_to_dbの内部での再度の絶対値計算・配列確保を避ける）
+            power = np.abs(stft)
+            np.square(power, out=power)
+            stft_db = librosa.power_to_db(power, ref=np.max)
             
             # プロット作成（横長のオーバービュー）
-            plt.figure(figsize=(16, 6), dpi=80)
+            fig, ax = self._get_axes('overview', (16, 6))
             
-            try:
-                librosa.display.specshow(
-                    stft_db,
-                    sr=sr,
-                    x_axis='time',
-                    y_axis='hz',
-                    cmap='viridis'  # 元の色合いに戻す
-                )
-            except AttributeError:
-                # 代替処理
-                hop_length = 1024
-                time_frames = librosa.frames_to_time(
-                    np.arange(stft_db.shape[1]), 
-                    sr=sr, 
-                    hop_length=hop_length
-                )
-                freqs = librosa.fft_frequencies(sr=sr, n_fft=2048)
+            key = (sr, hop_length, stft_db.shape)
+            if self._overview_plot is not None and self._overview_plot[0] == key:
+                # 同じ長さの音声は軸・目盛りが同じため画素データとタイトルのみ更新
+                _, artist, title_text = self._overview_plot
+                artist.set_array(stft_db)
+                artist.set_clim(stft_db.min(), stft_db.max())
+                title_text.set_text(title)
+            else:
+                ax.clear()
+                self._overview_plot = None
                 
-                plt.imshow(
+                # imshowで1枚の画像として描画（specshowのQuadMeshはセル毎の描画で遅い）
+                # セルの中心がフレーム時刻・FFTビンの周波数になるよう半セル分広げる
+                half_frame = hop_length / sr / 2
+                freqs = self._get_axis_frequencies('fft', sr, n_fft)
+                half_bin = (freqs[1] - freqs[0]) / 2
+                
+                artist = ax.imshow(
                     stft_db,
                     aspect='auto',
                     origin='lower',
                     cmap='viridis',  # 元の色合いに戻す
-                    extent=[time_frames[0], time_frames[-1], 
-                           freqs[0], freqs[-1]]
+                    interpolation='nearest',
+                    extent=[-half_frame, stft_db.shape[1] * hop_length / sr - half_frame,
+                           freqs[0] - half_bin, freqs[-1] + half_bin]
                 )
-                plt.xlabel('Time (s)', fontsize=12)
-                plt.ylabel('Frequency (Hz)', fontsize=12)
-            
-            # カラーバーを削除（コメントアウト）
-            # plt.colorbar(format='%+2.0f dB')
-            plt.title(title, fontsize=14, pad=15)
-            
-            if hasattr(librosa, 'display'):
-                plt.xlabel('Time (s)', fontsize=12)
-                plt.ylabel('Frequency (Hz)', fontsize=12)
-            
-            plt.tight_layout()
-            
-            # 保存
-            plt.savefig(
-                output_path,
-                format='png',
-                bbox_inches='tight',
-                facecolor='white',
-                dpi=80
-            )
+                
+                # カラーバーを削除（コメントアウト）
+                # fig.colorbar(artist, ax=ax, format='%+2.0f dB')
+                title_text = ax.set_title(title, fontsize=14, pad=15)
+                ax.set_xlabel('Time (s)', fontsize=12)
+                ax.set_ylabel('Frequency (Hz)', fontsize=12)
+                
+                fig.tight_layout()
+                self._overview_plot = (key, artist, title_text)
             
-            plt.close()
+            # 描画結果をそのまま保存（bbox_inches='tight'の再描画を避ける）
+            fig.canvas.draw()
+            image = Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[:, :, :3])
+            image.save(str(output_path), **save_options)
             
             logger.info(f"オーバービュー・スペクトログラム生成完了: {output_path}")
             return True
             
         except Exception as e:
             logger.error(f"オーバービュー・スペクトログラム生成エラー: {e}")
-            plt.close('all')
+            # 再利用するプロットを破棄
+            self._overview_plot = None
+            self._get_axes('overview', (16, 6))[1].clear()
             return False
@@ -4,13 +4,166 @@ BirdNet Simple Database Manager
 """
 
 import sqlite3
-import pandas as pd
+import csv
+import itertools
+import threading
+import weakref
+import functools
+import importlib.util
 from pathlib import Path
 from datetime import datetime
 import os
 import re
 from typing import Dict, List, Optional
 
+# PyArrowがある場合はマルチスレッドのCSVリーダーを使用（オプション）
+# pandasと同様にCSVの読み込み時まで読み込まないよう、有無の確認のみ行う
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# CSVインポート時に1文で挿入する最大行数
+_INSERT_ROWS_PER_STATEMENT = 500
+
+# CSVインポートで挿入するカラム
+_INSERT_COLUMNS = (
+    'session_name', 'model_name', 'model_type', 'filename', 'file_path',
+    'start_time_seconds', 'end_time_seconds', 'scientific_name', 'common_name', 'confidence',
+    'location', 'created_at'
+)
+
+# 大きなCSVは分割して読み込み、メモリ使用量をチャンクの行数分に抑える
+# （小さなCSVはPyArrowで一括読み込みする方が速いため、サイズで切り替える）
+_CSV_CHUNK_ROWS = 10_000
+_CSV_STREAM_MIN_BYTES = 64 * 1024 * 1024
+
+# CSV読み込み時のカラム型（種名は同じ値の繰り返しが多いためcategoryで読み込む）
+# 時刻・信頼度はSQLiteのREALが倍精度のため、値を変えないようfloat64のまま扱う
+_CSV_DTYPES = {
+    'Common Name': 'category',
+    'Species Code': 'category',
+    'Common name': 'category',
+    'Scientific name': 'category'
+}
+
+# データベーススキーマのバージョン（PRAGMA user_version、スキーマ変更時に上げる）
+_SCHEMA_VERSION = 5
+
+# 集計テーブルに影響するbird_detectionsのカラム（更新時にトリガーでセッションを再集計対象にする）
+_SUMMARY_SOURCE_COLUMNS = (
+    'session_name', 'model_name', 'model_type', 'location', 'filename',
+    'scientific_name', 'common_name', 'confidence', 'created_at'
+)
+
+# 再集計対象のセッションに絞り込む条件
+_DIRTY_SESSIONS_FILTER = "WHERE session_name IN (SELECT session_name FROM summary_dirty_sessions)"
+
+# 集計テーブル（作成文と、bird_detectionsから集計する文。{where}に対象セッションの条件が入る）
+# インポート・削除時にセッション単位で更新し、一覧・統計取得時に全件を集計しない
+_SUMMARY_TABLES = {
+    'session_summary': (
+        """
+            CREATE TABLE IF NOT EXISTS session_summary (
+                session_name TEXT PRIMARY KEY,
+                model_name TEXT,
+                model_type TEXT,
+                location TEXT,
+                detection_count INTEGER NOT NULL DEFAULT 0,
+                file_count INTEGER NOT NULL DEFAULT 0,
+                sum_confidence REAL NOT NULL DEFAULT 0,
+                first_created TEXT,
+                last_created TEXT
+            )
+        """,
+        """
+            INSERT INTO session_summary (
+                session_name, model_name, model_type, location,
+                detection_count, file_count, sum_confidence, first_created, last_created
+            )
+            SELECT 
+                session_name,
+                model_name,
+                model_type,
+                location,
+                COUNT(*),
+                COUNT(DISTINCT filename),
+                TOTAL(confidence),
+                MIN(created_at),
+                MAX(created_at)
+            FROM bird_detections
+            {where}
+            GROUP BY session_name
+        """
+    ),
+    'session_files': (
+        """
+            CREATE TABLE IF NOT EXISTS session_files (
+                session_name TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                PRIMARY KEY (session_name, filename)
+            ) WITHOUT ROWID
+        """,
+        """
+            INSERT INTO session_files (session_name, filename)
+            SELECT DISTINCT session_name, filename FROM bird_detections
+            {where}
+        """
+    ),
+    # 同じセッション・種の行はインポート毎に追加され、集計時にまとめる
+    'species_summary': (
+        """
+            CREATE TABLE IF NOT EXISTS species_summary (
+                session_name TEXT NOT NULL,
+                scientific_name TEXT,
+                common_name TEXT,
+                detection_count INTEGER NOT NULL,
+                sum_confidence REAL NOT NULL,
+                min_confidence REAL,
+                max_confidence REAL
+            )
+        """,
+        """
+            INSERT INTO species_summary (
+                session_name, scientific_name, common_name,
+                detection_count, sum_confidence, min_confidence, max_confidence
+            )
+            SELECT 
+                session_name,
+                scientific_name,
+                common_name,
+                COUNT(*),
+                TOTAL(confidence),
+                MIN(confidence),
+                MAX(confidence)
+            FROM bird_detections
+            {where}
+            GROUP BY session_name, scientific_name, common_name
+        """
+    )
+}
+
+# セッション名のパターン: 場所_種名_日付
+_SESSION_NAME_PATTERN = re.compile(r'^(.+?)_(.+?)_(.+)$')
+
+# 元の音声ファイルとして探す拡張子（優先順）
+_AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.m4a', '.ogg')
+
+
+def _close_connection(conn: sqlite3.Connection):
+    """共有データベース接続を閉じる（インスタンスの破棄時・終了時にもweakref.finalizeから呼ばれる）"""
+    # 接続中に蓄積したクエリの情報を元に統計情報を更新してから閉じる
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    conn.close()
+
+
+@functools.lru_cache(maxsize=1)
+def _list_audio_folder(audio_folder: str, mtime_ns: int) -> frozenset:
+    """音声フォルダ内のファイル名一覧（フォルダの更新時刻が変わるまでキャッシュ）"""
+    with os.scandir(audio_folder) as entries:
+        return frozenset(entry.name for entry in entries)
+
+
 class BirdNetSimpleDB:
     """シンプルな1テーブル構造のBirdNetデータベース"""
     
@@ -23,19 +176,33 @@ class BirdNetSimpleDB:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # 共有データベース接続（Streamlitの複数スレッドから使うためロックで保護）
+        self._conn = None
+        self._conn_finalizer = None
+        self._conn_lock = threading.Lock()
+        
         self._initialize_database()
     
     def _initialize_database(self):
         """データベースの初期化とマイグレーション"""
         schema_path = self.db_path.parent / "schema_simple.sql"
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._conn_lock:
+            conn = self._get_connection()
+            
+            # スキーマが最新の場合はマイグレーション・作成処理を省略
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= _SCHEMA_VERSION:
+                return
+            
             # 既存テーブルのカラムを確認し、品質評価カラムがない場合は追加
             self._migrate_quality_columns(conn)
             
             if schema_path.exists():
                 with open(schema_path, 'r', encoding='utf-8') as f:
                     conn.executescript(f.read())
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_session_file_time ON bird_detections(session_name, filename, start_time_seconds)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_common_name ON bird_detections(common_name)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON bird_detections(created_at)")
             else:
                 # スキーマファイルがない場合は直接作成（品質評価カラム付き）
                 conn.executescript("""
@@ -60,11 +227,17 @@ class BirdNetSimpleDB:
                         review_notes TEXT
                     );
                     
-                    CREATE INDEX IF NOT EXISTS idx_session_name ON bird_detections(session_name);
+                    -- セッション内の検出一覧（ファイル・開始時刻順）をソートなしで取得
+                    CREATE INDEX IF NOT EXISTS idx_session_file_time ON bird_detections(session_name, filename, start_time_seconds);
+                    DROP INDEX IF EXISTS idx_session_name;
                     CREATE INDEX IF NOT EXISTS idx_species ON bird_detections(scientific_name, common_name);
                     CREATE INDEX IF NOT EXISTS idx_confidence ON bird_detections(confidence);
                     CREATE INDEX IF NOT EXISTS idx_quality_status ON bird_detections(quality_status);
                     
+                    -- ビューワーの種名一覧・種名絞り込みと新しい順の一覧表示用
+                    CREATE INDEX IF NOT EXISTS idx_common_name ON bird_detections(common_name);
+                    CREATE INDEX IF NOT EXISTS idx_created_at ON bird_detections(created_at);
+                    
                     -- 評価待ちレコード用ビュー
                     CREATE VIEW IF NOT EXISTS pending_review AS
                     SELECT * FROM bird_detections WHERE quality_status = 'pending' ORDER BY created_at ASC;
@@ -73,6 +246,141 @@ class BirdNetSimpleDB:
                     CREATE VIEW IF NOT EXISTS approved_detections AS
                     SELECT * FROM bird_detections WHERE quality_status = 'approved' ORDER BY reviewed_at DESC;
                 """)
+            
+            self._normalize_timestamps(conn)
+            summary_ready = self._ensure_summary_tables(conn)
+            self._ensure_planner_statistics(conn)
+            
+            # 集計テーブルの作成に失敗した場合は次回起動時に再試行
+            if summary_ready:
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+    
+    def _ensure_planner_statistics(self, conn):
+        """クエリプランナーの統計情報（sqlite_stat1）がない場合に一度だけ作成"""
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'")
+            if cursor.fetchone() is not None:
+                cursor.execute("SELECT 1 FROM sqlite_stat1 WHERE tbl = 'bird_detections' LIMIT 1")
+                if cursor.fetchone() is not None:
+                    return  # 以降はインポート後のPRAGMA optimizeで更新
+            
+            cursor.execute("ANALYZE bird_detections")
+        except sqlite3.Error as e:
+            print(f"[WARNING] 統計情報作成エラー: {e}")
+    
+    def _ensure_summary_tables(self, conn) -> bool:
+        """集計テーブル（session_summary・session_files・species_summary）と再集計用トリガーを作成"""
+        cursor = conn.cursor()
+        update_columns = ', '.join(_SUMMARY_SOURCE_COLUMNS)
+        
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            existing_tables = set()
+            for table_name, (create_sql, backfill_sql) in _SUMMARY_TABLES.items():
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+                exists = cursor.fetchone() is not None
+                
+                cursor.execute(create_sql)
+                
+                # 新規作成時は既存データから集計を初期化
+                if exists:
+                    existing_tables.add(table_name)
+                else:
+                    cursor.execute(backfill_sql.format(where=''))
+            
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_species_summary_session ON species_summary(session_name)")
+            
+            # 他の書き込み元（外部ツール・直接のSQL）による変更もトリガーでセッション単位に記録し、
+            # 一覧・統計取得時に該当セッションのみ集計し直す
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='summary_dirty_sessions'")
+            dirty_table_exists = cursor.fetchone() is not None
+            
+            for statement in (
+                """
+                    CREATE TABLE IF NOT EXISTS summary_dirty_sessions (
+                        session_name TEXT PRIMARY KEY
+                    ) WITHOUT ROWID
+                """,
+                """
+                    CREATE TRIGGER IF NOT EXISTS trg_summary_dirty_insert 
+                    AFTER INSERT ON bird_detections
+                    BEGIN
+                        INSERT OR IGNORE INTO summary_dirty_sessions (session_name) VALUES (NEW.session_name);
+                    END
+                """,
+                """
+                    CREATE TRIGGER IF NOT EXISTS trg_summary_dirty_delete 
+                    AFTER DELETE ON bird_detections
+                    BEGIN
+                        INSERT OR IGNORE INTO summary_dirty_sessions (session_name) VALUES (OLD.session_name);
+                    END
+                """,
+                f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_summary_dirty_update 
+                    AFTER UPDATE OF {update_columns} ON bird_detections
+                    BEGIN
+                        INSERT OR IGNORE INTO summary_dirty_sessions (session_name) 
+                        VALUES (OLD.session_name), (NEW.session_name);
+                    END
+                """,
+            ):
+                cursor.execute(statement)
+            
+            # トリガー導入前の集計には他の書き込み元の変更が含まれないため、全セッションを再集計対象にする
+            if not dirty_table_exists and existing_tables:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO summary_dirty_sessions (session_name)
+                    SELECT DISTINCT session_name FROM bird_detections
+                    UNION
+                    SELECT session_name FROM session_summary
+                """)
+            
+            cursor.execute("COMMIT")
+            return True
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            print(f"[WARNING] 集計テーブル作成エラー: {e}")
+            return False
+    
+    def _refresh_summaries(self, conn):
+        """再集計対象のセッションの集計テーブルを作り直す（呼び出し側で_conn_lockを保持すること）"""
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT 1 FROM summary_dirty_sessions LIMIT 1")
+            if cursor.fetchone() is None:
+                return
+            
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for table_name, (_, backfill_sql) in _SUMMARY_TABLES.items():
+                    cursor.execute(f"DELETE FROM {table_name} {_DIRTY_SESSIONS_FILTER}")
+                    cursor.execute(backfill_sql.format(where=_DIRTY_SESSIONS_FILTER))
+                cursor.execute("DELETE FROM summary_dirty_sessions")
+                cursor.execute("COMMIT")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            print(f"[WARNING] 集計テーブル更新エラー: {e}")
+    
+    def _normalize_timestamps(self, conn):
+        """DEFAULT CURRENT_TIMESTAMP（UTC）で設定された作成日時・評価日時をローカル時刻のISO形式に揃える"""
+        # 日時順の並び替えを他の行（datetime.now().isoformat()）と一致させる
+        # 集計テーブルの作成日時は更新トリガー（または作成時の集計）で再集計される
+        for column in ('created_at', 'reviewed_at'):
+            try:
+                conn.execute(f"""
+                    UPDATE bird_detections 
+                    SET {column} = strftime('%Y-%m-%dT%H:%M:%S', {column}, 'localtime')
+                    WHERE {column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+                """)
+            except sqlite3.Error as e:
+                print(f"[WARNING] 日時の変換エラー {column}: {e}")
     
     def _migrate_quality_columns(self, conn):
         """品質評価カラムのマイグレーション"""
@@ -114,34 +422,40 @@ class BirdNetSimpleDB:
     
     def import_csv_results(self, csv_path: str, session_name: str, model_name: str = "BirdNET", model_type: str = "default") -> Dict:
         """CSVファイルから検出結果をインポート"""
+        # pandasはCSVを扱う時のみ必要なため、ここで読み込む（起動時間の短縮）
+        import pandas as pd
+        
         csv_path = Path(csv_path)
         
         if not csv_path.exists():
             return {'success': False, 'error': f'CSV file not found: {csv_path}'}
         
         try:
-            # CSVファイルを読み込み
-            df = pd.read_csv(csv_path)
+            # ヘッダーのみ読み込んでCSVフォーマットの種類を判定
+            header = frozenset(pd.read_csv(csv_path, nrows=0).columns)
             
-            # CSVフォーマットの種類を判定
-            if 'Begin Path' in df.columns:  # table形式
+            if 'Begin Path' in header:  # table形式
                 required_columns = ['Begin Time (s)', 'End Time (s)', 'Common Name', 'Species Code', 'Confidence', 'Begin Path']
-                time_start_col = 'Begin Time (s)'
-                time_end_col = 'End Time (s)'
-                common_name_col = 'Common Name'
-                scientific_name_col = 'Species Code'  # table形式では科学名がない場合がある
-                confidence_col = 'Confidence'
-                file_path_col = 'Begin Path'
+                csv_columns = {
+                    'start': 'Begin Time (s)',
+                    'end': 'End Time (s)',
+                    'common_name': 'Common Name',
+                    'scientific_name': 'Species Code',  # table形式では科学名がない場合がある
+                    'confidence': 'Confidence',
+                    'file_path': 'Begin Path'
+                }
             else:  # csv形式
                 required_columns = ['Start (s)', 'End (s)', 'Scientific name', 'Common name', 'Confidence']
-                time_start_col = 'Start (s)'
-                time_end_col = 'End (s)'
-                common_name_col = 'Common name'
-                scientific_name_col = 'Scientific name'
-                confidence_col = 'Confidence'
-                file_path_col = None
+                csv_columns = {
+                    'start': 'Start (s)',
+                    'end': 'End (s)',
+                    'common_name': 'Common name',
+                    'scientific_name': 'Scientific name',
+                    'confidence': 'Confidence',
+                    'file_path': None
+                }
             
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in required_columns if col not in header]
             
             if missing_columns:
                 return {'success': False, 'error': f'Missing columns: {missing_columns}'}
@@ -158,87 +472,226 @@ class BirdNetSimpleDB:
             project_root = Path(__file__).parent.parent.parent
             audio_folder = project_root / "database" / "audio"
             
-            # 音声ファイルの拡張子を推定
-            possible_extensions = ['.wav', '.mp3', '.flac', '.m4a', '.ogg']
-            original_audio_path = None
+            # 音声ファイルの拡張子を推定（フォルダ一覧から拡張子毎のstatなしで判定）
+            try:
+                audio_files = _list_audio_folder(str(audio_folder), audio_folder.stat().st_mtime_ns)
+            except OSError:
+                audio_files = frozenset()
             
-            for ext in possible_extensions:
-                potential_path = audio_folder / (original_filename + ext)
-                if potential_path.exists():
-                    original_audio_path = str(potential_path)
-                    break
+            original_audio_path = next(
+                (str(audio_folder / (original_filename + ext)) for ext in _AUDIO_EXTENSIONS
+                 if original_filename + ext in audio_files),
+                None
+            )
             
             # 見つからない場合は推定パスを使用
             if original_audio_path is None:
                 original_audio_path = str(audio_folder / (original_filename + '.wav'))
             
-            # データベースに挿入
-            records = []
-            for _, row in df.iterrows():
-                # 各行ごとにファイル情報を取得
-                if file_path_col and pd.notna(row[file_path_col]):
-                    # table形式の場合、Begin Path列からファイルパスを取得
-                    row_file_path = str(row[file_path_col])
-                    row_filename = Path(row_file_path).name
-                    # 拡張子を除去
-                    row_filename_stem = Path(row_file_path).stem
-                else:
-                    # csv形式の場合、推定した情報を使用
-                    row_file_path = original_audio_path
-                    row_filename = original_filename
-                    row_filename_stem = original_filename
-                
-                record = {
-                    'session_name': session_name,
-                    'model_name': model_name,
-                    'model_type': model_type,
-                    'filename': row_filename_stem,  # 拡張子なしのファイル名
-                    'file_path': row_file_path,  # 完全なファイルパス
-                    'start_time_seconds': row[time_start_col],
-                    'end_time_seconds': row[time_end_col],
-                    'scientific_name': row[scientific_name_col] if pd.notna(row[scientific_name_col]) else None,
-                    'common_name': row[common_name_col] if pd.notna(row[common_name_col]) else None,
-                    'confidence': row[confidence_col],
-                    'location': location,
-                    'created_at': datetime.now().isoformat()
-                }
-                records.append(record)
+            # チャンク毎に挿入し、集計はインポート全体で合算（1トランザクションで実行）
+            detection_count = 0
+            sum_confidence = 0.0
+            filenames = set()
+            species_parts = []
+            created_at = datetime.now().isoformat()
             
-            # データベースに一括挿入
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._conn_lock:
+                conn = self._get_connection()
+                rows_per_statement = self._max_insert_rows(conn, len(_INSERT_COLUMNS))
                 
-                insert_sql = """
-                    INSERT INTO bird_detections (
-                        session_name, model_name, model_type, filename, file_path,
-                        start_time_seconds, end_time_seconds, scientific_name, common_name, confidence,
-                        location, created_at
-                    ) VALUES (
-                        :session_name, :model_name, :model_type, :filename, :file_path,
-                        :start_time_seconds, :end_time_seconds, :scientific_name, :common_name, :confidence,
-                        :location, :created_at
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # インポート前の集計が最新の場合、インポート分の加算後も最新のまま（トリガーの記録を取り消す）
+                    was_dirty = conn.execute(
+                        "SELECT 1 FROM summary_dirty_sessions WHERE session_name = ?", (session_name,)
+                    ).fetchone() is not None
+                    
+                    for df in self._read_csv_chunks(csv_path, required_columns):
+                        records_df = self._build_records(
+                            df, csv_columns, session_name, model_name, model_type, location,
+                            original_filename, original_audio_path, created_at
+                        )
+                        
+                        records = list(records_df.itertuples(index=False, name=None))
+                        for start in range(0, len(records), rows_per_statement):
+                            chunk = records[start:start + rows_per_statement]
+                            conn.execute(
+                                self._build_insert_sql(len(chunk)),
+                                list(itertools.chain.from_iterable(chunk))
+                            )
+                        
+                        detection_count += len(records_df)
+                        sum_confidence += float(records_df['confidence'].sum())
+                        filenames.update(records_df['filename'].unique())
+                        species_parts.append(
+                            records_df.groupby(['scientific_name', 'common_name'], dropna=False, sort=False)['confidence']
+                            .agg(count='size', total='sum', low='min', high='max')
+                        )
+                    
+                    # 集計テーブルを更新
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO session_files (session_name, filename) VALUES (?, ?)",
+                        ((session_name, filename) for filename in filenames)
                     )
-                """
+                    
+                    if species_parts:
+                        species = pd.concat(species_parts).groupby(level=[0, 1], dropna=False, sort=False).agg(
+                            {'count': 'sum', 'total': 'sum', 'low': 'min', 'high': 'max'}
+                        ).reset_index()
+                        conn.executemany("""
+                            INSERT INTO species_summary (
+                                session_name, scientific_name, common_name,
+                                detection_count, sum_confidence, min_confidence, max_confidence
+                            )
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """, (
+                            (session_name, None if pd.isna(scientific_name) else scientific_name,
+                             None if pd.isna(common_name) else common_name, count, total, low, high)
+                            for scientific_name, common_name, count, total, low, high
+                            in species.itertuples(index=False, name=None)
+                        ))
+                    
+                    conn.execute("""
+                        INSERT INTO session_summary (
+                            session_name, model_name, model_type, location,
+                            detection_count, file_count, sum_confidence, first_created, last_created
+                        )
+                        VALUES (?, ?, ?, ?, ?, (SELECT COUNT(*) FROM session_files WHERE session_name = ?), ?, ?, ?)
+                        ON CONFLICT(session_name) DO UPDATE SET
+                            model_name = excluded.model_name,
+                            model_type = excluded.model_type,
+                            location = excluded.location,
+                            detection_count = detection_count + excluded.detection_count,
+                            file_count = excluded.file_count,
+                            sum_confidence = sum_confidence + excluded.sum_confidence,
+                            last_created = MAX(last_created, excluded.last_created)
+                    """, (
+                        session_name, model_name, model_type, location,
+                        detection_count, session_name, sum_confidence, created_at, created_at
+                    ))
+                    
+                    if not was_dirty:
+                        conn.execute("DELETE FROM summary_dirty_sessions WHERE session_name = ?", (session_name,))
+                    
+                    conn.execute("COMMIT")
+                except Exception:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
                 
-                cursor.executemany(insert_sql, records)
-                conn.commit()
+                # 大量挿入後にクエリプランナーの統計情報を更新（必要なテーブルのみ解析される）
+                conn.execute("PRAGMA optimize")
             
             return {
                 'success': True,
-                'detections_imported': len(records),
+                'detections_imported': detection_count,
                 'session_name': session_name,
                 'csv_filename': csv_path.name,
-                'audio_files_found': len(set(record['filename'] for record in records))
+                'audio_files_found': len(filenames)
             }
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def _read_csv_chunks(self, csv_path: Path, usecols: List[str]):
+        """CSVファイルの必要なカラムのみをDataFrameのチャンク毎に読み込む"""
+        import pandas as pd
+        
+        if PYARROW_AVAILABLE and csv_path.stat().st_size < _CSV_STREAM_MIN_BYTES:
+            yield pd.read_csv(csv_path, usecols=usecols, dtype=_CSV_DTYPES, engine='pyarrow')
+            return
+        
+        # PyArrowエンジンはchunksize非対応のため、分割読み込みはCエンジンで行う
+        with pd.read_csv(csv_path, usecols=usecols, dtype=_CSV_DTYPES, chunksize=_CSV_CHUNK_ROWS) as reader:
+            yield from reader
+    
+    def _build_records(self, df, csv_columns: Dict, session_name: str, model_name: str, model_type: str,
+                       location: Optional[str], original_filename: str, original_audio_path: str,
+                       created_at: str):
+        """CSVのチャンクから挿入レコードのDataFrameを列単位で作成（行毎のループを避ける）"""
+        import pandas as pd
+        
+        file_path_col = csv_columns['file_path']
+        if file_path_col:
+            # table形式の場合、Begin Path列からファイルパスを取得（空の行は推定した情報を使用）
+            has_path = df[file_path_col].notna()
+            file_paths = df[file_path_col].where(has_path, original_audio_path).astype(str)
+            # 拡張子を除去（同じパスが多いため重複を除いて変換）
+            stems = {path: Path(path).stem for path in file_paths[has_path].unique()}
+            filenames = file_paths.map(stems).where(has_path, original_filename)
+        else:
+            # csv形式の場合、推定した情報を使用
+            file_paths = original_audio_path
+            filenames = original_filename
+        
+        scientific_names = df[csv_columns['scientific_name']]
+        common_names = df[csv_columns['common_name']]
+        
+        return pd.DataFrame({
+            'session_name': session_name,
+            'model_name': model_name,
+            'model_type': model_type,
+            'filename': filenames,  # 拡張子なしのファイル名
+            'file_path': file_paths,  # 完全なファイルパス
+            'start_time_seconds': df[csv_columns['start']],
+            'end_time_seconds': df[csv_columns['end']],
+            'scientific_name': scientific_names.astype(object).where(scientific_names.notna(), None),
+            'common_name': common_names.astype(object).where(common_names.notna(), None),
+            'confidence': df[csv_columns['confidence']],
+            'location': location,
+            'created_at': created_at
+        }, index=df.index, columns=list(_INSERT_COLUMNS))
+    
+    def _build_insert_sql(self, row_count: int) -> str:
+        """複数行VALUESのINSERT文を作成"""
+        placeholders = "(" + ", ".join(["?"] * len(_INSERT_COLUMNS)) + ")"
+        return (
+            f"INSERT INTO bird_detections ({', '.join(_INSERT_COLUMNS)}) VALUES "
+            + ", ".join([placeholders] * row_count)
+        )
+    
+    def _max_insert_rows(self, conn: sqlite3.Connection, column_count: int) -> int:
+        """1文で挿入する行数（SQLiteのバインド変数上限内、最大500行）"""
+        # SQLite 3.32.0以降の上限は32766、それより前は999
+        version = tuple(int(part) for part in conn.execute("SELECT sqlite_version()").fetchone()[0].split('.'))
+        max_variables = 32766 if version >= (3, 32, 0) else 999
+        return max(1, min(_INSERT_ROWS_PER_STATEMENT, max_variables // column_count))
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """共有データベース接続を取得（呼び出し側で_conn_lockを保持すること）"""
+        if self._conn is None:
+            # トランザクションは明示的に管理し、PRAGMAは接続作成時に一度だけ設定
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA mmap_size=268435456")
+            # BIRDNET_SQL_TRACE=1 で実行されるSQLを出力（クエリプランの調査用）
+            if os.environ.get('BIRDNET_SQL_TRACE'):
+                conn.set_trace_callback(lambda statement: print(f"[SQL] {statement}"))
+            # インスタンスを参照せずに登録し、インスタンスの破棄時・プロセス終了時に接続を閉じる
+            self._conn_finalizer = weakref.finalize(self, _close_connection, conn)
+            self._conn = conn
+        return self._conn
+    
+    def close(self):
+        """共有データベース接続を閉じる"""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn_finalizer()
+                self._conn = None
+    
+    def _fetch_dicts(self, cursor: sqlite3.Cursor) -> List[Dict]:
+        """実行済みクエリの結果をカラム名をキーとする辞書のリストで取得"""
+        # sqlite3.Rowを経由せず、カラム名と値のタプルを直接組み合わせる
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
     def _parse_session_name(self, session_name: str) -> tuple:
         """セッション名から場所、種名、日付を解析"""
         # パターン: 場所_種名_日付
-        pattern = r'^(.+?)_(.+?)_(.+)$'
-        match = re.match(pattern, session_name)
+        match = _SESSION_NAME_PATTERN.match(session_name)
         
         if match:
             location = match.group(1)
@@ -251,50 +704,35 @@ class BirdNetSimpleDB:
     
     def get_sessions(self) -> List[Dict]:
         """セッション一覧を取得"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._conn_lock:
+            conn = self._get_connection()
+            self._refresh_summaries(conn)
             cursor = conn.cursor()
             
+            # 集計テーブルから取得（セッション数分のみ読み込む）
             query = """
                 SELECT 
                     session_name,
                     model_name,
                     model_type,
                     location,
-                    COUNT(*) as detection_count,
-                    COUNT(DISTINCT filename) as file_count,
-                    MIN(created_at) as first_created,
-                    MAX(created_at) as last_created,
-                    AVG(confidence) as avg_confidence
-                FROM bird_detections
-                GROUP BY session_name, model_name, model_type, location
-                ORDER BY MAX(created_at) DESC
+                    detection_count,
+                    file_count,
+                    first_created,
+                    last_created,
+                    sum_confidence / detection_count as avg_confidence
+                FROM session_summary
+                WHERE detection_count > 0
+                ORDER BY last_created DESC
             """
             
             cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            sessions = []
-            for row in rows:
-                sessions.append({
-                    'session_name': row[0],
-                    'model_name': row[1],
-                    'model_type': row[2],
-                    'location': row[3],
-                    'detection_count': row[4],
-                    'file_count': row[5],
-                    'first_created': row[6],
-                    'last_created': row[7],
-                    'avg_confidence': row[8]
-                })
-            
-            return sessions
+            return self._fetch_dicts(cursor)
     
     def get_detections(self, session_name: str = None, limit: int = 100) -> List[Dict]:
         """検出結果を取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
+        with self._conn_lock:
+            cursor = self._get_connection().cursor()
             if session_name:
                 query = """
                     SELECT * FROM bird_detections 
@@ -311,66 +749,70 @@ class BirdNetSimpleDB:
                 """
                 cursor.execute(query, (limit,))
             
-            return [dict(row) for row in cursor.fetchall()]
+            return self._fetch_dicts(cursor)
     
     def get_statistics(self) -> Dict:
         """統計情報を取得"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._conn_lock:
+            conn = self._get_connection()
+            self._refresh_summaries(conn)
             cursor = conn.cursor()
             
-            # 基本統計
+            # セッション数・ファイル数（集計テーブルから取得）
             cursor.execute("""
                 SELECT 
-                    COUNT(DISTINCT session_name) as session_count,
-                    COUNT(DISTINCT filename) as file_count,
-                    COUNT(*) as detection_count,
-                    COUNT(DISTINCT scientific_name) as species_count,
-                    AVG(confidence) as avg_confidence,
-                    MIN(confidence) as min_confidence,
-                    MAX(confidence) as max_confidence
-                FROM bird_detections
+                    (SELECT COUNT(*) FROM session_summary WHERE detection_count > 0) as session_count,
+                    (SELECT COUNT(DISTINCT filename) FROM session_files) as file_count
             """)
             
-            stats = cursor.fetchone()
+            session_count, file_count = cursor.fetchone()
             
-            # 上位検出種
+            # 種毎の集計（全体統計と上位検出種の両方を求める）
             cursor.execute("""
                 SELECT 
                     common_name,
                     scientific_name,
-                    COUNT(*) as detection_count,
-                    AVG(confidence) as avg_confidence
-                FROM bird_detections
-                WHERE common_name IS NOT NULL
+                    SUM(detection_count) as detection_count,
+                    TOTAL(sum_confidence) as sum_confidence,
+                    MIN(min_confidence) as min_confidence,
+                    MAX(max_confidence) as max_confidence
+                FROM species_summary
                 GROUP BY scientific_name, common_name
-                ORDER BY COUNT(*) DESC
-                LIMIT 10
             """)
             
+            species_rows = cursor.fetchall()
+            
+            detection_count = sum(row[2] for row in species_rows)
+            sum_confidence = sum(row[3] for row in species_rows)
+            
+            # 上位検出種（一般名がある種のみ）
+            top_rows = sorted((row for row in species_rows if row[0] is not None), key=lambda row: row[2], reverse=True)[:10]
             top_species = []
-            for row in cursor.fetchall():
+            for row in top_rows:
                 top_species.append({
                     'common_name': row[0],
                     'scientific_name': row[1],
                     'detection_count': row[2],
-                    'avg_confidence': row[3]
+                    'avg_confidence': row[3] / row[2]
                 })
             
             return {
-                'session_count': stats[0] or 0,
-                'file_count': stats[1] or 0,
-                'detection_count': stats[2] or 0,
-                'species_count': stats[3] or 0,
-                'avg_confidence': stats[4],
-                'min_confidence': stats[5],
-                'max_confidence': stats[6],
+                'session_count': session_count or 0,
+                'file_count': file_count or 0,
+                'detection_count': detection_count,
+                'species_count': len({row[1] for row in species_rows if row[1] is not None}),
+                'avg_confidence': sum_confidence / detection_count if detection_count else None,
+                'min_confidence': min((row[4] for row in species_rows), default=None),
+                'max_confidence': max((row[5] for row in species_rows), default=None),
                 'top_species': top_species
             }
     
     def export_to_csv(self, output_path: str, session_name: str = None) -> bool:
         """検出結果をCSVにエクスポート"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conn_lock:
+                cursor = self._get_connection().cursor()
+                
                 if session_name:
                     query = """
                         SELECT 
@@ -386,7 +828,7 @@ class BirdNetSimpleDB:
                         WHERE session_name = ? 
                         ORDER BY filename, start_time_seconds
                     """
-                    df = pd.read_sql_query(query, conn, params=(session_name,))
+                    cursor.execute(query, (session_name,))
                 else:
                     query = """
                         SELECT 
@@ -401,9 +843,13 @@ class BirdNetSimpleDB:
                         FROM bird_detections 
                         ORDER BY created_at DESC
                     """
-                    df = pd.read_sql_query(query, conn)
+                    cursor.execute(query)
                 
-                df.to_csv(output_path, index=False, encoding='utf-8-sig')
+                # 結果をDataFrameに読み込まず、カーソルから1行ずつCSVに書き出す
+                with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.writer(f, lineterminator=os.linesep)
+                    writer.writerow([description[0] for description in cursor.description])
+                    writer.writerows(cursor)
                 return True
                 
         except Exception as e:
@@ -411,26 +857,37 @@ class BirdNetSimpleDB:
             return False
     
     def delete_session(self, session_name: str) -> bool:
-        """セッションを削除"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+        """セッションを削除（存在しない場合はFalse、SQLエラーは呼び出し側に送出）"""
+        with self._conn_lock:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            # 集計テーブルは他の書き込み元のインポートを含まないため、存在確認は検出テーブルで行う
+            cursor.execute("SELECT 1 FROM bird_detections WHERE session_name = ? LIMIT 1", (session_name,))
+            if cursor.fetchone() is None:
+                return False
+            
+            cursor.execute("BEGIN")
+            try:
                 cursor.execute("DELETE FROM bird_detections WHERE session_name = ?", (session_name,))
                 deleted_count = cursor.rowcount
-                conn.commit()
-                return deleted_count > 0
-        except Exception as e:
-            print(f"Delete session error: {e}")
-            return False
+                # 全件削除後は集計も空になるため、トリガーによる再集計の記録も取り消す
+                for summary_table in ('session_summary', 'session_files', 'species_summary', 'summary_dirty_sessions'):
+                    cursor.execute(f"DELETE FROM {summary_table} WHERE session_name = ?", (session_name,))
+                cursor.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise
+            
+            return deleted_count > 0
     
     # ========== 品質評価関連メソッド ==========
     
     def get_pending_reviews(self, limit: int = 50) -> List[Dict]:
         """評価待ちのレコードを取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
+        with self._conn_lock:
+            cursor = self._get_connection().cursor()
             query = """
                 SELECT * FROM bird_detections 
                 WHERE quality_status = 'pending' 
@@ -438,7 +895,7 @@ class BirdNetSimpleDB:
                 LIMIT ?
             """
             cursor.execute(query, (limit,))
-            return [dict(row) for row in cursor.fetchall()]
+            return self._fetch_dicts(cursor)
     
     def update_quality_status(self, detection_id: int, status: str, notes: str = None) -> bool:
         """品質評価ステータスを更新"""
@@ -446,8 +903,8 @@ class BirdNetSimpleDB:
             return False
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._conn_lock:
+                cursor = self._get_connection().cursor()
                 
                 cursor.execute("""
                     UPDATE bird_detections 
@@ -455,7 +912,6 @@ class BirdNetSimpleDB:
                     WHERE id = ?
                 """, (status, datetime.now().isoformat(), notes, detection_id))
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"Quality status update error: {e}")
@@ -463,8 +919,8 @@ class BirdNetSimpleDB:
     
     def get_quality_statistics(self) -> Dict:
         """品質評価統計を取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._conn_lock:
+            cursor = self._get_connection().cursor()
             
             cursor.execute("""
                 SELECT 
@@ -12,18 +12,11 @@ import sqlite3
 
 # パス設定
 sys.path.append(str(Path(__file__).parent.parent))
-from config import DatabaseConfig, AppConfig
+from config import DatabaseConfig
+from utils.file_cache import load_bytes
 
-# 親ディレクトリのlibをパスに追加
+# 生成ファイルの基準パス
 project_root = Path(__file__).parent.parent.parent
-lib_path = project_root / "lib"
-sys.path.append(str(lib_path))
-
-try:
-    from db.database import BirdNetSimpleDB
-except ImportError as e:
-    st.error(f"データベースモジュールの読み込みに失敗: {e}")
-    st.stop()
 
 # ページ設定
 st.set_page_config(
@@ -32,8 +25,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# シンプルなCSS
-st.markdown("""
+# シンプルなCSS（モジュール読み込み時に1回だけ生成）
+_CSS = """
 <style>
 .compact-card {
     background: white;
@@ -57,98 +50,153 @@ st.markdown("""
     margin: 0 auto;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# 処理情報の取得クエリ（同じ文字列を渡し、sqlite3のステートメントキャッシュを再利用）
+_SQL_GET_PROCESSING_INFO = """
+    SELECT 
+        audio_segment_path,
+        spectrogram_path,
+        session_name
+    FROM bird_detections 
+    WHERE id = ?
+"""
+
+# 部分再実行（古いStreamlitにはないため、その場合は通常の関数として実行）
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
 
+@st.cache_resource
+def _get_connection():
+    """読み取り専用の共有データベース接続を取得（再実行間で再利用）"""
+    conn = sqlite3.connect(DatabaseConfig.get_database_path(), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA cache_size=-20000")  # 約20MBのページキャッシュ
+    return conn
+
+@st.cache_data(ttl=600, show_spinner=False)
 def get_processing_info(detection_id):
-    """データベースから処理情報を取得"""
+    """データベースから処理情報を取得（再実行時はキャッシュを使用）
+    
+    例外はキャッシュされないよう、呼び出し側でエラー表示する
+    """
+    # 音声セグメントとスペクトログラムのパス情報を取得
+    result = _get_connection().execute(_SQL_GET_PROCESSING_INFO, (detection_id,)).fetchone()
+    
+    if result:
+        return {
+            'audio_segment_path': result[0],
+            'spectrogram_path': result[1],
+            'session_name': result[2]
+        }
+    return None
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _index_dir(dir_str, suffix, mtime_ns):
+    """ディレクトリ内のdetection_XXX_*ファイルの索引を作成（detection_XXX -> パス）
+    
+    キャッシュキーにディレクトリの更新時刻を含め、ファイルの追加・削除時は作り直す
+    """
+    index = {}
+    with os.scandir(dir_str) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith("detection_") and name.endswith(suffix)):
+                continue
+            # detection_{id}_ までをキーとする（globの detection_{id:03d}_*{suffix} と同じ対象）
+            separator = name.find("_", len("detection_"))
+            if separator != -1 and separator + 1 <= len(name) - len(suffix):
+                index.setdefault(name[:separator + 1], entry.path)
+    return index
+
+def _resolve(database_root, db_relpath, fallback_dir, suffix, key):
+    """ファイルの実際のパスを解決（存在確認はファイル毎に最大1回のstat）
+    
+    データベースのパスを優先し、ない場合はディレクトリの索引から推測する。
+    索引で見つかったファイルはscandirで存在を確認済みのため再確認しない
+    """
+    if db_relpath:
+        path = database_root / db_relpath
+        try:
+            path.stat()
+            return path
+        except OSError:
+            pass
+    
     try:
-        db_path = DatabaseConfig.get_database_path()
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            
-            # 音声セグメントとスペクトログラムのパス情報を取得
-            cursor.execute("""
-                SELECT 
-                    audio_segment_path,
-                    spectrogram_path
-                FROM bird_detections 
-                WHERE id = ?
-            """, (detection_id,))
-            
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'audio_segment_path': result[0],
-                    'spectrogram_path': result[1]
-                }
-            return None
-    except Exception as e:
-        st.error(f"処理情報取得エラー: {e}")
-        return None
+        mtime_ns = os.stat(fallback_dir).st_mtime_ns
+    except OSError:
+        return None  # ディレクトリがない場合
+    
+    indexed_path = _index_dir(str(fallback_dir), suffix, mtime_ns).get(key)
+    return Path(indexed_path) if indexed_path else None
 
-def get_file_paths(detection_id, session_name):
-    """生成ファイルの実際のパスを構築"""
+def get_file_paths(detection_id):
+    """生成ファイルの実際のパスを構築（セッション名もデータベースから取得）"""
     database_root = project_root / "database"
     
-    # データベースから処理情報を取得
+    # データベースから処理情報を取得（sqlite3.Errorは呼び出し側で表示）
     processing_info = get_processing_info(detection_id)
     
+    # detection_ID形式のファイル名（データベースにパスがない場合の推測用）
+    key = f"detection_{detection_id:03d}_"
+    session_name = (processing_info and processing_info['session_name']) or 'default'
+    
+    audio_segment = _resolve(
+        database_root, processing_info and processing_info['audio_segment_path'],
+        database_root / "audio_segments" / session_name, ".wav", key
+    )
+    spectrogram = _resolve(
+        database_root, processing_info and processing_info['spectrogram_path'],
+        database_root / "spectrograms" / session_name, ".png", key
+    )
+    
     file_paths = {
-        'audio_segment': None,
-        'spectrogram': None,
-        'audio_exists': False,
-        'spectrogram_exists': False,
+        'audio_segment': audio_segment,
+        'spectrogram': spectrogram,
+        'audio_exists': audio_segment is not None,
+        'spectrogram_exists': spectrogram is not None,
         'processing_info': processing_info
     }
     
-    if processing_info and processing_info['audio_segment_path']:
-        # データベースのパス情報を使用
-        audio_path = database_root / processing_info['audio_segment_path']
-        if audio_path.exists():
-            file_paths['audio_segment'] = audio_path
-            file_paths['audio_exists'] = True
-    
-    if processing_info and processing_info['spectrogram_path']:
-        # データベースのパス情報を使用
-        spectrogram_path = database_root / processing_info['spectrogram_path']
-        if spectrogram_path.exists():
-            file_paths['spectrogram'] = spectrogram_path
-            file_paths['spectrogram_exists'] = True
-    
-    # パスが見つからない場合は推測で検索
-    if not file_paths['audio_exists'] or not file_paths['spectrogram_exists']:
-        audio_segments_dir = database_root / "audio_segments" / session_name
-        spectrograms_dir = database_root / "spectrograms" / session_name
-        
-        # detection_ID形式のファイルを検索
-        if audio_segments_dir.exists():
-            for audio_file in audio_segments_dir.glob(f"detection_{detection_id:03d}_*.wav"):
-                file_paths['audio_segment'] = audio_file
-                file_paths['audio_exists'] = True
-                break
-        
-        if spectrograms_dir.exists():
-            for spectrogram_file in spectrograms_dir.glob(f"detection_{detection_id:03d}_*.png"):
-                file_paths['spectrogram'] = spectrogram_file
-                file_paths['spectrogram_exists'] = True
-                break
-    
     return file_paths
 
+def _discard_file_paths():
+    """保持したファイルパスと処理情報のキャッシュを破棄（次回の再実行でファイルの存在を確認し直す）"""
+    st.session_state.pop('_file_paths', None)
+    get_processing_info.clear()
+
+@_fragment
 def show_main_content(record, file_paths):
-    """メインコンテンツを表示"""
+    """メインコンテンツを表示（ダウンロード等の操作ではこの部分のみ再実行）"""
+    detection_id = record.get('id')
+    common_name = record.get('common_name', '不明')
     
     # コンパクトなヘッダー
     st.markdown(f"""
     <div style="text-align: center; margin-bottom: 1rem;">
-        <h2>🎵 {record.get('common_name', '不明')}</h2>
+        <h2>🎵 {common_name}</h2>
     </div>
     """, unsafe_allow_html=True)
     
-    # メインエリア - スペクトログラムと音声プレイヤー
+    # スペクトログラムを読み込み（表示とダウンロードで同じバイト列を使用）
+    img_bytes = None
     if file_paths['spectrogram_exists']:
-        # スペクトログラム表示
-        st.image(str(file_paths['spectrogram']), use_column_width=True)
+        try:
+            img_bytes = load_bytes(file_paths['spectrogram'])
+        except OSError:
+            # パスを保持した後にファイルが削除・再生成された場合は未生成として表示
+            _discard_file_paths()
+            st.markdown("""
+            <div class="compact-card">
+                <h4>📊 スペクトログラム未生成</h4>
+                <p>スペクトログラムのファイルが見つかりません。</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # メインエリア - スペクトログラムと音声プレイヤー
+    if img_bytes is not None:
+        st.image(img_bytes, use_column_width=True)
         
         # 音声プレイヤーと操作ボタンをスペクトログラムの下に配置
         col1, col2, col3 = st.columns([1, 2, 1])
@@ -157,15 +205,15 @@ def show_main_content(record, file_paths):
             if file_paths['audio_exists']:
                 # 音声プレイヤー
                 try:
-                    with open(file_paths['audio_segment'], 'rb') as audio_file:
-                        audio_bytes = audio_file.read()
-                        st.audio(audio_bytes, format='audio/wav')
+                    audio_bytes = load_bytes(file_paths['audio_segment'])
+                    st.audio(audio_bytes, format='audio/wav')
                     
                     # ダウンロードボタン
                     col_a, col_b = st.columns(2)
                     with col_a:
                         st.download_button(
                             label="🎵 音声DL",
+                            key=f"dl_audio_{detection_id}",
                             data=audio_bytes,
                             file_name=file_paths['audio_segment'].name,
                             mime="audio/wav",
@@ -173,16 +221,18 @@ def show_main_content(record, file_paths):
                         )
                     
                     with col_b:
-                        with open(file_paths['spectrogram'], 'rb') as img_file:
-                            img_bytes = img_file.read()
                         st.download_button(
                             label="📊 画像DL",
+                            key=f"dl_img_{detection_id}",
                             data=img_bytes,
                             file_name=file_paths['spectrogram'].name,
                             mime="image/png",
                             use_container_width=True
                         )
                         
+                except OSError as e:
+                    _discard_file_paths()
+                    st.error(f"音声ファイル読み込みエラー: {e}")
                 except Exception as e:
                     st.error(f"音声ファイル読み込みエラー: {e}")
             else:
@@ -197,23 +247,26 @@ def show_main_content(record, file_paths):
         """, unsafe_allow_html=True)
         
         try:
-            with open(file_paths['audio_segment'], 'rb') as audio_file:
-                audio_bytes = audio_file.read()
-                st.audio(audio_bytes, format='audio/wav')
+            audio_bytes = load_bytes(file_paths['audio_segment'])
+            st.audio(audio_bytes, format='audio/wav')
             
             col1, col2, col3 = st.columns([1, 1, 1])
             with col2:
                 st.download_button(
                     label="📥 音声ダウンロード",
+                    key=f"dl_audio_only_{detection_id}",
                     data=audio_bytes,
                     file_name=file_paths['audio_segment'].name,
                     mime="audio/wav",
                     use_container_width=True
                 )
                 
+        except OSError as e:
+            _discard_file_paths()
+            st.error(f"音声ファイル読み込みエラー: {e}")
         except Exception as e:
             st.error(f"音声ファイル読み込みエラー: {e}")
-    else:
+    elif not file_paths['spectrogram_exists']:  # 読み込めなかった場合は上で未生成と表示済み
         # ファイルが生成されていない場合
         st.markdown("""
         <div class="compact-card">
@@ -229,24 +282,34 @@ def show_status_footer(record, file_paths):
     audio_status = "✅" if file_paths['audio_exists'] else "❌"
     spectrogram_status = "✅" if file_paths['spectrogram_exists'] else "❌"
     
-    # 信頼度
-    try:
-        confidence = float(record.get('confidence', 0))
+    # ファイル名（長い場合は省略、Noneの場合もN/A）
+    filename = record.get('filename') or 'N/A'
+    filename_text = filename[:30] + ('...' if len(filename) > 30 else '')
+    
+    # 信頼度（データベースの値は数値のため、文字列等の場合のみ変換を試みる）
+    confidence = record.get('confidence', 0)
+    if isinstance(confidence, (int, float)):
         confidence_text = f"{confidence:.1%}"
-    except:
-        confidence_text = "N/A"
+    else:
+        try:
+            confidence_text = f"{float(confidence):.1%}"
+        except (TypeError, ValueError):
+            confidence_text = "N/A"
     
     st.markdown(f"""
     <div class="status-info">
         <small>
             <strong>処理状況:</strong> 音声 {audio_status} | スペクトログラム {spectrogram_status} | 
             <strong>信頼度:</strong> {confidence_text} | 
-            <strong>ファイル:</strong> {record.get('filename', 'N/A')[:30]}{'...' if len(record.get('filename', '')) > 30 else ''}
+            <strong>ファイル:</strong> {filename_text}
         </small>
     </div>
     """, unsafe_allow_html=True)
 
 def main():
+    # CSSは再実行のたびに出力しないと画面から消えるため、定数をそのまま渡す
+    st.markdown(_CSS, unsafe_allow_html=True)
+    
     # 選択されたレコードの確認
     if 'selected_record' not in st.session_state:
         st.error("❌ レコードが選択されていません")
@@ -265,10 +328,16 @@ def main():
     # メインコンテンツ
     st.markdown('<div class="main-content">', unsafe_allow_html=True)
     
-    # ファイルパスを取得
+    # ファイルパスを取得（同じレコードの再実行ではセッション状態に保持した結果を使用）
     detection_id = record.get('id')
-    session_name = record.get('session_name', 'default')
-    file_paths = get_file_paths(detection_id, session_name)
+    if st.session_state.get('_file_paths_id') != detection_id or '_file_paths' not in st.session_state:
+        try:
+            st.session_state._file_paths = get_file_paths(detection_id)
+        except sqlite3.Error as e:
+            st.error(f"処理情報取得エラー: {e}")
+            return
+        st.session_state._file_paths_id = detection_id
+    file_paths = st.session_state._file_paths
     
     # メインコンテンツ表示
     show_main_content(record, file_paths)
@@ -288,6 +357,11 @@ def main():
             'audio_path': str(file_paths['audio_segment']) if file_paths['audio_segment'] else None,
             'spectrogram_path': str(file_paths['spectrogram']) if file_paths['spectrogram'] else None
         })
+        
+        # ファイル再生成後などにデータベースから処理情報とファイルパスを再取得
+        if st.button("🔄 処理情報キャッシュをクリア"):
+            _discard_file_paths()
+            st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,12 +7,13 @@ BirdNet データベースビューワー（統合表示版）
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sys
 import os
+import io
 import sqlite3
 from pathlib import Path
 from datetime import datetime
-import time
 
 # 親ディレクトリのlibとconfigをパスに追加
 current_file = Path(__file__).resolve()
@@ -22,7 +23,8 @@ sys.path.insert(0, str(lib_path))
 sys.path.insert(0, str(project_root))
 
 # 設定とユーティリティをインポート
-from config import DatabaseConfig, AppConfig
+from config import DatabaseConfig, AppConfig, clear_config_cache
+from utils.file_cache import load_bytes
 
 try:
     from db.database import BirdNetSimpleDB
@@ -31,19 +33,8 @@ except ImportError as e:
     st.error(f"必要なモジュールの読み込みに失敗: {e}")
     st.stop()
 
-# ページ設定
-st.set_page_config(
-    page_title=AppConfig.PAGE_TITLE,
-    page_icon=AppConfig.PAGE_ICON,
-    layout=AppConfig.LAYOUT,
-    initial_sidebar_state="expanded"
-)
-
-# カスタムCSS適用
-st.markdown(AppConfig.get_custom_css(), unsafe_allow_html=True)
-
 # 追加CSS（プレビューエリア用）
-st.markdown("""
+PREVIEW_CSS = """
 <style>
 .preview-card {
     background: #f8f9fa;
@@ -61,7 +52,23 @@ st.markdown("""
     font-size: 0.9rem;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def setup_page():
+    """ページ設定とカスタムCSSを適用（再実行ごとに呼び出す）"""
+    # ページ設定
+    st.set_page_config(
+        page_title=AppConfig.PAGE_TITLE,
+        page_icon=AppConfig.PAGE_ICON,
+        layout=AppConfig.LAYOUT,
+        initial_sidebar_state="expanded"
+    )
+    
+    # カスタムCSS適用
+    st.markdown(AppConfig.get_custom_css(), unsafe_allow_html=True)
+    
+    # 追加CSS（プレビューエリア用）
+    st.markdown(PREVIEW_CSS, unsafe_allow_html=True)
 
 @st.cache_resource
 def get_database():
@@ -88,15 +95,25 @@ def get_database():
         st.error(f"データベース接続エラー: {e}")
         return None
 
+@st.cache_resource
+def get_ro_conn(db_path):
+    """読み取り専用の共有データベース接続を取得（再実行間でページキャッシュを保持）
+    
+    WALモードはget_database()の初期化時に設定済み。更新には別の接続を使用する
+    """
+    db_uri = Path(db_path).absolute().as_uri() + "?mode=ro"  # パス中の記号はURIエンコード
+    conn = sqlite3.connect(db_uri, uri=True, check_same_thread=False)
+    conn.execute("PRAGMA cache_size=-32000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
 @st.cache_data
 def get_unique_sessions(db_path):
     """ユニークなセッション名を取得"""
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT session_name FROM bird_detections ORDER BY session_name")
-            sessions = [row[0] for row in cursor.fetchall()]
-            return sessions
+        cursor = get_ro_conn(db_path).execute("SELECT DISTINCT session_name FROM bird_detections ORDER BY session_name")
+        return [row[0] for row in cursor.fetchall()]
     except Exception as e:
         st.error(f"セッション取得エラー: {e}")
         return []
@@ -105,110 +122,223 @@ def get_unique_sessions(db_path):
 def get_unique_species(db_path):
     """ユニークな種名を取得"""
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT common_name FROM bird_detections WHERE common_name IS NOT NULL ORDER BY common_name")
-            species = [row[0] for row in cursor.fetchall()]
-            return species
+        cursor = get_ro_conn(db_path).execute("SELECT DISTINCT common_name FROM bird_detections WHERE common_name IS NOT NULL ORDER BY common_name")
+        return [row[0] for row in cursor.fetchall()]
     except Exception as e:
         st.error(f"種名取得エラー: {e}")
         return []
 
-def get_filtered_data(db_path, session_filter=None, species_filter=None, confidence_min=0.0, quality_filter=None):
-    """検索条件に基づいてデータを取得"""
+# 一覧表示用のカラム（パスは長い文字列のため、有無のみを取得しプレビュー時に個別に読む）
+_LIST_COLUMNS = [
+    'id', 'session_name', 'model_name', 'common_name', 'scientific_name',
+    'confidence', 'start_time_seconds', 'end_time_seconds', 'filename', 'quality_status',
+    '(audio_segment_path IS NOT NULL) AS has_audio',
+    '(spectrogram_path IS NOT NULL) AS has_spectrogram'
+]
+
+# 数値カラムの型（スキーマ上NOT NULLのため型推論なしで配列化できる）
+_LIST_NUMERIC_DTYPES = {
+    'id': np.int64,
+    'confidence': np.float64,
+    'start_time_seconds': np.float64,
+    'end_time_seconds': np.float64,
+    'has_audio': np.int8,
+    'has_spectrogram': np.int8
+}
+
+# 値の種類が少ない文字列カラム（category型にしてメモリとシリアライズ量を削減）
+_CATEGORY_COLUMNS = ['session_name', 'common_name']
+_QUALITY_DTYPE = pd.CategoricalDtype(['pending', 'approved', 'rejected'])
+
+# 品質評価フィルタの表示名とステータス値の対応
+_QUALITY_FILTER_STATUS = {
+    "⏳ 評価待ち": "pending",
+    "✅ 承認済み": "approved",
+    "❌ 却下": "rejected"
+}
+
+# 一覧表示用の品質評価ラベルとファイル有無の表示
+_QUALITY_LABELS = {
+    'pending': "⏳ 評価待ち",
+    'approved': "✅ 承認済み",
+    'rejected': "❌ 却下"
+}
+_FILE_BADGES = {1: '✅', 0: '❌'}
+
+# CSVエクスポート用のカラム
+_EXPORT_COLUMNS = [
+    'id', 'session_name', 'model_name', 'common_name', 'scientific_name',
+    'confidence', 'start_time_seconds', 'end_time_seconds', 'filename', 'file_path',
+    'audio_segment_path', 'spectrogram_path', 'quality_status'
+]
+
+# CSVエクスポート時に1回で読み込む行数
+_EXPORT_CHUNK_ROWS = 5000
+
+def _build_filter_clause(session_filter=None, species_filter=None, confidence_min=0.0, quality_filter=None):
+    """検索条件からWHERE句とパラメータを作成"""
+    where_conditions = []
+    params = []
+    
+    # インデックス付きカラムの等価条件を先に、範囲条件を最後に並べる
+    # （使用するインデックスはスキーマ初期化時のANALYZEによるsqlite_stat1を基にプランナーが選択）
+    if session_filter and session_filter != "すべて":
+        where_conditions.append("session_name = ?")
+        params.append(session_filter)
+    
+    if species_filter and species_filter != "すべて":
+        where_conditions.append("common_name = ?")
+        params.append(species_filter)
+    
+    # 品質評価フィルタを追加
+    if quality_filter and quality_filter != "すべて":
+        quality_status = _QUALITY_FILTER_STATUS.get(quality_filter)
+        if quality_status:
+            where_conditions.append("quality_status = ?")
+            params.append(quality_status)
+    
+    if confidence_min > 0.0:
+        where_conditions.append("confidence >= ?")
+        params.append(confidence_min)
+    
+    where_sql = " WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    return where_sql, params
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _load_filtered_data(db_path, session_filter=None, species_filter=None, confidence_min=0.0, quality_filter=None, limit=None, offset=0):
+    """検索条件に基づいてデータを取得（検索条件ごとにキャッシュ、例外はキャッシュされない）"""
+    where_sql, params = _build_filter_clause(session_filter, species_filter, confidence_min, quality_filter)
+    query = f"SELECT {', '.join(_LIST_COLUMNS)} FROM bird_detections{where_sql} ORDER BY created_at DESC"
+    
+    # 表示するページの行のみ取得
+    if limit:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    
+    cursor = get_ro_conn(db_path).execute(query, params)
+    columns = [desc[0] for desc in cursor.description]
+    rows = cursor.fetchall()
+    
+    # 列ごとに型を決めて組み立て、read_sql_queryの行単位の型推論を省く
+    n_rows = len(rows)
+    values = zip(*rows) if rows else ([] for _ in columns)
+    data = {}
+    for name, col in zip(columns, values):
+        dtype = _LIST_NUMERIC_DTYPES.get(name)
+        data[name] = np.fromiter(col, dtype=dtype, count=n_rows) if dtype else list(col)
+    df = pd.DataFrame(data, columns=columns)
+    
+    # idは値を変えずに縮小できる（小数カラムはfloat32にすると表示の丸めが変わるため対象外）
+    df['id'] = pd.to_numeric(df['id'], downcast='unsigned')
+    for col in _CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    # 品質評価はCHECK制約の3値に固定し、ステータス更新時も同じカテゴリで代入できるようにする
+    df['quality_status'] = df['quality_status'].astype(_QUALITY_DTYPE)
+    return df
+
+def get_filtered_data(db_path, session_filter=None, species_filter=None, confidence_min=0.0, quality_filter=None, limit=None, offset=0):
+    """検索条件に基づいてデータを取得（limit指定時はoffsetから最大limit件）"""
     try:
-        required_columns = [
-            'id', 'session_name', 'model_name', 'common_name', 'scientific_name',
-            'confidence', 'start_time_seconds', 'end_time_seconds', 'filename', 'file_path',
-            'audio_segment_path', 'spectrogram_path', 'quality_status'
-        ]
-        
-        with sqlite3.connect(db_path) as conn:
-            where_conditions = []
-            params = []
-            
-            if session_filter and session_filter != "すべて":
-                where_conditions.append("session_name = ?")
-                params.append(session_filter)
-            
-            if species_filter and species_filter != "すべて":
-                where_conditions.append("common_name = ?")
-                params.append(species_filter)
-            
-            if confidence_min > 0.0:
-                where_conditions.append("confidence >= ?")
-                params.append(confidence_min)
-            
-            # 品質評価フィルタを追加
-            if quality_filter and quality_filter != "すべて":
-                quality_mapping = {
-                    "⏳ 評価待ち": "pending",
-                    "✅ 承認済み": "approved",
-                    "❌ 却下": "rejected"
-                }
-                quality_status = quality_mapping.get(quality_filter)
-                if quality_status:
-                    where_conditions.append("quality_status = ?")
-                    params.append(quality_status)
-            
-            columns_str = ", ".join(required_columns)
-            query = f"SELECT {columns_str} FROM bird_detections"
-            
-            if where_conditions:
-                query += " WHERE " + " AND ".join(where_conditions)
-            
-            query += " ORDER BY created_at DESC"
-            
-            df = pd.read_sql_query(query, conn, params=params)
-            return df
-            
+        return _load_filtered_data(db_path, session_filter, species_filter, confidence_min, quality_filter, limit, offset)
     except Exception as e:
         st.error(f"データ取得エラー: {e}")
         return pd.DataFrame()
 
-def get_file_paths(detection_id, session_name, audio_segment_path, spectrogram_path):
-    """生成ファイルの実際のパスを構築"""
+@st.cache_data(ttl=300, show_spinner=False)
+def get_summary_counts(db_path, session_filter=None, species_filter=None, confidence_min=0.0, quality_filter=None):
+    """検索結果のファイル生成状況・品質評価状況を1回のクエリで集計"""
+    where_sql, params = _build_filter_clause(session_filter, species_filter, confidence_min, quality_filter)
+    query = f"""
+        SELECT 
+            COUNT(*) AS total,
+            COUNT(audio_segment_path) AS audio,
+            COUNT(spectrogram_path) AS spectrogram,
+            TOTAL(quality_status = 'approved') AS approved,
+            TOTAL(quality_status = 'rejected') AS rejected,
+            TOTAL(quality_status = 'pending' OR quality_status IS NULL) AS pending
+        FROM bird_detections{where_sql}
+    """
+    
+    cursor = get_ro_conn(db_path).execute(query, params)
+    row = cursor.fetchone()
+    return {column[0]: int(value) for column, value in zip(cursor.description, row)}
+
+def clear_result_caches():
+    """検出結果が変わった時に検索結果・エクスポート・ファイルパスのキャッシュのみクリア（セッション・種名一覧は保持）"""
+    _load_filtered_data.clear()
+    get_summary_counts.clear()
+    get_export_csv.clear()
+    _resolve_file_paths.clear()
+
+@st.cache_data(ttl=300, max_entries=8, show_spinner=False)
+def get_export_csv(db_path, session_filter=None, species_filter=None, confidence_min=0.0, quality_filter=None):
+    """検索結果を全カラムでCSVエクスポート（検索条件ごとにキャッシュ）"""
+    where_sql, params = _build_filter_clause(session_filter, species_filter, confidence_min, quality_filter)
+    query = f"SELECT {', '.join(_EXPORT_COLUMNS)} FROM bird_detections{where_sql} ORDER BY created_at DESC"
+    
+    # 一定件数ごとにバイト列へ直接書き出し、全件のDataFrameとCSV文字列を同時に保持しない
+    buffer = io.BytesIO()
+    chunks = pd.read_sql_query(query, get_ro_conn(db_path), params=params, chunksize=_EXPORT_CHUNK_ROWS)
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(buffer, index=False, header=(i == 0), encoding='utf-8-sig' if i == 0 else 'utf-8')
+    
+    if buffer.tell() == 0:
+        # 該当データがない場合もヘッダー行は出力
+        pd.DataFrame(columns=_EXPORT_COLUMNS).to_csv(buffer, index=False, encoding='utf-8-sig')
+    return buffer.getvalue()
+
+def get_detection_paths(db_path, detection_id):
+    """選択されたレコードの音声セグメント・スペクトログラムのパスを取得"""
+    row = get_ro_conn(db_path).execute(
+        "SELECT audio_segment_path, spectrogram_path FROM bird_detections WHERE id = ?",
+        (detection_id,)
+    ).fetchone()
+    return row if row else (None, None)
+
+def _find_detection_file(directory, prefix, suffix):
+    """ディレクトリ内で prefix*suffix に一致する最初のファイルを検索（ない場合はNone）"""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                # globの {prefix}*{suffix} と同じ判定（fnmatchの変換を行わない）
+                if (name.startswith(prefix) and name.endswith(suffix)
+                        and len(name) >= len(prefix) + len(suffix)):
+                    return Path(entry.path)
+    except OSError:
+        pass  # ディレクトリがない場合
+    return None
+
+@st.cache_data(ttl=600, max_entries=1024, show_spinner=False)
+def _resolve_file_paths(detection_id, session_name, audio_segment_path, spectrogram_path):
+    """生成ファイルの実際のパスを解決（キャッシュしやすいよう文字列のタプルで返す）"""
     from config import get_configured_database_path
     database_root = get_configured_database_path()
+    prefix = f"detection_{detection_id:03d}_"
     
-    file_paths = {
-        'audio_segment': None,
-        'spectrogram': None,
-        'audio_exists': False,
-        'spectrogram_exists': False
-    }
+    resolved = []
+    for db_relpath, folder, suffix in (
+        (audio_segment_path, "audio_segments", ".wav"),
+        (spectrogram_path, "spectrograms", ".png"),
+    ):
+        # データベースのパス情報を使用し、見つからない種類のみ推測で検索
+        path = database_root / db_relpath if db_relpath else None
+        if path is None or not path.exists():
+            path = _find_detection_file(database_root / folder / session_name, prefix, suffix)
+        resolved.append(str(path) if path else None)
+    
+    return tuple(resolved)
+
+def get_file_paths(detection_id, session_name, audio_segment_path, spectrogram_path):
+    """生成ファイルの実際のパスを構築"""
+    audio_segment, spectrogram = _resolve_file_paths(detection_id, session_name, audio_segment_path, spectrogram_path)
     
-    # データベースのパス情報を使用
-    if audio_segment_path:
-        audio_path = database_root / audio_segment_path
-        if audio_path.exists():
-            file_paths['audio_segment'] = audio_path
-            file_paths['audio_exists'] = True
-    
-    if spectrogram_path:
-        spectrogram_full_path = database_root / spectrogram_path
-        if spectrogram_full_path.exists():
-            file_paths['spectrogram'] = spectrogram_full_path
-            file_paths['spectrogram_exists'] = True
-    
-    # パスが見つからない場合は推測で検索
-    if not file_paths['audio_exists'] or not file_paths['spectrogram_exists']:
-        audio_segments_dir = database_root / "audio_segments" / session_name
-        spectrograms_dir = database_root / "spectrograms" / session_name
-        
-        if audio_segments_dir.exists():
-            for audio_file in audio_segments_dir.glob(f"detection_{detection_id:03d}_*.wav"):
-                file_paths['audio_segment'] = audio_file
-                file_paths['audio_exists'] = True
-                break
-        
-        if spectrograms_dir.exists():
-            for spectrogram_file in spectrograms_dir.glob(f"detection_{detection_id:03d}_*.png"):
-                file_paths['spectrogram'] = spectrogram_file
-                file_paths['spectrogram_exists'] = True
-                break
-    
-    return file_paths
+    return {
+        'audio_segment': Path(audio_segment) if audio_segment else None,
+        'spectrogram': Path(spectrogram) if spectrogram else None,
+        'audio_exists': audio_segment is not None,
+        'spectrogram_exists': spectrogram is not None
+    }
 
 def generate_files(detection_id, generation_type):
     """ファイル生成処理を実行"""
@@ -220,13 +350,17 @@ def generate_files(detection_id, generation_type):
         manager = ProcessingManager(db_path=str(db_path), enable_spectrogram=enable_spectrogram)
         
         with st.spinner(f"生成中... ({generation_type})"):
-            success, message = manager.process_single_detection(detection_id)
+            try:
+                success, message = manager.process_single_detection(detection_id)
+            finally:
+                manager.close()
             
         if success:
-            st.success(f"✅ {message}")
+            # 直後の再実行後も表示が残るようトーストで通知
+            st.toast(f"✅ {message}")
             
-            # キャッシュをクリアしてデータを強制更新
-            st.cache_data.clear()
+            # 検索結果のキャッシュをクリアしてデータを強制更新
+            clear_result_caches()
             
             # 現在の検索条件でデータを再取得
             if 'last_search_params' in st.session_state:
@@ -237,7 +371,8 @@ def generate_files(detection_id, generation_type):
                     params.get('session_filter'), 
                     params.get('species_filter'), 
                     params.get('confidence_min', 0.0),
-                    params.get('quality_filter')
+                    params.get('quality_filter'),
+                    *_page_window(params)
                 )
                 if not updated_df.empty:
                     st.session_state.data = updated_df
@@ -245,8 +380,6 @@ def generate_files(detection_id, generation_type):
             # 選択状態を復元するフラグを設定
             st.session_state.restore_selection = True
             
-            # 短時間待機後に再実行
-            time.sleep(0.5)
             st.rerun()
         else:
             st.error(f"❌ {message}")
@@ -257,44 +390,22 @@ def generate_files(detection_id, generation_type):
 def update_quality_status(detection_id, new_status):
     """品質評価ステータスを更新"""
     try:
-        db = get_database()
-        if db is None:
-            st.error("データベース接続エラー")
-            return False
-            
+        # DB本体はmain()のget_database()で初期化済みのため、ファイルの存在のみ確認
+        # （存在しないパスにconnectすると空のDBが作成される）
         db_path = DatabaseConfig.get_database_path()
+        if not os.path.exists(db_path):
+            st.error(f"データベースファイルが見つかりません: {db_path}")
+            return False
         
         with sqlite3.connect(db_path) as conn:
             cursor = conn.cursor()
             
-            # テーブル構造を確認
-            cursor.execute("PRAGMA table_info(bird_detections)")
-            columns = [row[1] for row in cursor.fetchall()]
-            
-            # quality_statusカラムが存在しない場合は追加
-            if 'quality_status' not in columns:
-                st.warning("品質評価カラムが存在しません。データベースをアップグレードしています...")
-                cursor.execute(
-                    "ALTER TABLE bird_detections ADD COLUMN quality_status TEXT DEFAULT 'pending' CHECK(quality_status IN ('pending', 'approved', 'rejected'))"
-                )
-                cursor.execute(
-                    "ALTER TABLE bird_detections ADD COLUMN reviewed_at TIMESTAMP"
-                )
-                conn.commit()
-                st.success("✅ データベースをアップグレードしました")
-                time.sleep(1)
-            
-            # ステータス更新
-            if 'reviewed_at' in columns or 'quality_status' not in columns:  # アップグレード後はreviewed_atもある
-                cursor.execute(
-                    "UPDATE bird_detections SET quality_status = ?, reviewed_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (new_status, detection_id)
-                )
-            else:
-                cursor.execute(
-                    "UPDATE bird_detections SET quality_status = ? WHERE id = ?",
-                    (new_status, detection_id)
-                )
+            # ステータス更新（品質評価カラムはget_database()の初期化時にマイグレーション済み）
+            # 評価日時はBirdNetSimpleDB.update_quality_statusと同じローカル時刻のISO形式
+            cursor.execute(
+                "UPDATE bird_detections SET quality_status = ?, reviewed_at = ? WHERE id = ?",
+                (new_status, datetime.now().isoformat(), detection_id)
+            )
             
             conn.commit()
             
@@ -304,30 +415,28 @@ def update_quality_status(detection_id, new_status):
                     'rejected': '却下',
                     'pending': '評価待ち'
                 }
-                st.success(f"✅ 品質評価を「{status_labels.get(new_status, new_status)}」に変更しました")
+                st.toast(f"✅ 品質評価を「{status_labels.get(new_status, new_status)}」に変更しました")
                 
-                # キャッシュをクリアしてデータを強制更新
-                st.cache_data.clear()
+                # 検索結果のキャッシュをクリア（次回の検索で最新の状態を取得）
+                clear_result_caches()
                 
-                # 現在の検索条件でデータを再取得
-                if 'last_search_params' in st.session_state:
-                    params = st.session_state.last_search_params
-                    updated_df = get_filtered_data(
-                        db_path, 
-                        params.get('session_filter'), 
-                        params.get('species_filter'), 
-                        params.get('confidence_min', 0.0),
-                        params.get('quality_filter')
-                    )
-                    if not updated_df.empty:
-                        st.session_state.data = updated_df
+                # 表示中のデータは再取得せず、変更した行のみ更新
+                if 'data' in st.session_state:
+                    data = st.session_state.data
+                    mask = data['id'] == detection_id
+                    params = st.session_state.get('last_search_params', {})
+                    filtered_status = _QUALITY_FILTER_STATUS.get(params.get('quality_filter'))
+                    
+                    if filtered_status and filtered_status != new_status:
+                        # 品質評価で絞り込み中の場合、条件に合わなくなった行を除外
+                        remaining = data[~mask].reset_index(drop=True)
+                        if not remaining.empty:
+                            st.session_state.data = remaining
+                    else:
+                        data.loc[mask, 'quality_status'] = new_status
                 
                 # 選択状態を復元するフラグを設定
                 st.session_state.restore_selection = True
-                
-                # 短時間待機後に再実行
-                time.sleep(0.3)
-                st.rerun()
                 return True
             else:
                 st.error("❌ ステータス更新に失敗しました")
@@ -337,6 +446,10 @@ def update_quality_status(detection_id, new_status):
         st.error(f"❌ ステータス更新エラー: {e}")
         return False
 
+def _on_quality_change(detection_id, widget_key):
+    """品質評価の選択変更時に呼ばれるコールバック（続く再実行で更新後のデータを表示）"""
+    update_quality_status(detection_id, st.session_state[widget_key])
+
 def show_preview_area(selected_record):
     """選択されたレコードのプレビューエリアを表示"""
     if not selected_record:
@@ -349,11 +462,14 @@ def show_preview_area(selected_record):
         """, unsafe_allow_html=True)
         return
     
-    # ファイルパスを取得
+    # ファイルパスを取得（一覧にはパスを含めないため、選択されたレコードのみ読む）
     detection_id = selected_record.get('id')
     session_name = selected_record.get('session_name', 'default')
-    audio_segment_path = selected_record.get('audio_segment_path')
-    spectrogram_path = selected_record.get('spectrogram_path')
+    try:
+        audio_segment_path, spectrogram_path = get_detection_paths(DatabaseConfig.get_database_path(), detection_id)
+    except sqlite3.Error as e:
+        st.error(f"ファイルパス取得エラー: {e}")
+        audio_segment_path, spectrogram_path = None, None
     
     file_paths = get_file_paths(detection_id, session_name, audio_segment_path, spectrogram_path)
     
@@ -378,9 +494,17 @@ def show_preview_area(selected_record):
     col1, col2 = st.columns([3, 2])
     
     with col1:
-        # スペクトログラム表示
+        # スペクトログラム表示（表示とダウンロードで同じバイト列を使用）
+        img_bytes = None
         if file_paths['spectrogram_exists']:
-            st.image(str(file_paths['spectrogram']), use_container_width=True)
+            try:
+                img_bytes = load_bytes(file_paths['spectrogram'])
+            except OSError:
+                # キャッシュ後にファイルが削除された場合は、解決済みのパスを破棄して未生成として表示
+                _resolve_file_paths.clear()
+        
+        if img_bytes is not None:
+            st.image(img_bytes, use_container_width=True)
         else:
             st.markdown("""
             <div style="background: #e9ecef; padding: 2rem; border-radius: 10px; text-align: center;">
@@ -394,12 +518,11 @@ def show_preview_area(selected_record):
         if file_paths['audio_exists']:
             st.markdown("**🎵 音声セグメント**")
             try:
-                with open(file_paths['audio_segment'], 'rb') as audio_file:
-                    audio_bytes = audio_file.read()
-                    st.audio(audio_bytes, format='audio/wav')
+                audio_bytes = load_bytes(file_paths['audio_segment'])
+                st.audio(audio_bytes, format='audio/wav')
                 
                 # ダウンロードボタン
-                if file_paths['spectrogram_exists']:
+                if img_bytes is not None:
                     col_a, col_b = st.columns(2)
                     with col_a:
                         st.download_button(
@@ -410,8 +533,6 @@ def show_preview_area(selected_record):
                             use_container_width=True
                         )
                     with col_b:
-                        with open(file_paths['spectrogram'], 'rb') as img_file:
-                            img_bytes = img_file.read()
                         st.download_button(
                             label="📊 画像",
                             data=img_bytes,
@@ -428,6 +549,9 @@ def show_preview_area(selected_record):
                         use_container_width=True
                     )
                     
+            except OSError as e:
+                _resolve_file_paths.clear()  # 削除されたファイルのパスを次回の再実行で解決し直す
+                st.error(f"音声読み込みエラー: {e}")
             except Exception as e:
                 st.error(f"音声読み込みエラー: {e}")
         else:
@@ -448,32 +572,25 @@ def show_preview_area(selected_record):
         current_label = status_labels.get(current_status, '❓ 不明')
         st.caption(f"現在のステータス: {current_label}")
         
-        # 品質評価変更ボタン
-        col_q1, col_q2, col_q3 = st.columns(3)
-        
-        with col_q1:
-            if st.button("✅ 承認", 
-                        use_container_width=True, 
-                        type="primary" if current_status != 'approved' else "secondary",
-                        disabled=current_status == 'approved',
-                        help="この検出結果を承認します"):
-                update_quality_status(detection_id, 'approved')
-        
-        with col_q2:
-            if st.button("❌ 却下", 
-                        use_container_width=True,
-                        type="primary" if current_status != 'rejected' else "secondary", 
-                        disabled=current_status == 'rejected',
-                        help="この検出結果を却下します"):
-                update_quality_status(detection_id, 'rejected')
-        
-        with col_q3:
-            if st.button("⏳ 保留", 
-                        use_container_width=True,
-                        type="primary" if current_status != 'pending' else "secondary",
-                        disabled=current_status == 'pending', 
-                        help="評価を保留状態に戻します"):
-                update_quality_status(detection_id, 'pending')
+        # 品質評価の変更（選択が変わった時のみコールバックで更新し、再実行は1回で済ませる）
+        quality_key = f"quality_{detection_id}"
+        quality_options = ['approved', 'rejected', 'pending']
+        quality_choice_labels = {
+            'approved': '✅ 承認',
+            'rejected': '❌ 却下',
+            'pending': '⏳ 保留'
+        }
+        st.radio(
+            "品質評価",
+            quality_options,
+            index=quality_options.index(current_status) if current_status in quality_options else quality_options.index('pending'),
+            format_func=quality_choice_labels.get,
+            key=quality_key,
+            horizontal=True,
+            label_visibility="collapsed",
+            on_change=_on_quality_change,
+            args=(detection_id, quality_key)
+        )
         
         # ファイル生成ボタンエリア
         st.markdown("---")
@@ -499,6 +616,19 @@ def show_preview_area(selected_record):
             if st.button(both_label, use_container_width=True, help="音声+スペクトログラムを生成（既存の場合上書き）"):
                 generate_files(detection_id, 'both')
 
+def _format_unique(values, format_spec):
+    """数値の列を文字列化（ユニークな値のみ書式化して全行に展開、欠損値はN/A）"""
+    codes, uniques = pd.factorize(values)
+    labels = np.array([format(value, format_spec) for value in uniques] + ["N/A"], dtype=object)
+    return pd.Series(labels[codes], index=values.index)  # 欠損値のコード-1は末尾のN/Aを指す
+
+def _page_window(params):
+    """検索条件の表示件数・ページ番号から (LIMIT, OFFSET) を取得"""
+    page_size = params.get('page_size')
+    if not page_size:
+        return None, 0
+    return page_size, (params.get('page', 1) - 1) * page_size
+
 def show_search_filters(db_path):
     """検索フィルタUIを表示"""
     st.sidebar.markdown("### 🔍 検索・フィルタ")
@@ -522,7 +652,11 @@ def show_search_filters(db_path):
     ]
     selected_quality = st.sidebar.selectbox("品質評価", quality_options, help="品質評価ステータスで絞り込み")
     
-    return selected_session, selected_species, confidence_min, selected_quality
+    # 表示件数とページ（テーブルに送る行数を制限）
+    page_size = st.sidebar.number_input("最大件数", min_value=100, value=1000, step=100, help="1ページに表示する最大件数")
+    page = st.sidebar.number_input("ページ", min_value=1, value=1, step=1, help="表示するページ番号")
+    
+    return selected_session, selected_species, confidence_min, selected_quality, int(page_size), int(page)
 
 def show_data_view():
     """データ表示機能"""
@@ -532,13 +666,13 @@ def show_data_view():
     
     db_path = DatabaseConfig.get_database_path()
     
-    session_filter, species_filter, confidence_min, quality_filter = show_search_filters(db_path)
+    session_filter, species_filter, confidence_min, quality_filter, page_size, page = show_search_filters(db_path)
     
     search_button = st.sidebar.button("🔍 検索実行", type="primary", use_container_width=True)
     
     if st.sidebar.button("🗑️ 条件クリア", use_container_width=True):
         # セッション状態をクリア
-        keys_to_remove = ['data', 'search_executed', 'last_search_params', 'selected_record', 'selected_row_index', 'restore_selection']
+        keys_to_remove = ['data', 'search_executed', 'last_search_params', 'selected_record', 'selected_row_index', 'restore_selection', 'export_filters']
         for key in keys_to_remove:
             if key in st.session_state:
                 del st.session_state[key]
@@ -547,61 +681,70 @@ def show_data_view():
         st.cache_data.clear()
         st.rerun()
     
+    search_params = None
     if search_button or 'search_executed' not in st.session_state:
-        # 検索条件を常に保存
-        st.session_state.last_search_params = {
+        search_params = {
             'session_filter': session_filter,
             'species_filter': species_filter,
             'confidence_min': confidence_min,
-            'quality_filter': quality_filter
+            'quality_filter': quality_filter,
+            'page_size': page_size,
+            'page': page
         }
+    else:
+        last_params = st.session_state.last_search_params
+        if (last_params.get('page_size'), last_params.get('page')) != (page_size, page):
+            # ページの移動は保存済みの検索条件のまま取得し直す
+            search_params = {**last_params, 'page_size': page_size, 'page': page}
+    
+    if search_params is not None:
+        # 検索条件を常に保存
+        st.session_state.last_search_params = search_params
+        session_filter = search_params['session_filter']
+        species_filter = search_params['species_filter']
+        confidence_min = search_params['confidence_min']
+        quality_filter = search_params['quality_filter']
+        limit, offset = _page_window(search_params)
         
         with st.spinner("データを取得中..."):
-            df = get_filtered_data(db_path, session_filter, species_filter, confidence_min, quality_filter)
+            df = get_filtered_data(db_path, session_filter, species_filter, confidence_min, quality_filter, limit, offset)
             
             if not df.empty:
                 st.session_state.data = df
                 st.session_state.search_executed = True
                 
-                st.success(f"✅ {len(df):,} 件見つかりました")
+                # 処理状況サマリー（集計はSQLで実行）
+                try:
+                    counts = get_summary_counts(db_path, session_filter, species_filter, confidence_min, quality_filter)
+                except Exception as e:
+                    st.error(f"集計エラー: {e}")
+                    counts = None
+                
+                total_count = counts['total'] if counts else len(df)
+                st.success(f"✅ {total_count:,} 件見つかりました（{offset + 1:,}–{offset + len(df):,} 件目を表示）")
                 
-                # 処理状況サマリー（パスベース）
-                if 'audio_segment_path' in df.columns:
-                    audio_count = df['audio_segment_path'].notna().sum()
-                    spectrogram_count = df['spectrogram_path'].notna().sum() if 'spectrogram_path' in df.columns else 0
+                if counts:
+                    total = counts['total']
                     
                     # メトリクス表示（上段：ファイル生成状況）
                     st.markdown("**📊 ファイル生成状況**")
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("🎵 音声生成済み", f"{audio_count}/{len(df)}")
+                        st.metric("🎵 音声生成済み", f"{counts['audio']}/{total}")
                     with col2:
-                        st.metric("📊 スペクトログラム生成済み", f"{spectrogram_count}/{len(df)}")
+                        st.metric("📊 スペクトログラム生成済み", f"{counts['spectrogram']}/{total}")
                     with col3:
-                        st.metric("⏳ 未処理", f"{len(df) - max(audio_count, spectrogram_count)}")
+                        st.metric("⏳ 未処理", f"{total - max(counts['audio'], counts['spectrogram'])}")
                     
-                    # 品質評価状況の集計（quality_statusカラムが存在する場合のみ）
-                    if 'quality_status' in df.columns:
-                        quality_counts = df['quality_status'].value_counts()
-                        approved_count = quality_counts.get('approved', 0)
-                        rejected_count = quality_counts.get('rejected', 0)
-                        pending_count = quality_counts.get('pending', 0)
-                        # NaN値をpendingとしてカウント
-                        nan_count = df['quality_status'].isna().sum()
-                        pending_count += nan_count
-                        
-                        # メトリクス表示（下段：品質評価状況）
-                        st.markdown("**🏆 品質評価状況**")
-                        col4, col5, col6 = st.columns(3)
-                        with col4:
-                            st.metric("✅ 承認済み", f"{approved_count}/{len(df)}")
-                        with col5:
-                            st.metric("❌ 却下", f"{rejected_count}/{len(df)}")
-                        with col6:
-                            st.metric("⏳ 評価待ち", f"{pending_count}/{len(df)}")
-                    else:
-                        # quality_statusカラムがない場合の通知
-                        st.info("📊 品質評価機能を使用するには、データベースのアップグレードが必要です。")
+                    # メトリクス表示（下段：品質評価状況、NULLは評価待ちとしてカウント）
+                    st.markdown("**🏆 品質評価状況**")
+                    col4, col5, col6 = st.columns(3)
+                    with col4:
+                        st.metric("✅ 承認済み", f"{counts['approved']}/{total}")
+                    with col5:
+                        st.metric("❌ 却下", f"{counts['rejected']}/{total}")
+                    with col6:
+                        st.metric("⏳ 評価待ち", f"{counts['pending']}/{total}")
                 
                 conditions = []
                 if session_filter and session_filter != "すべて":
@@ -624,38 +767,20 @@ def show_data_view():
     if 'data' in st.session_state and not st.session_state.data.empty:
         df = st.session_state.data
         
-        # テーブル表示用のデータ準備
-        display_df = df.copy()
-        
+        # テーブル表示用のデータ準備（dropは新しいDataFrameを返すため、事前のコピーは不要）
         # 削除するカラム（idは残す、モデル、quality_statusを追加）
-        columns_to_drop = ['file_path', 'scientific_name', 'audio_segment_path', 'spectrogram_path', 'model_name', 'quality_status']
-        display_df = display_df.drop(columns=[col for col in columns_to_drop if col in display_df.columns])
+        columns_to_drop = ['scientific_name', 'has_audio', 'has_spectrogram', 'model_name', 'quality_status']
+        display_df = df.drop(columns=[col for col in columns_to_drop if col in df.columns])
         
         # 処理状況カラムを追加（パスベース）
-        if 'audio_segment_path' in df.columns:
-            display_df['音声'] = df['audio_segment_path'].apply(lambda x: '✅' if pd.notna(x) else '❌')
-        if 'spectrogram_path' in df.columns:
-            display_df['スペクトログラム'] = df['spectrogram_path'].apply(lambda x: '✅' if pd.notna(x) else '❌')
-        
-        # 人間による品質評価カラムを追加
-        def get_quality_evaluation(row):
-            """品質評価ステータスを表示"""
-            quality_status = row.get('quality_status', 'pending')
-            
-            if pd.isna(quality_status) or quality_status is None:
-                return "⏳ 評価待ち"  # デフォルト値
-            elif quality_status == 'approved':
-                return "✅ 承認済み"
-            elif quality_status == 'rejected':
-                return "❌ 却下"
-            elif quality_status == 'pending':
-                return "⏳ 評価待ち"
-            else:
-                return "❓ 不明"
+        if 'has_audio' in df.columns:
+            display_df['音声'] = df['has_audio'].map(_FILE_BADGES)
+        if 'has_spectrogram' in df.columns:
+            display_df['スペクトログラム'] = df['has_spectrogram'].map(_FILE_BADGES)
         
-        # quality_statusカラムが存在する場合のみ品質評価カラムを追加
+        # 人間による品質評価カラムを追加（未設定は評価待ち、カテゴリ型のためカテゴリ単位で変換）
         if 'quality_status' in df.columns:
-            display_df['品質評価'] = df.apply(get_quality_evaluation, axis=1)
+            display_df['品質評価'] = df['quality_status'].fillna('pending').map(_QUALITY_LABELS)
         else:
             # quality_statusカラムが存在しない場合はプレースホルダー
             display_df['品質評価'] = "⚠️ 未対応"
@@ -694,40 +819,18 @@ def show_data_view():
         
         display_df = display_df[final_columns]
         
+        # 数値は重複する値が多いため、ユニークな値ごとに1回だけ文字列化
         if '信頼度' in display_df.columns:
-            def format_confidence(x):
-                try:
-                    if pd.isna(x):
-                        return "N/A"
-                    if isinstance(x, str) and '%' in x:
-                        return x
-                    if isinstance(x, (int, float)):
-                        return f"{x:.1%}"
-                    return "N/A"
-                except:
-                    return "N/A"
-            
-            display_df['信頼度'] = display_df['信頼度'].apply(format_confidence)
+            display_df['信頼度'] = _format_unique(display_df['信頼度'], '.1%')
         
         for time_col in ['開始(秒)', '終了(秒)']:
             if time_col in display_df.columns:
-                def format_time(x):
-                    try:
-                        if pd.isna(x):
-                            return "N/A"
-                        if isinstance(x, str) and x != "N/A":
-                            try:
-                                float(x)
-                                return x
-                            except:
-                                return x
-                        if isinstance(x, (int, float)):
-                            return f"{x:.1f}"
-                        return "N/A"
-                    except:
-                        return "N/A"
-                
-                display_df[time_col] = display_df[time_col].apply(format_time)
+                display_df[time_col] = _format_unique(display_df[time_col], '.1f')
+        
+        # 繰り返しの多い表示用文字列はcategory型で送信
+        for col in ['セッション名', '種名', '品質評価', '音声', 'スペクトログラム']:
+            if col in display_df.columns:
+                display_df[col] = display_df[col].astype('category')
         
         # データテーブル表示
         st.subheader("📊 検索結果")
@@ -779,7 +882,26 @@ def show_data_view():
         
         # エクスポート
         st.subheader("📊 エクスポート")
-        csv = df.to_csv(index=False, encoding='utf-8-sig')
+        params = st.session_state.get('last_search_params', {})
+        export_filters = (
+            params.get('session_filter'),
+            params.get('species_filter'),
+            params.get('confidence_min', 0.0),
+            params.get('quality_filter')
+        )
+        
+        # 全件のCSVは要求された検索条件のみ作成（検索のたびに作成・保持しない）
+        if st.button("📊 CSV 作成"):
+            st.session_state.export_filters = export_filters
+        if st.session_state.get('export_filters') != export_filters:
+            return
+        
+        try:
+            csv = get_export_csv(db_path, *export_filters)
+        except Exception as e:
+            st.error(f"エクスポートエラー: {e}")
+            return
+        
         st.download_button(
             label="📊 CSV ダウンロード",
             data=csv,
@@ -788,18 +910,26 @@ def show_data_view():
         )
 
 def main():
+    setup_page()
+    
     st.title("🐦 BirdNet データベースビューワー")
     st.markdown("検索・フィルタ機能 + リアルタイムプレビュー")
     
     with st.sidebar:
         if st.button("🔄 リロード", use_container_width=True):
             # 全てのセッション状態をクリア
-            keys_to_remove = ['data', 'search_executed', 'last_search_params', 'selected_record', 'selected_row_index', 'restore_selection']
+            keys_to_remove = ['data', 'search_executed', 'last_search_params', 'selected_record', 'selected_row_index', 'restore_selection', 'export_filters']
             for key in keys_to_remove:
                 if key in st.session_state:
                     del st.session_state[key]
             
-            # 全てのキャッシュをクリア
+            # キャッシュから外れるデータベースの共有接続を閉じる
+            db = get_database()
+            if db is not None:
+                db.close()
+            
+            # 全てのキャッシュをクリア（設定の再読み込みを含む）
+            clear_config_cache()
             st.cache_resource.clear()
             st.cache_data.clear()
             st.rerun()
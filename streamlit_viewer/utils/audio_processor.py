@@ -4,15 +4,112 @@
 音声切り取り、波形生成、フォーマット変換などを担当
 """
 
-import librosa
 import soundfile as sf
+import soxr
 import numpy as np
 import io
-import tempfile
+import importlib.util
+import struct
 from pathlib import Path
 from typing import Tuple, Optional, Union
 import streamlit as st
 
+# tsdownsample（オプション、インストール時は波形の包絡を保つMinMaxLTTBで間引き）
+try:
+    from tsdownsample import MinMaxLTTBDownsampler
+    TSDOWNSAMPLE_AVAILABLE = True
+except ImportError:
+    TSDOWNSAMPLE_AVAILABLE = False
+
+# Numba（librosaの依存パッケージ、tsdownsampleがない場合の区間ごとの最大・最小の抽出に使用）
+# 読み込みが重いため、存在のみ確認して初回の間引き時に読み込む
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+
+# Datashader（オプション、インストール時は非常に長い波形を画像に描画して表示）
+DATASHADER_AVAILABLE = importlib.util.find_spec('datashader') is not None
+
+# 波形表示の最大ポイント数
+_WAVEFORM_MAX_POINTS = 2000
+
+# 画像で表示する波形の最小サンプル数と画像サイズ（幅, 高さ）
+_RASTER_MIN_SAMPLES = 1_000_000
+_RASTER_SIZE = (800, 300)
+
+
+def _minmax_indices_impl(x, n_buckets):
+    """区間ごとの最小値・最大値のサンプル位置を時間順に取得（1回の走査、Numbaでコンパイルして使用）"""
+    out = np.empty(n_buckets * 2, np.int64)
+    step = len(x) / n_buckets
+    for i in range(n_buckets):
+        lo = int(i * step)
+        hi = int((i + 1) * step)
+        i_min = lo
+        i_max = lo
+        for j in range(lo + 1, hi):
+            if x[j] < x[i_min]:
+                i_min = j
+            elif x[j] > x[i_max]:
+                i_max = j
+        # 線が時間の逆方向に戻らないよう、先に現れた方を前に置く
+        if i_min < i_max:
+            out[2 * i] = i_min
+            out[2 * i + 1] = i_max
+        else:
+            out[2 * i] = i_max
+            out[2 * i + 1] = i_min
+    return out
+
+
+_minmax_kernel = None
+
+def _minmax_indices(x: np.ndarray, n_buckets: int) -> np.ndarray:
+    """_minmax_indices_implを初回呼び出し時にNumbaでコンパイルして実行"""
+    global _minmax_kernel
+    if _minmax_kernel is None:
+        from numba import njit
+        _minmax_kernel = njit(cache=True)(_minmax_indices_impl)
+    return _minmax_kernel(x, n_buckets)
+
+
+def _wav_pcm16_bytes(audio_segment: np.ndarray, sample_rate: int) -> bytes:
+    """モノラル音声を16bit PCMのWAVバイト列に変換（44バイトのRIFFヘッダー + PCMデータ）"""
+    # libsndfileと同じスケーリング（範囲外の値はクリップ）
+    scaled = np.multiply(audio_segment, 32768.0)
+    np.floor(scaled, out=scaled)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    data = scaled.astype('<i2').tobytes()
+    
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + len(data), b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', len(data)
+    )
+    return header + data
+
+
+@st.cache_data(ttl=24 * 60 * 60, max_entries=32, show_spinner=False)
+def _load_audio_cached(path_str: str, size: int, mtime_ns: int, sample_rate: int) -> Tuple[np.ndarray, int]:
+    """音声ファイルを読み込み（パス・サイズ・更新時刻・サンプリングレートをキーにキャッシュ）"""
+    # 元のサンプリングレートでlibsndfileでデコードし、soxrで直接リサンプリング
+    # （libsndfileが扱えない形式はlibrosa（audioread）で読み込む）
+    try:
+        audio_data, native_sr = sf.read(path_str, dtype='float32', always_2d=True)
+    except sf.SoundFileError:
+        # librosaはlibsndfileで読めない形式・スペクトル重心の計算時のみ必要なため、ここで読み込む（起動時間の短縮）
+        import librosa
+        return librosa.load(path_str, sr=sample_rate)
+    
+    # モノラル変換
+    if audio_data.shape[1] == 1:
+        audio_data = audio_data[:, 0]
+    else:
+        audio_data = audio_data.mean(axis=1, dtype=np.float32)
+    
+    if native_sr != sample_rate:
+        audio_data = soxr.resample(audio_data, native_sr, sample_rate, quality='HQ')
+    return audio_data, sample_rate
+
 
 class AudioProcessor:
     """音声処理クラス"""
@@ -37,10 +134,70 @@ class AudioProcessor:
             Tuple[音声データ, サンプリングレート]
         """
         try:
-            audio_data, sr = librosa.load(str(file_path), sr=self.sample_rate)
-            return audio_data, sr
+            # 再実行のたびにデコード・リサンプリングしないよう、キャッシュ経由で読み込み
+            stat_result = Path(file_path).stat()
+            return _load_audio_cached(
+                str(file_path), stat_result.st_size, stat_result.st_mtime_ns, self.sample_rate
+            )
+        except Exception as e:
+            raise Exception(f"音声ファイルの読み込みに失敗: {e}")
+    
+    def load_segment(
+        self,
+        file_path: Union[str, Path],
+        start_time: float,
+        end_time: float,
+        context_seconds: float = 2.0
+    ) -> Tuple[np.ndarray, float, float]:
+        """
+        音声ファイルから指定時間範囲（前後のコンテキスト込み）のみを読み込み
+        
+        ファイル全体をデコードせず、libsndfileでシークして必要なフレームのみ読み込む。
+        libsndfileが扱えない形式はlibrosa（audioread）で読み込む
+        
+        Args:
+            file_path: 音声ファイルのパス
+            start_time: 開始時間（秒）
+            end_time: 終了時間（秒）
+            context_seconds: 前後に含めるコンテキスト時間（秒）
+            
+        Returns:
+            Tuple[抽出された音声データ, 実際の開始時間, 実際の終了時間]
+        """
+        context_start = max(0, start_time - context_seconds)
+        
+        try:
+            with sf.SoundFile(str(file_path)) as f:
+                native_sr = f.samplerate
+                total_duration = f.frames / native_sr
+                context_end = min(total_duration, end_time + context_seconds)
+                
+                start_frame = int(context_start * native_sr)
+                end_frame = int(context_end * native_sr)
+                f.seek(min(start_frame, f.frames))
+                segment = f.read(max(0, end_frame - start_frame), dtype='float32', always_2d=True)
+        except sf.SoundFileError:
+            import librosa
+            segment, _ = librosa.load(
+                str(file_path),
+                sr=self.sample_rate,
+                offset=context_start,
+                duration=end_time + context_seconds - context_start
+            )
+            return segment, context_start, context_start + len(segment) / self.sample_rate
         except Exception as e:
             raise Exception(f"音声ファイルの読み込みに失敗: {e}")
+        
+        # モノラル変換
+        if segment.shape[1] == 1:
+            segment = segment[:, 0]
+        else:
+            segment = segment.mean(axis=1, dtype=np.float32)
+        
+        if native_sr != self.sample_rate and len(segment) > 0:
+            segment = soxr.resample(segment, native_sr, self.sample_rate, quality='HQ')
+        
+        return segment, context_start, context_end
     
     def extract_segment(
         self, 
@@ -53,6 +210,9 @@ class AudioProcessor:
         """
         指定時間範囲の音声セグメントを抽出
         
+        セグメントはコピーせずaudio_dataのビューを返す（np.memmapの場合もファイルを読み込まない）。
+        変更する場合は呼び出し側でcopy()すること
+        
         Args:
             audio_data: 音声データ
             start_time: 開始時間（秒）
@@ -61,7 +221,7 @@ class AudioProcessor:
             context_seconds: 前後に含めるコンテキスト時間（秒）
             
         Returns:
-            Tuple[抽出された音声データ, 実際の開始時間, 実際の終了時間]
+            Tuple[抽出された音声データ（audio_dataのビュー）, 実際の開始時間, 実際の終了時間]
         """
         # 音声の全長を計算
         total_duration = len(audio_data) / sample_rate
@@ -74,7 +234,7 @@ class AudioProcessor:
         start_sample = int(context_start * sample_rate)
         end_sample = int(context_end * sample_rate)
         
-        # セグメントを抽出
+        # セグメントを抽出（1次元配列のスライスのため連続したビューになる）
         segment = audio_data[start_sample:end_sample]
         
         return segment, context_start, context_end
@@ -89,27 +249,28 @@ class AudioProcessor:
         音声セグメントをバイトデータとして保存
         
         Args:
-            audio_segment: 音声セグメントデータ
+            audio_segment: 音声セグメントデータ（読み取りのみのため、extract_segmentのビューをそのまま渡せる）
             sample_rate: サンプリングレート
             format: 出力フォーマット（'wav', 'mp3'など）
             
         Returns:
             音声データのバイト列
         """
+        # モノラルのWAVはlibsndfileを介さずヘッダーとPCMデータを直接作成
+        if format.lower() == 'wav' and audio_segment.ndim == 1 and np.issubdtype(audio_segment.dtype, np.floating):
+            return _wav_pcm16_bytes(audio_segment, sample_rate)
+        
         buffer = io.BytesIO()
         
         try:
-            # 一時ファイルを使用してフォーマット変換
-            with tempfile.NamedTemporaryFile(suffix=f'.{format}') as temp_file:
-                sf.write(temp_file.name, audio_segment, sample_rate, format=format.upper())
-                
-                # ファイルを読み込んでバイトデータとして返す
-                with open(temp_file.name, 'rb') as f:
-                    return f.read()
+            # 一時ファイルを介さずメモリ上でフォーマット変換（libsndfile 1.1以降はMP3にも対応）
+            sf.write(buffer, audio_segment, sample_rate, format=format.upper())
+            return buffer.getvalue()
                     
         except Exception as e:
             # WAVフォーマットでの直接保存にフォールバック
-            sf.write(buffer, audio_segment, sample_rate, format='WAV')
+            buffer = io.BytesIO()
+            sf.write(buffer, audio_segment, sample_rate, format='WAV', subtype='PCM_16')
             return buffer.getvalue()
     
     def generate_waveform_plot_data(
@@ -131,14 +292,39 @@ class AudioProcessor:
         Returns:
             プロット用データの辞書
         """
-        # 時間軸を生成
-        duration = len(audio_data) / sample_rate
-        time_axis = np.linspace(0, duration, len(audio_data))
+        n_samples = len(audio_data)
+        duration = n_samples / sample_rate
+        
+        # 非常に長い波形は間引くと細部が失われるため画像に描画
+        if DATASHADER_AVAILABLE and n_samples > _RASTER_MIN_SAMPLES:
+            plot_data = {
+                'image': _rasterize_waveform(audio_data, sample_rate),
+                'duration': duration,
+                'sample_rate': sample_rate
+            }
+            if detection_start is not None and detection_end is not None:
+                plot_data['detection_start'] = detection_start
+                plot_data['detection_end'] = detection_end
+            return plot_data
         
-        # ダウンサンプリング（表示用）
-        downsample_factor = max(1, len(audio_data) // 2000)  # 最大2000ポイント
-        time_downsampled = time_axis[::downsample_factor]
-        audio_downsampled = audio_data[::downsample_factor]
+        # ダウンサンプリング（表示用、最大2000ポイント）
+        # 時間軸は残すサンプル位置のみ計算し、全サンプル分の配列を作らない
+        if TSDOWNSAMPLE_AVAILABLE and n_samples > _WAVEFORM_MAX_POINTS:
+            # 等間隔の間引きでは振幅のピークが落ちるため、区間ごとの最大・最小を残す
+            idx = MinMaxLTTBDownsampler().downsample(
+                np.ascontiguousarray(audio_data), n_out=_WAVEFORM_MAX_POINTS
+            )
+            time_downsampled = idx.astype(np.float32) / sample_rate
+            audio_downsampled = audio_data[idx].astype(np.float32, copy=False)
+        elif NUMBA_AVAILABLE and n_samples > _WAVEFORM_MAX_POINTS:
+            # tsdownsampleがない場合もピークが落ちないよう、区間ごとの最大・最小を残す
+            idx = _minmax_indices(np.ascontiguousarray(audio_data), _WAVEFORM_MAX_POINTS // 2)
+            time_downsampled = idx.astype(np.float32) / sample_rate
+            audio_downsampled = audio_data[idx].astype(np.float32, copy=False)
+        else:
+            downsample_factor = max(1, n_samples // _WAVEFORM_MAX_POINTS)
+            time_downsampled = np.arange(0, n_samples, downsample_factor, dtype=np.float32) / sample_rate
+            audio_downsampled = audio_data[::downsample_factor].astype(np.float32, copy=False)
         
         plot_data = {
             'time': time_downsampled,
@@ -154,23 +340,158 @@ class AudioProcessor:
         
         return plot_data
     
+    def envelope_plot_data(
+        self,
+        envelope: bytes,
+        detection_start: float = None,
+        detection_end: float = None
+    ) -> dict:
+        """
+        保存済みの波形エンベロープから波形プロット用データを作成（音声のデコード不要）
+        
+        エンベロープの形式はlib/audio_processing/segment_generator.pyの
+        AudioSegmentGenerator.compute_waveform_envelope()を参照
+        
+        Args:
+            envelope: 検出レコードのwaveform_envelope
+            detection_start: 検出開始時間（秒）
+            detection_end: 検出終了時間（秒）
+            
+        Returns:
+            generate_waveform_plot_data()と同じ形式の辞書
+        """
+        duration = struct.unpack_from('<f', envelope)[0]
+        pairs = np.frombuffer(envelope, dtype='<f2', offset=4).reshape(-1, 2)
+        n_buckets = len(pairs)
+        
+        # 区間ごとに最小・最大を同じ時刻（区間の中央）に置き、縦線で包絡を描く
+        bucket_centers = (np.arange(n_buckets, dtype=np.float32) + 0.5) * (duration / max(n_buckets, 1))
+        plot_data = {
+            'time': np.repeat(bucket_centers, 2),
+            'amplitude': pairs.astype(np.float32).ravel(),
+            'duration': duration,
+            'sample_rate': self.sample_rate
+        }
+        
+        if detection_start is not None and detection_end is not None:
+            plot_data['detection_start'] = detection_start
+            plot_data['detection_end'] = detection_end
+        
+        return plot_data
+    
+    def load_waveform_plot_data(
+        self,
+        file_path: Union[str, Path],
+        start_time: float,
+        end_time: float,
+        context_seconds: float = 2.0
+    ) -> dict:
+        """
+        音声ファイルの検出区間から波形プロット用データを作成（ファイル・区間ごとにキャッシュ）
+        
+        Args:
+            file_path: 音声ファイルのパス
+            start_time: 検出開始時間（秒）
+            end_time: 検出終了時間（秒）
+            context_seconds: 前後に含めるコンテキスト時間（秒）
+            
+        Returns:
+            generate_waveform_plot_data()と同じ形式の辞書（時間はセグメントの先頭から）
+        """
+        stat_result = Path(file_path).stat()
+        return _waveform_plot_data(
+            str(file_path), stat_result.st_size, stat_result.st_mtime_ns,
+            float(start_time), float(end_time), float(context_seconds), self.sample_rate
+        )
+    
     def calculate_audio_statistics(self, audio_data: np.ndarray) -> dict:
         """
         音声データの統計情報を計算
         
+        スペクトル重心はSTFTが必要なため、calculate_spectral_centroid()で個別に計算する
+        
         Args:
             audio_data: 音声データ
             
         Returns:
             統計情報の辞書
         """
+        # 符号の変化した隣接サンプルの割合（フレーム分割・STFTなしで1回の走査で計算）
+        sign = np.signbit(audio_data)
+        zero_crossing_rate = float(np.mean(sign[1:] != sign[:-1])) if len(audio_data) > 1 else 0.0
+        
         return {
             'duration': len(audio_data) / self.sample_rate,
             'max_amplitude': float(np.max(np.abs(audio_data))),
-            'rms_amplitude': float(np.sqrt(np.mean(audio_data**2))),
-            'zero_crossing_rate': float(librosa.feature.zero_crossing_rate(audio_data)[0].mean()),
-            'spectral_centroid': float(librosa.feature.spectral_centroid(y=audio_data, sr=self.sample_rate)[0].mean())
+            'rms_amplitude': float(np.sqrt(np.mean(np.square(audio_data, dtype=np.float64)))),
+            'zero_crossing_rate': zero_crossing_rate
         }
+    
+    def calculate_spectral_centroid(self, audio_data: np.ndarray) -> float:
+        """
+        音声データのスペクトル重心（フレーム平均）を計算
+        
+        Args:
+            audio_data: 音声データ
+            
+        Returns:
+            スペクトル重心（Hz）
+        """
+        import librosa
+        return float(librosa.feature.spectral_centroid(y=audio_data, sr=self.sample_rate)[0].mean())
+
+
+def _rasterize_waveform(audio_data: np.ndarray, sample_rate: int):
+    """波形をDatashaderで画像に描画（描画コストはサンプル数ではなく画素数に比例）"""
+    import pandas as pd
+    import datashader as ds
+    import datashader.transfer_functions as tf
+    
+    duration = len(audio_data) / sample_rate
+    width, height = _RASTER_SIZE
+    canvas = ds.Canvas(plot_width=width, plot_height=height, x_range=(0, duration), y_range=(-1, 1))
+    agg = canvas.line(
+        pd.DataFrame({'t': np.arange(len(audio_data)) / sample_rate, 'a': audio_data}), 't', 'a'
+    )
+    return tf.shade(agg, cmap=['blue']).to_pil()
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _waveform_plot_data(
+    path_str: str,
+    size: int,
+    mtime_ns: int,
+    start_time: float,
+    end_time: float,
+    context_seconds: float,
+    sample_rate: int
+) -> dict:
+    """検出区間の波形プロット用データを作成（キーはスカラー値のみのため配列のハッシュ計算が不要）"""
+    processor = get_processor(sample_rate)
+    segment, context_start, _ = processor.load_segment(path_str, start_time, end_time, context_seconds)
+    
+    # 検出範囲は切り出したセグメントの先頭からの時間で指定
+    return processor.generate_waveform_plot_data(
+        segment, sample_rate,
+        detection_start=start_time - context_start,
+        detection_end=end_time - context_start
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_processor(sample_rate: int = 22050) -> AudioProcessor:
+    """サンプリングレートごとに共有するAudioProcessorを取得"""
+    return AudioProcessor(sample_rate)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_plotly():
+    """plotly.graph_objectsを一度だけ読み込み（未インストール時はNoneをキャッシュ）"""
+    try:
+        import plotly.graph_objects as go
+        return go
+    except ImportError:
+        return None
 
 
 class AudioPlayerComponent:
@@ -215,20 +536,36 @@ class AudioPlayerComponent:
         Args:
             plot_data: generate_waveform_plot_data()からの出力
         """
+        go = _get_plotly()
+        if go is None:
+            st.warning("波形表示にはplotlyが必要です")
+            return
+        
         try:
-            import plotly.graph_objects as go
-            from plotly.subplots import make_subplots
-            
-            fig = go.Figure()
-            
-            # 波形を追加
-            fig.add_trace(go.Scatter(
-                x=plot_data['time'],
-                y=plot_data['amplitude'],
-                mode='lines',
-                name='音声波形',
-                line=dict(color='blue', width=1)
-            ))
+            if 'image' in plot_data:
+                # Datashaderで描画した画像を時間・振幅の座標に合わせて配置
+                fig = go.Figure()
+                fig.add_layout_image(
+                    source=plot_data['image'],
+                    xref='x', yref='y',
+                    x=0, y=1,
+                    sizex=plot_data['duration'], sizey=2,
+                    sizing='stretch',
+                    layer='below'
+                )
+                fig.update_xaxes(range=[0, plot_data['duration']])
+                fig.update_yaxes(range=[-1, 1])
+            else:
+                fig = go.Figure()
+                
+                # 波形を追加（SVGではなくWebGLで描画）
+                fig.add_trace(go.Scattergl(
+                    x=plot_data['time'],
+                    y=plot_data['amplitude'],
+                    mode='lines',
+                    name='音声波形',
+                    line=dict(color='blue', width=1)
+                ))
             
             # 検出範囲がある場合はハイライト
             if 'detection_start' in plot_data and 'detection_end' in plot_data:
@@ -248,13 +585,14 @@ class AudioPlayerComponent:
                 xaxis_title="時間 (秒)",
                 yaxis_title="振幅",
                 height=300,
-                showlegend=True
+                showlegend=True,
+                # 点ごとのホバー処理を省き、再実行時もズーム・パン状態を保持
+                hovermode=False,
+                uirevision='waveform'
             )
             
             st.plotly_chart(fig, use_container_width=True)
             
-        except ImportError:
-            st.warning("波形表示にはplotlyが必要です")
         except Exception as e:
             st.error(f"波形表示エラー: {e}")
 
@@ -284,6 +622,13 @@ def validate_time_range(start: float, end: float, max_duration: float) -> Tuple[
     return True, "OK"
 
 
+def validate_time_range_vec(starts: np.ndarray, ends: np.ndarray, max_duration: float) -> np.ndarray:
+    """複数の時間範囲の妥当性をまとめて検証（validate_time_rangeと同じ条件、行ごとの真偽値を返す）"""
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    return (starts >= 0) & (ends <= max_duration) & (starts < ends)
+
+
 # エラーハンドリング用のデコレータ
 def handle_audio_errors(func):
     """音声処理エラーをハンドリングするデコレータ"""
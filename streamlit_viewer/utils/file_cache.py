@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+生成ファイルの読み込みユーティリティ
+音声セグメント・スペクトログラムの内容をページ間で共有してキャッシュ
+"""
+
+import os
+from pathlib import Path
+from typing import Union
+import streamlit as st
+
+
+@st.cache_resource(max_entries=16, ttl=24 * 60 * 60, show_spinner=False)
+def _read_bytes(path_str: str, size: int, mtime_ns: int) -> bytes:
+    """ファイルの内容を読み込み（パス・サイズ・更新時刻をキーにキャッシュ）
+
+    cache_dataは取得のたびに値を複製するため、不変のbytesはcache_resourceで共有する
+    """
+    return Path(path_str).read_bytes()
+
+
+def load_bytes(path: Union[str, Path]) -> bytes:
+    """
+    再実行のたびにファイルを読み直さないよう、キャッシュ経由で内容を取得
+
+    Args:
+        path: ファイルパス
+
+    Returns:
+        ファイルの内容
+
+    Raises:
+        OSError: ファイルが存在しない・読み込めない場合（呼び出し側で未生成として扱う）
+    """
+    stat_result = os.stat(path)
+    return _read_bytes(str(path), stat_result.st_size, stat_result.st_mtime_ns)